@@ -0,0 +1,57 @@
+from __future__ import print_function
+import argparse
+import shutil
+import tempfile
+
+import numpy as np
+
+from chainer.dataset import concat_examples
+
+from chainercv.datasets import VOCSemanticSegmentationDataset
+
+from benchmark_utils import make_voc_segmentation
+from benchmark_utils import timeit
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compare batch assembly with get_example and '
+        'get_examples')
+    parser.add_argument('--n_images', type=int, default=256)
+    parser.add_argument('--batch_size', '-b', type=int, default=32)
+    args = parser.parse_args()
+
+    data_dir = tempfile.mkdtemp()
+    try:
+        make_voc_segmentation(data_dir, args.n_images)
+        dataset = VOCSemanticSegmentationDataset(data_dir, mode='train')
+        batches = [list(range(i, i + args.batch_size)) for i in
+                   range(0, len(dataset) - args.batch_size + 1,
+                         args.batch_size)]
+        out = np.empty(
+            (args.batch_size,) + dataset.get_example(0)[0].shape,
+            dtype=np.float32)
+
+        def per_example():
+            for indices in batches:
+                concat_examples([dataset.get_example(i) for i in indices])
+
+        def batched():
+            for indices in batches:
+                dataset.get_examples(indices)
+
+        def batched_out():
+            for indices in batches:
+                dataset.get_examples(indices, out=out)
+
+        print('{} batches of {} images'.format(
+            len(batches), args.batch_size))
+        timeit('get_example + concat_examples', per_example)
+        timeit('get_examples', batched)
+        timeit('get_examples (out=)', batched_out)
+    finally:
+        shutil.rmtree(data_dir)
+
+
+if __name__ == '__main__':
+    main()
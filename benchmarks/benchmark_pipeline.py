@@ -0,0 +1,47 @@
+from __future__ import print_function
+import argparse
+import numpy as np
+
+from chainercv import transforms
+
+from benchmark_utils import timeit
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compare stacked transforms and a fused Pipeline')
+    parser.add_argument('--n_examples', type=int, default=200)
+    args = parser.parse_args()
+
+    imgs = np.random.uniform(
+        0, 255, size=(args.n_examples, 3, 375, 500)).astype(np.float32)
+    labels = np.random.randint(
+        0, 21, size=(args.n_examples, 1, 375, 500)).astype(np.int32)
+    mean = np.array([103.939, 116.779, 123.68], np.float32)[:, None, None]
+
+    def stacked():
+        for img, label in zip(imgs, labels):
+            img, label = transforms.random_flip(
+                (img, label), horizontal_flip=True)
+            img, label = transforms.random_crop(
+                (img, label), (None, 320, 320))
+            img = img - mean
+
+    pipeline = transforms.Pipeline([
+        transforms.RandomFlip(horizontal_flip=True),
+        transforms.RandomCrop((None, 320, 320)),
+        transforms.SubtractMean(mean)])
+
+    def fused():
+        for img, label in zip(imgs, labels):
+            pipeline((img, label))
+
+    timeit('stacked transforms', stacked)
+    pipeline.reset_stats()
+    timeit('Pipeline', fused)
+    for name, stat in pipeline.stats().items():
+        print('  {:<38} {:.6f} sec/example'.format(name, stat['mean']))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,54 @@
+from __future__ import print_function
+import argparse
+import shutil
+import tempfile
+import time
+
+from chainer import iterators
+
+from chainercv.datasets import VOCSemanticSegmentationDataset
+from chainercv.iterators import PrefetchIterator
+
+from benchmark_utils import make_voc_segmentation
+from benchmark_utils import timeit
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compare SerialIterator and PrefetchIterator with a '
+        'simulated training step')
+    parser.add_argument('--n_images', type=int, default=256)
+    parser.add_argument('--batch_size', '-b', type=int, default=32)
+    parser.add_argument('--n_threads', type=int, default=4)
+    parser.add_argument('--step_time', type=float, default=0.05)
+    args = parser.parse_args()
+
+    data_dir = tempfile.mkdtemp()
+    try:
+        make_voc_segmentation(data_dir, args.n_images)
+        dataset = VOCSemanticSegmentationDataset(data_dir, mode='train')
+
+        def run(it):
+            for batch in it:
+                # training step
+                time.sleep(args.step_time)
+
+        def serial():
+            run(iterators.SerialIterator(
+                dataset, args.batch_size, repeat=False, shuffle=False))
+
+        def prefetch():
+            it = PrefetchIterator(
+                dataset, args.batch_size, repeat=False, shuffle=False,
+                n_threads=args.n_threads)
+            run(it)
+            it.finalize()
+
+        timeit('SerialIterator', serial)
+        timeit('PrefetchIterator', prefetch)
+    finally:
+        shutil.rmtree(data_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,55 @@
+from __future__ import print_function
+import argparse
+import numpy as np
+import shutil
+import tempfile
+
+from chainercv.datasets import export_records
+from chainercv.datasets import RecordDataset
+from chainercv.datasets import VOCSemanticSegmentationDataset
+
+from benchmark_utils import make_voc_segmentation
+from benchmark_utils import timeit
+
+
+def main():
+    parser = argparse.ArgumentParser(
+        description='Compare per-file reads with sharded records')
+    parser.add_argument('--n_images', type=int, default=256)
+    parser.add_argument('--examples_per_shard', type=int, default=64)
+    args = parser.parse_args()
+
+    data_dir = tempfile.mkdtemp()
+    try:
+        make_voc_segmentation(data_dir, args.n_images)
+        dataset = VOCSemanticSegmentationDataset(data_dir, mode='train')
+        order = np.random.permutation(len(dataset))
+
+        def read_all(dataset):
+            def f():
+                for i in order:
+                    dataset.get_raw_data(i)
+            return f
+
+        timeit('per-file get_raw_data', read_all(dataset))
+        for img_format in ['raw', 'jpeg']:
+            record_dir = tempfile.mkdtemp(dir=data_dir)
+            export_records(
+                dataset, record_dir,
+                examples_per_shard=args.examples_per_shard,
+                img_format=img_format)
+            records = RecordDataset(record_dir)
+
+            def stream():
+                for _ in records.stream(shuffle=True):
+                    pass
+
+            timeit('records ({}) get_raw_data'.format(img_format),
+                   read_all(records))
+            timeit('records ({}) stream'.format(img_format), stream)
+    finally:
+        shutil.rmtree(data_dir)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,38 @@
+from __future__ import print_function
+import numpy as np
+import os
+from PIL import Image
+import time
+
+
+def make_voc_segmentation(data_dir, n_images, shape=(375, 500)):
+    """Write random images in the layout of VOC semantic segmentation."""
+    for sub_dir in ['JPEGImages', 'SegmentationClass',
+                    'ImageSets/Segmentation']:
+        if not os.path.exists(os.path.join(data_dir, sub_dir)):
+            os.makedirs(os.path.join(data_dir, sub_dir))
+
+    ids = ['{:06d}'.format(i) for i in range(n_images)]
+    for id_ in ids:
+        img = np.random.randint(0, 256, size=shape + (3,)).astype(np.uint8)
+        Image.fromarray(img).save(
+            os.path.join(data_dir, 'JPEGImages', id_ + '.jpg'))
+        label = np.random.randint(0, 21, size=shape).astype(np.uint8)
+        Image.fromarray(label).save(
+            os.path.join(data_dir, 'SegmentationClass', id_ + '.png'))
+    for mode in ['train', 'val', 'trainval']:
+        with open(os.path.join(
+                data_dir, 'ImageSets/Segmentation', mode + '.txt'), 'w') as f:
+            f.write('\n'.join(ids) + '\n')
+    return data_dir
+
+
+def timeit(name, func, n_repeat=3):
+    """Run :obj:`func` and print the best wall time of the runs."""
+    times = []
+    for _ in range(n_repeat):
+        start = time.time()
+        func()
+        times.append(time.time() - start)
+    print('{:<40} {:.4f} sec'.format(name, min(times)))
+    return min(times)
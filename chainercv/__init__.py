@@ -1,6 +1,7 @@
 from chainercv import datasets  # NOQA
 from chainercv import extensions  # NOQA
 from chainercv import functions  # NOQA
+from chainercv import iterators  # NOQA
 from chainercv import links  # NOQA
 from chainercv import transforms  # NOQA
 from chainercv import utils  # NOQA
@@ -2,4 +2,8 @@ from chainercv.datasets.cub.cub_keypoint_dataset import CUBKeypointsDataset  # N
 from chainercv.datasets.cub.cub_label_dataset import CUBLabelDataset  # NOQA
 from chainercv.datasets.online_products.online_products_dataset import OnlineProductsDataset  # NOQA
 from chainercv.datasets.pascal_voc.voc_detection import VOCDetectionDataset  # NOQA
+from chainercv.datasets.pascal_voc.voc_packed_detection_dataset import pack_voc_detection  # NOQA
+from chainercv.datasets.pascal_voc.voc_packed_detection_dataset import VOCPackedDetectionDataset  # NOQA
 from chainercv.datasets.pascal_voc.voc_semantic_segmentation_dataset import VOCSemanticSegmentationDataset  # NOQA
+from chainercv.datasets.record.record_dataset import export_records  # NOQA
+from chainercv.datasets.record.record_dataset import RecordDataset  # NOQA
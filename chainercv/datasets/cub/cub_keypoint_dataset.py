@@ -1,9 +1,11 @@
-import collections
+import functools
 import numpy as np
 import os.path as osp
 
 from chainercv.datasets.cub.cub_utils import CUBDatasetBase
+from chainercv.transforms import resize_keypoint
 from chainercv import utils
+from chainercv.utils.dataset_utils import batch_raw_data
 
 
 class CUBKeypointsDataset(CUBDatasetBase):
@@ -21,14 +23,30 @@ class CUBKeypointsDataset(CUBDatasetBase):
     :obj:`y` are coordinates of a keypoint. :obj:`valid` is whether the
     keypoint is visible in the image or not.
 
+    :obj:`flip_pairs` holds the pairs of the indices of the left and the
+    right eyes, legs and wings, which are swapped when an image is flipped
+    horizontally by :func:`chainercv.transforms.flip_keypoint`.
+
     Args:
         data_dir (string): Path to the root of the training data. If this is
             :obj:`auto`, this class will automatically download data for you
             under :obj:`$CHAINER_DATASET_ROOT/pfnet/chainercv/cub`.
+            This can also be a file source such as
+            :class:`chainercv.utils.ArchiveFileSource`, which reads the
+            files from an archive without extracting it.
         mode ({`train`, `test`}): Select train or test split used in
             [Kanazawa]_.
         crop_bbox (bool): If true, this class returns an image cropped
             by the bounding box of the bird inside it.
+        resize_shape (tuple): If this is not :obj:`None`, images are
+            resized to this shape, which is a tuple of height and width,
+            while they are decoded. JPEG images are decoded at a reduced
+            scale, which is much cheaper than decoding at full resolution
+            and resizing afterwards. The keypoints are resized
+            accordingly.
+        image_cache (~chainercv.utils.DecodedImageCache): If this is not
+            :obj:`None`, decoded images are looked up in and added to this
+            cache, which can be shared by processes.
 
     .. [Kanazawa] Angjoo Kanazawa, David W. Jacobs, \
        Manmohan Chandraker. WarpNet: Weakly Supervised Matching for \
@@ -36,10 +54,14 @@ class CUBKeypointsDataset(CUBDatasetBase):
 
     """
 
+    # left eye, left leg and left wing paired with their right ones
+    flip_pairs = ((6, 10), (7, 11), (8, 12))
+
     def __init__(self, data_dir='auto', mode='train',
-                 crop_bbox=True):
+                 crop_bbox=True, resize_shape=None, image_cache=None):
         super(CUBKeypointsDataset, self).__init__(
-            data_dir=data_dir, crop_bbox=crop_bbox)
+            data_dir=data_dir, crop_bbox=crop_bbox,
+            resize_shape=resize_shape, image_cache=image_cache)
 
         # set mode
         test_images = np.load(
@@ -55,44 +77,80 @@ class CUBKeypointsDataset(CUBDatasetBase):
         else:
             raise ValueError('invalid mode')
 
-        # load keypoints
-        parts_loc_file = osp.join(self.data_dir, 'parts/part_locs.txt')
-        keypoints_dict = collections.OrderedDict()
-        for loc in open(parts_loc_file):
-            values = loc.split()
-            id_ = int(values[0]) - 1
-            if id_ not in keypoints_dict:
-                keypoints_dict[id_] = []
-            keypoints = [float(v) for v in values[2:]]
-            keypoints_dict[id_].append(keypoints)
-        self.keypoints_dict = keypoints_dict
+        # (N, 15, 3) array of the keypoints of all images
+        self.keypoints = self._metadata['keypoints']
 
     def __len__(self):
         return len(self.selected_ids)
 
+    def get_image_shapes(self):
+        """Returns the heights and the widths of the images.
+
+        See
+        :func:`chainercv.utils.dataset_utils.read_image_shapes`.
+
+        """
+        return self._image_shapes(self.selected_ids)
+
     def get_example(self, i):
-        img, keypoints = self.get_raw_data(i)
-        if img.ndim == 2:
-            img = utils.gray2rgb(img)
-        img = img[:, :, ::-1]  # RGB to BGR
-        img = img.transpose(2, 0, 1).astype(np.float32)
+        img, keypoints = self.get_raw_data(i, copy=False)
+        img = utils.hwc_to_chw(img)  # RGB to BGR
         return img, keypoints
 
-    def get_raw_data(self, i, rgb=True):
+    def get_examples(self, indices, out=None):
+        """Returns the examples at the given indices as a batch.
+
+        The images are written directly into one array, so that the batch
+        is assembled in one pass. This requires all images to have the
+        same shape.
+
+        Args:
+            indices (list of ints): The indices of the examples.
+            out (~numpy.ndarray): An array of shape :math:`(N, 3, H, W)`
+                to which BGR images are written. If this is :obj:`None`,
+                a new array of :obj:`dtype==numpy.float32` is allocated.
+
+        Returns:
+            tuple of an array of images and an array of keypoints whose
+            shapes are :math:`(N, 3, H, W)` and :math:`(N, 15, 3)`
+            respectively.
+
+        """
+        imgs, keypoints = batch_raw_data(
+            functools.partial(self.get_raw_data, copy=False), indices, out)
+        return imgs, np.stack(keypoints)
+
+    def get_raw_data(self, i, rgb=True, copy=True):
+        """Returns the i-th example.
+
+        This returns a color image and its keypoints. The image is in HWC
+        format. When the keypoints are not cropped or resized, they are a
+        read-only view of :obj:`keypoints`.
+
+        Args:
+            i (int): The index of the example.
+            rgb (bool): If false, the returned image will be in BGR.
+            copy (bool): If false, the returned image may be a read-only
+                array. This saves a copy when the image is converted
+                afterwards.
+
+        Returns:
+            i-th example (image, keypoints)
+
+        """
         # this i is transformed to id for the entire dataset
         original_idx = self.selected_ids[i]
-        img = utils.read_image_as_array(osp.join(
-            self.data_dir, 'images', self.fns[original_idx]))  # RGB
-        keypoints = self.keypoints_dict[original_idx]
-        keypoints = np.array(keypoints, dtype=np.float32)
+        img, in_shape = self._read_image(original_idx, copy=copy)  # RGB
+        keypoints = self.keypoints[original_idx]
 
         if self.crop_bbox:
             bbox = self.bboxes[original_idx]  # (x, y, width, height)
-            img = img[bbox[1]: bbox[1] + bbox[3], bbox[0]: bbox[0] + bbox[2]]
-            keypoints[:, :2] = keypoints[:, :2] - np.array([bbox[0], bbox[1]])
+            keypoints = keypoints - np.array(
+                [bbox[0], bbox[1], 0], dtype=np.float32)
+        if self.resize_shape is not None:
+            keypoints = resize_keypoint(
+                keypoints, in_shape, self.resize_shape)
 
-        if img.ndim == 2:
-            img = utils.gray2rgb(img)
         if not rgb:
             img = img[:, :, ::-1]
         return img, keypoints
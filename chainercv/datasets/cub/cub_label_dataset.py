@@ -1,7 +1,9 @@
-import os.path as osp
+import functools
+import numpy as np
 
 from chainercv.datasets.cub.cub_utils import CUBDatasetBase
 from chainercv import utils
+from chainercv.utils.dataset_utils import batch_raw_data
 
 
 class CUBLabelDataset(CUBDatasetBase):
@@ -16,27 +18,47 @@ class CUBLabelDataset(CUBDatasetBase):
         data_dir (string): Path to the root of the training data. If this is
             :obj:`auto`, this class will automatically download data for you
             under :obj:`$CHAINER_DATASET_ROOT/pfnet/chainercv/cub`.
+            This can also be a file source such as
+            :class:`chainercv.utils.ArchiveFileSource`, which reads the
+            files from an archive without extracting it.
         crop_bbox (bool): If true, this class returns an image cropped
             by the bounding box of the bird inside it.
+        resize_shape (tuple): If this is not :obj:`None`, images are
+            resized to this shape, which is a tuple of height and width,
+            while they are decoded. JPEG images are decoded at a reduced
+            scale, which is much cheaper than decoding at full resolution
+            and resizing afterwards.
+        image_cache (~chainercv.utils.DecodedImageCache): If this is not
+            :obj:`None`, decoded images are looked up in and added to this
+            cache, which can be shared by processes.
 
     """
 
-    def __init__(self, data_dir='auto', crop_bbox=True):
+    def __init__(self, data_dir='auto', crop_bbox=True, resize_shape=None,
+                 image_cache=None):
         super(CUBLabelDataset, self).__init__(
-            data_dir=data_dir, crop_bbox=crop_bbox)
+            data_dir=data_dir, crop_bbox=crop_bbox,
+            resize_shape=resize_shape, image_cache=image_cache)
 
-        classes_file = osp.join(self.data_dir, 'classes.txt')
-        image_class_labels_file = osp.join(
-            self.data_dir, 'image_class_labels.txt')
-        self.labels = [label.split()[1] for label in open(classes_file)]
-        self._data_labels = [int(d_label.split()[1]) - 1 for
-                             d_label in open(image_class_labels_file)]
+        self.labels = [
+            label.split()[1] for label in
+            self.source.read('classes.txt').decode().splitlines()]
+        self._data_labels = self._metadata['labels']
+
+    def get_image_shapes(self):
+        """Returns the heights and the widths of the images.
+
+        See
+        :func:`chainercv.utils.dataset_utils.read_image_shapes`.
+
+        """
+        return self._image_shapes(np.arange(len(self)))
 
     def get_example(self, i):
         """Returns the i-th example.
 
-        Returns a color image and bounding boxes. The image is in CHW format.
-        If `self.bgr` is True, the image is in BGR. If not, it is in RGB.
+        Returns a color image and its label. The image is in CHW format.
+        The returned image is BGR.
 
         Args:
             i (int): The index of the example.
@@ -45,12 +67,32 @@ class CUBLabelDataset(CUBDatasetBase):
             tuple of an image and its label.
 
         """
-        img, label = self.get_raw_data(i)
-        img = img[:, :, ::-1]  # RGB to BGR
-        img = img.transpose(2, 0, 1)
+        img, label = self.get_raw_data(i, copy=False)
+        img = utils.hwc_to_chw(img)  # RGB to BGR
         return img, label
 
-    def get_raw_data(self, i, rgb=True):
+    def get_examples(self, indices, out=None):
+        """Returns the examples at the given indices as a batch.
+
+        The images are written directly into one array, so that the batch
+        is assembled in one pass. This requires all images to have the
+        same shape.
+
+        Args:
+            indices (list of ints): The indices of the examples.
+            out (~numpy.ndarray): An array of shape :math:`(N, 3, H, W)`
+                to which BGR images are written. If this is :obj:`None`,
+                a new array of :obj:`dtype==numpy.float32` is allocated.
+
+        Returns:
+            tuple of an array of images and an array of their labels.
+
+        """
+        imgs, labels = batch_raw_data(
+            functools.partial(self.get_raw_data, copy=False), indices, out)
+        return imgs, np.array(labels, dtype=np.int32)
+
+    def get_raw_data(self, i, rgb=True, copy=True):
         """Returns the i-th example.
 
         This returns a color image and its label. The image is in HWC foramt.
@@ -58,21 +100,17 @@ class CUBLabelDataset(CUBDatasetBase):
         Args:
             i (int): The index of the example.
             rgb (bool): If false, the returned image will be in BGR.
+            copy (bool): If false, the returned image may be a read-only
+                array. This saves a copy when the image is converted
+                afterwards.
 
         Returns:
             i-th example (image, label)
 
         """
-        img = utils.read_image_as_array(
-            osp.join(self.data_dir, 'images', self.fns[i]))  # RGB
-        if img.ndim == 2:
-            img = utils.gray2rgb(img)
+        img, _ = self._read_image(i, copy=copy)  # RGB
         if not rgb:
             img = img[:, :, ::-1]
-
-        if self.crop_bbox:
-            bbox = self.bboxes[i]  # (x, y, width, height)
-            img = img[bbox[1]: bbox[1] + bbox[3], bbox[0]: bbox[0] + bbox[2]]
         label = self._data_labels[i]
         return img, label
 
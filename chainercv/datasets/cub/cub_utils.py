@@ -1,9 +1,14 @@
+import numpy as np
 import os
 
 import chainer
 from chainer.dataset import download
 
 from chainercv import utils
+from chainercv.utils.download import extraction_in_progress
+from chainercv.utils.dataset_utils import cache_load_arrays
+from chainercv.utils.dataset_utils import file_manifest_digest
+from chainercv.utils.dataset_utils import read_image_shapes
 
 
 root = 'pfnet/chainercv/cub'
@@ -14,7 +19,7 @@ url = 'http://www.vision.caltech.edu/visipedia-data/CUB-200-2011/'\
 def get_cub():
     data_root = download.get_dataset_directory(root)
     base_path = os.path.join(data_root, 'CUB_200_2011')
-    if os.path.exists(base_path):
+    if os.path.exists(base_path) and not extraction_in_progress(data_root):
         # skip downloading
         return base_path
 
@@ -24,25 +29,122 @@ def get_cub():
     return base_path
 
 
+def _read_table(source, name, n_col):
+    values = np.array(source.read(name).decode().split(), dtype=np.float64)
+    return values.reshape(-1, n_col)
+
+
+def _load_metadata(source):
+    fns = np.array(source.read('images.txt').decode().split()[1::2])
+    n = len(fns)
+
+    # (x, y, width, height)
+    bboxes = _read_table(source, 'bounding_boxes.txt', 5)
+    bboxes = bboxes[:, 1:].astype(np.int32)
+
+    labels = _read_table(source, 'image_class_labels.txt', 2)
+    labels = labels[:, 1].astype(np.int32) - 1
+
+    # (image id, part id, x, y, valid)
+    locs = _read_table(source, 'parts/part_locs.txt', 5)
+    image_ids = locs[:, 0].astype(np.int64) - 1
+    part_ids = locs[:, 1].astype(np.int64) - 1
+    keypoints = np.zeros((n, part_ids.max() + 1, 3), dtype=np.float32)
+    keypoints[image_ids, part_ids] = locs[:, 2:]
+
+    return {'fns': fns, 'bboxes': bboxes, 'labels': labels,
+            'keypoints': keypoints}
+
+
 class CUBDatasetBase(chainer.dataset.DatasetMixin):
 
     """Base class for CUB dataset.
 
     """
 
-    def __init__(self, data_dir='auto', crop_bbox=True):
+    def __init__(self, data_dir='auto', crop_bbox=True, resize_shape=None,
+                 image_cache=None):
         if data_dir == 'auto':
             data_dir = get_cub()
         self.data_dir = data_dir
-
-        images_file = os.path.join(data_dir, 'images.txt')
-        bboxes_file = os.path.join(data_dir, 'bounding_boxes.txt')
-
-        self.fns = [fn.strip().split()[1] for fn in open(images_file)]
-        bboxes = [bbox.split()[1:] for bbox in open(bboxes_file)]
-        self.bboxes = [[int(float(elem)) for elem in bbox] for bbox in bboxes]
+        self.source = utils.as_file_source(data_dir)
+
+        # The annotations are parsed into arrays once and cached in binary
+        # form. The cache is keyed by the annotation files, so it is
+        # created again when one of them changes.
+        source_files = [
+            'images.txt', 'bounding_boxes.txt', 'image_class_labels.txt',
+            'parts/part_locs.txt']
+        key = {'data_dir': self.source.key,
+               'sources': file_manifest_digest(source_files, self.source)}
+        self._metadata = cache_load_arrays(
+            os.path.join(download.get_dataset_directory(root),
+                         'metadata_cache'),
+            key, _load_metadata, args=(self.source,))
+        self.fns = self._metadata['fns']
+        # (x, y, width, height)
+        self.bboxes = self._metadata['bboxes']
 
         self.crop_bbox = crop_bbox
+        self.resize_shape = resize_shape
+        self.image_cache = image_cache
 
     def __len__(self):
         return len(self.fns)
+
+    def _image_shapes(self, original_indices):
+        if self.resize_shape is not None:
+            return np.tile(np.array(self.resize_shape, dtype=np.int32),
+                           (len(original_indices), 1))
+        shapes = read_image_shapes(
+            ['images/{}'.format(fn) for fn in self.fns], self.source,
+            os.path.join(download.get_dataset_directory(root),
+                         'image_shape_cache'))[original_indices]
+        if not self.crop_bbox:
+            return shapes
+        # The region cut out by _read_image, which is clipped by the
+        # boundary of the image.
+        x, y, w, h = self.bboxes[original_indices].T
+        x_min, y_min = np.maximum(x, 0), np.maximum(y, 0)
+        x_max = np.maximum(np.minimum(x + w, shapes[:, 1]), x_min)
+        y_max = np.maximum(np.minimum(y + h, shapes[:, 0]), y_min)
+        return np.stack((y_max - y_min, x_max - x_min), axis=1).astype(
+            np.int32)
+
+    def _read_image(self, original_idx, copy=True):
+        """Read an image cropped and resized according to the options.
+
+        Returns:
+            tuple of the image and the shape of the image before it was
+            resized.
+
+        """
+        with self.source.open(
+                'images/{}'.format(self.fns[original_idx])) as img_file:
+            if self.resize_shape is not None:
+                H, W = utils.read_image_shape(img_file)
+                img_file.seek(0)
+            if self.crop_bbox:
+                bbox = self.bboxes[original_idx]  # (x, y, width, height)
+                # The bounding box is cut out before the image is
+                # converted to an array.
+                img = utils.read_image_as_array(
+                    img_file, copy=copy, output_shape=self.resize_shape,
+                    cache=self.image_cache,
+                    crop=(bbox[0], bbox[1],
+                          bbox[0] + bbox[2], bbox[1] + bbox[3]),
+                    color=True)  # RGB
+                if self.resize_shape is None:
+                    in_shape = img.shape[:2]
+                else:
+                    in_shape = (min(bbox[1] + bbox[3], H) - bbox[1],
+                                min(bbox[0] + bbox[2], W) - bbox[0])
+            else:
+                img = utils.read_image_as_array(
+                    img_file, copy=copy, output_shape=self.resize_shape,
+                    cache=self.image_cache, color=True)  # RGB
+                if self.resize_shape is None:
+                    in_shape = img.shape[:2]
+                else:
+                    in_shape = (H, W)
+        return img, in_shape
@@ -1,4 +1,5 @@
 import copy
+import functools
 import numpy as np
 import os
 
@@ -6,6 +7,9 @@ import chainer
 from chainer.dataset import download
 
 from chainercv import utils
+from chainercv.utils.download import extraction_in_progress
+from chainercv.utils.dataset_utils import batch_raw_data
+from chainercv.utils.dataset_utils import read_image_shapes
 
 
 root = 'pfnet/chainercv/online_products'
@@ -15,7 +19,7 @@ url = 'ftp://cs.stanford.edu/cs/cvgl/Stanford_Online_Products.zip'
 def _get_online_products():
     data_root = download.get_dataset_directory(root)
     base_path = os.path.join(data_root, 'Stanford_Online_Products')
-    if os.path.exists(base_path):
+    if os.path.exists(base_path) and not extraction_in_progress(data_root):
         # skip downloading
         return base_path
 
@@ -46,24 +50,41 @@ class OnlineProductsDataset(chainer.dataset.DatasetMixin):
         data_dir (string): Path to the root of the training data. If this is
             :obj:`auto`, this class will automatically download data for you
             under :obj:`$CHAINER_DATASET_ROOT/pfnet/chainercv/online_products`.
+            This can also be a file source such as
+            :class:`chainercv.utils.ArchiveFileSource`, which reads the
+            files from the downloaded archive without extracting it.
         mode ({'train', 'test'}): Mode of the dataset.
+        resize_shape (tuple): If this is not :obj:`None`, images are
+            resized to this shape, which is a tuple of height and width,
+            while they are decoded. JPEG images are decoded at a reduced
+            scale, which is much cheaper than decoding at full resolution
+            and resizing afterwards.
+        image_cache (~chainercv.utils.DecodedImageCache): If this is not
+            :obj:`None`, decoded images are looked up in and added to this
+            cache, which can be shared by processes.
 
     """
 
-    def __init__(self, data_dir='auto', mode='train'):
+    def __init__(self, data_dir='auto', mode='train', resize_shape=None,
+                 image_cache=None):
         if data_dir == 'auto':
             data_dir = _get_online_products()
         self.data_dir = data_dir
+        self.source = utils.as_file_source(data_dir)
+        self.resize_shape = resize_shape
+        self.image_cache = image_cache
 
         self.class_ids = []
         self.super_class_ids = []
         self.paths = []
         # for mode in ['train', 'test']:
-        id_list_file = os.path.join(data_dir, 'Ebay_{}.txt'.format(mode))
-        ids_tmp = [id_.strip().split() for id_ in open(id_list_file)][1:]
+        id_list_file = 'Ebay_{}.txt'.format(mode)
+        ids_tmp = [id_.strip().split() for id_ in
+                   self.source.read(id_list_file).decode().splitlines()][1:]
         self.class_ids += [int(id_[1]) for id_ in ids_tmp]
         self.super_class_ids += [int(id_[2]) for id_ in ids_tmp]
-        self.paths += [os.path.join(data_dir, id_[3]) for id_ in ids_tmp]
+        # paths relative to the root of the data
+        self.paths += [id_[3] for id_ in ids_tmp]
 
         self.class_ids_dict = self._list_to_dict(self.class_ids)
         self.super_class_ids_dict = self._list_to_dict(self.super_class_ids)
@@ -79,6 +100,22 @@ class OnlineProductsDataset(chainer.dataset.DatasetMixin):
     def __len__(self):
         return len(self.paths)
 
+    def get_image_shapes(self):
+        """Returns the heights and the widths of the images.
+
+        See
+        :func:`chainercv.utils.dataset_utils.read_image_shapes`. If
+        :obj:`resize_shape` is given, it is the shape of every image.
+
+        """
+        if self.resize_shape is not None:
+            return np.tile(np.array(self.resize_shape, dtype=np.int32),
+                           (len(self), 1))
+        return read_image_shapes(
+            self.paths, self.source,
+            os.path.join(download.get_dataset_directory(root),
+                         'image_shape_cache'))
+
     def get_example(self, i):
         """Returns the i-th example.
 
@@ -95,15 +132,34 @@ class OnlineProductsDataset(chainer.dataset.DatasetMixin):
         class_id = np.array(self.class_ids[i], np.int32)
         super_class_id = np.array(self.super_class_ids[i], np.int32)
 
-        img = utils.read_image_as_array(self.paths[i])
-
-        if img.ndim == 2:
-            img = utils.gray2rgb(img)
-        img = img[:, :, ::-1]  # RGB to BGR
-        img = img.transpose(2, 0, 1).astype(np.float32)
+        img = self._read_image(i, copy=False)
+        img = utils.hwc_to_chw(img)  # RGB to BGR
         return img, class_id, super_class_id
 
-    def get_raw_data(self, i, rgb=True):
+    def get_examples(self, indices, out=None):
+        """Returns the examples at the given indices as a batch.
+
+        The images are written directly into one array, so that the batch
+        is assembled in one pass. This requires all images to have the
+        same shape.
+
+        Args:
+            indices (list of ints): The indices of the examples.
+            out (~numpy.ndarray): An array of shape :math:`(N, 3, H, W)`
+                to which BGR images are written. If this is :obj:`None`,
+                a new array of :obj:`dtype==numpy.float32` is allocated.
+
+        Returns:
+            tuple of an array of images, an array of class ids and an
+            array of super class ids.
+
+        """
+        imgs, class_ids, super_class_ids = batch_raw_data(
+            functools.partial(self.get_raw_data, copy=False), indices, out)
+        return (imgs, np.array(class_ids, dtype=np.int32),
+                np.array(super_class_ids, dtype=np.int32))
+
+    def get_raw_data(self, i, rgb=True, copy=True):
         """Returns the i-th example's image and class data in HWC format.
 
         The color image that is returned is RGB.
@@ -111,12 +167,15 @@ class OnlineProductsDataset(chainer.dataset.DatasetMixin):
         Args:
             i (int): The index of the example.
             rgb (bool): If false, the returned image will be in BGR.
+            copy (bool): If false, the returned image may be a read-only
+                array. This saves a copy when the image is converted
+                afterwards.
 
         Returns:
             i-th example (image, class_id, super_class_id)
 
         """
-        img = utils.read_image_as_array(self.paths[i])
+        img = self._read_image(i, copy=copy)
         if img.ndim == 2:
             img = utils.gray2rgb(img)
         if not rgb:
@@ -125,6 +184,12 @@ class OnlineProductsDataset(chainer.dataset.DatasetMixin):
         super_class_id = self.super_class_ids[i]
         return img, class_id, super_class_id
 
+    def _read_image(self, i, copy):
+        with self.source.open(self.paths[i]) as img_file:
+            return utils.read_image_as_array(
+                img_file, copy=copy, output_shape=self.resize_shape,
+                cache=self.image_cache)
+
     def get_ids(self, class_id):
         """Get indices of examples in the given class.
 
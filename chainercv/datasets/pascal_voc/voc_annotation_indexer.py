@@ -0,0 +1,240 @@
+import filelock
+import multiprocessing
+import numpy as np
+import os
+import xml.etree.ElementTree as ET
+
+from chainercv.datasets.pascal_voc import voc_utils
+from chainercv.utils import as_file_source
+
+
+_columns = ('bboxes', 'label_ids', 'difficult', 'truncated')
+# Fewer files than this are parsed in the calling process, because
+# starting workers costs more than parsing a few small XML files.
+_min_parallel_files = 1000
+_default_n_processes = 4
+
+# The file source of the worker processes, which is given once by
+# _init_worker instead of being pickled into every task.
+_worker_source = None
+
+
+def _parse_annotation(source, anno_file):
+    with source.open(anno_file) as f:
+        tree = ET.parse(f)
+    bboxes = []
+    label_ids = []
+    difficult = []
+    truncated = []
+    for obj in tree.findall('object'):
+        bbox_ = obj.find('bndbox')  # bndbox is the key used by raw VOC
+        bbox = [int(bbox_.find('xmin').text),
+                int(bbox_.find('ymin').text),
+                int(bbox_.find('xmax').text),
+                int(bbox_.find('ymax').text)]
+        # make pixel indexes 0-based
+        bboxes.append([float(b - 1) for b in bbox])
+        name = obj.find('name').text.lower().strip()
+        label_ids.append(voc_utils.pascal_voc_labels.index(name))
+        difficult.append(int(obj.find('difficult').text) == 1)
+        truncated.append(int(obj.find('truncated').text) == 1)
+    return bboxes, label_ids, difficult, truncated
+
+
+def _init_worker(source):
+    global _worker_source
+    _worker_source = source
+
+
+def _parse_worker(anno_file):
+    return _parse_annotation(_worker_source, anno_file)
+
+
+def _to_columns(parsed):
+    lens = np.array([len(p[0]) for p in parsed], dtype=np.int64)
+    columns = {
+        'bboxes': np.array(
+            [bbox for p in parsed for bbox in p[0]],
+            dtype=np.float32).reshape(-1, 4),
+        'label_ids': np.array(
+            [label_id for p in parsed for label_id in p[1]],
+            dtype=np.int32),
+        'difficult': np.array(
+            [d for p in parsed for d in p[2]], dtype=np.bool_),
+        'truncated': np.array(
+            [t for p in parsed for t in p[3]], dtype=np.bool_),
+        'offsets': np.zeros(len(parsed) + 1, dtype=np.int64),
+    }
+    np.cumsum(lens, out=columns['offsets'][1:])
+    return columns
+
+
+def _gather(columns, indices):
+    """Select the objects of the images at :obj:`indices`."""
+    starts = columns['offsets'][indices]
+    lens = columns['offsets'][indices + 1] - starts
+    offsets = np.zeros(len(indices) + 1, dtype=np.int64)
+    np.cumsum(lens, out=offsets[1:])
+    src = np.repeat(starts - offsets[:-1], lens) + np.arange(offsets[-1])
+    out = dict((key, columns[key][src]) for key in _columns)
+    out['offsets'] = offsets
+    return out
+
+
+def _concat(a, b):
+    out = dict(
+        (key, np.concatenate((a[key], b[key]))) for key in _columns)
+    out['offsets'] = np.concatenate(
+        (a['offsets'], a['offsets'][-1] + b['offsets'][1:]))
+    for key in ('ids', 'mtimes', 'sizes'):
+        out[key] = np.concatenate((a[key], b[key]))
+    return out
+
+
+def _empty_manifest():
+    manifest = _to_columns([])
+    manifest['ids'] = np.array([], dtype=np.str_)
+    manifest['mtimes'] = np.zeros(0, dtype=np.float64)
+    manifest['sizes'] = np.zeros(0, dtype=np.int64)
+    return manifest
+
+
+def _load_manifest(manifest_file):
+    if manifest_file is None or not os.path.exists(manifest_file):
+        return _empty_manifest()
+    try:
+        with np.load(manifest_file) as f:
+            return dict((key, f[key]) for key in f.files)
+    except (IOError, ValueError, KeyError):
+        # A broken manifest only costs a full rebuild.
+        return _empty_manifest()
+
+
+def _merge_manifest(manifest, updates):
+    keep = np.logical_not(np.in1d(manifest['ids'], updates['ids']))
+    kept = _gather(manifest, np.where(keep)[0])
+    for key in ('ids', 'mtimes', 'sizes'):
+        kept[key] = manifest[key][keep]
+    return _concat(kept, updates)
+
+
+def _save_manifest(manifest_file, updates):
+    with filelock.FileLock(manifest_file + '.lock'):
+        # Merge with entries written by other processes in the meantime.
+        manifest = _merge_manifest(_load_manifest(manifest_file), updates)
+        tmp_file = '{}.{}.tmp'.format(manifest_file, os.getpid())
+        with open(tmp_file, 'wb') as f:
+            np.savez(f, **manifest)
+        os.rename(tmp_file, manifest_file)
+
+
+def stat_voc_annotations(data_dir, ids):
+    """Read the modification times and the sizes of VOC annotation files.
+
+    Args:
+        data_dir (string): Path to the root of the VOC data, or a file
+            source that serves the files of the root.
+        ids (list of strings): Ids of the images.
+
+    Returns:
+        tuple of two arrays:
+        The modification times and the sizes of
+        :obj:`Annotations/{id}.xml` of the ids.
+
+    """
+    source = as_file_source(data_dir)
+    mtimes = np.zeros(len(ids), dtype=np.float64)
+    sizes = np.zeros(len(ids), dtype=np.int64)
+    for i, id_ in enumerate(ids):
+        mtimes[i], sizes[i] = source.stat('Annotations/{}.xml'.format(id_))
+    return mtimes, sizes
+
+
+def index_voc_annotations(data_dir, ids, manifest_file=None,
+                          n_processes=None, stats=None):
+    """Parse VOC annotation files of the given ids into flat arrays.
+
+    Only :obj:`Annotations/{id}.xml` of the ids in :obj:`ids` are parsed.
+    When many files are parsed, they are parsed in parallel with a
+    process pool. A few files are parsed in the calling process.
+
+    The objects of all images are stored in flat arrays. The objects of
+    the :math:`i`-th image are the entries between :obj:`offsets[i]` and
+    :obj:`offsets[i + 1]` of each array.
+
+    When :obj:`manifest_file` is given, the parsed objects are stored in it
+    together with the modification time and the size of each annotation
+    file. Later calls reuse the stored objects of unchanged files and
+    re-parse only the files that are new or changed.
+
+    Args:
+        data_dir (string): Path to the root of the VOC data, or a file
+            source that serves the files of the root.
+        ids (list of strings): Ids of the images whose annotations are
+            parsed.
+        manifest_file (string): Path to the manifest. If this is
+            :obj:`None`, every file is parsed and nothing is written.
+        n_processes (int): The number of processes used for parsing. If
+            this is :obj:`None`, up to four processes are used.
+        stats (tuple of arrays): The modification times and the sizes of
+            the annotation files returned by :func:`stat_voc_annotations`.
+            If this is :obj:`None`, they are read from the files.
+
+    Returns:
+        dict of numpy.ndarray:
+        A dictionary with the following keys. :math:`R` is the number of
+        objects in all images, including difficult ones.
+
+        * :obj:`bboxes`: :math:`(R, 4)` coordinates of bounding boxes.
+        * :obj:`label_ids`: :math:`(R,)` label ids of the objects.
+        * :obj:`difficult`: :math:`(R,)` flags of difficult objects.
+        * :obj:`truncated`: :math:`(R,)` flags of truncated objects.
+        * :obj:`offsets`: :math:`(N + 1,)` offsets of the objects of \
+            each image, where :math:`N` is the length of :obj:`ids`.
+
+    """
+    source = as_file_source(data_dir)
+    manifest = _load_manifest(manifest_file)
+    index = dict((id_, i) for i, id_ in enumerate(manifest['ids']))
+
+    if stats is None:
+        stats = stat_voc_annotations(source, ids)
+    mtimes, sizes = stats
+    found = np.array([index.get(id_, -1) for id_ in ids], dtype=np.int64)
+    stale = found < 0
+    known = np.where(np.logical_not(stale))[0]
+    stale[known] = np.logical_or(
+        manifest['mtimes'][found[known]] != mtimes[known],
+        manifest['sizes'][found[known]] != sizes[known])
+
+    if np.any(stale):
+        stale_ids = [id_ for id_, s in zip(ids, stale) if s]
+        anno_files = ['Annotations/{}.xml'.format(id_)
+                      for id_ in stale_ids]
+        if n_processes is None:
+            n_processes = min(
+                _default_n_processes, multiprocessing.cpu_count())
+        if n_processes > 1 and len(anno_files) >= _min_parallel_files:
+            pool = multiprocessing.Pool(
+                n_processes, initializer=_init_worker, initargs=(source,))
+            try:
+                parsed = pool.map(
+                    _parse_worker, anno_files,
+                    chunksize=max(1, len(anno_files) // (4 * n_processes)))
+            finally:
+                pool.close()
+                pool.join()
+        else:
+            parsed = [_parse_annotation(source, fn) for fn in anno_files]
+
+        updates = _to_columns(parsed)
+        updates['ids'] = np.array(stale_ids)
+        updates['mtimes'] = mtimes[stale]
+        updates['sizes'] = sizes[stale]
+        manifest = _merge_manifest(manifest, updates)
+        if manifest_file is not None:
+            _save_manifest(manifest_file, updates)
+        index = dict((id_, i) for i, id_ in enumerate(manifest['ids']))
+        found = np.array([index[id_] for id_ in ids], dtype=np.int64)
+
+    return _gather(manifest, found)
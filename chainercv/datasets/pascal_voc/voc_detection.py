@@ -1,15 +1,26 @@
-import glob
+import functools
+import hashlib
 import numpy as np
 import os
 import warnings
-import xml.etree.ElementTree as ET
 
 import chainer
 from chainer.dataset import download
 
+from chainercv.datasets.pascal_voc.voc_annotation_indexer import \
+    index_voc_annotations
+from chainercv.datasets.pascal_voc.voc_annotation_indexer import \
+    stat_voc_annotations
 from chainercv.datasets.pascal_voc import voc_utils
-from chainercv.utils.dataset_utils import cache_load
+from chainercv.transforms import resize_bbox
+from chainercv.utils.dataset_utils import batch_raw_data
+from chainercv.utils.dataset_utils import cache_load_arrays
+from chainercv.utils.dataset_utils import file_manifest_digest
+from chainercv.utils.dataset_utils import read_image_shapes
+from chainercv.utils import as_file_source
+from chainercv.utils import hwc_to_chw
 from chainercv.utils import read_image_as_array
+from chainercv.utils import read_image_shape
 
 
 class VOCDetectionDataset(chainer.dataset.DatasetMixin):
@@ -28,10 +39,20 @@ class VOCDetectionDataset(chainer.dataset.DatasetMixin):
     vertices. The last attribute is the label id, which points to the
     category of the object in the bounding box.
 
+    The annotations of all images are stored in flat arrays.
+    :obj:`bboxes` is an array of shape :math:`(R, 5)` that concatenates
+    the bounding boxes of all images, and :obj:`difficult` and
+    :obj:`truncated` are boolean arrays of shape :math:`(R,)`. The
+    annotations of the :math:`i`-th image are the entries between
+    :obj:`bbox_offsets[i]` and :obj:`bbox_offsets[i + 1]`.
+
     Args:
         data_dir (string): Path to the root of the training data. If this is
             :obj:`auto`, this class will automatically download data for you
             under :obj:`$CHAINER_DATASET_ROOT/pfnet/chainercv/pascal_voc`.
+            This can also be a file source such as
+            :class:`chainercv.utils.ArchiveFileSource`, which reads the
+            files from the downloaded archive without extracting it.
         mode ({'train', 'val', 'trainval'}): select from dataset splits used
             in VOC.
         year ({'2007', '2012'}): use a dataset prepared for a challenge
@@ -40,8 +61,21 @@ class VOCDetectionDataset(chainer.dataset.DatasetMixin):
             difficult in the original annotation.
         use_cache (bool): If true, use cache of object annotations. This
             is useful in the case when parsing annotation takes time.
+            The cache is keyed by the arguments of this class and the
+            modification time and the size of each annotation file, so
+            that a stale cache is never used and only changed files are
+            parsed again.
             When this is false, the dataset will not write cache.
         delete_cache (bool): Delete the cache described above.
+        resize_shape (tuple): If this is not :obj:`None`, images are
+            resized to this shape, which is a tuple of height and width,
+            while they are decoded. JPEG images are decoded at a reduced
+            scale, which is much cheaper than decoding at full resolution
+            and resizing afterwards. The bounding boxes are resized
+            accordingly.
+        image_cache (~chainercv.utils.DecodedImageCache): If this is not
+            :obj:`None`, decoded images are looked up in and added to this
+            cache, which can be shared by processes.
 
     """
 
@@ -49,7 +83,8 @@ class VOCDetectionDataset(chainer.dataset.DatasetMixin):
 
     def __init__(self, data_dir='auto', mode='train', year='2012',
                  use_difficult=False,
-                 use_cache=False, delete_cache=False):
+                 use_cache=False, delete_cache=False, resize_shape=None,
+                 image_cache=None):
         if data_dir == 'auto' and year in voc_utils.urls:
             data_dir = voc_utils.get_pascal_voc(year)
 
@@ -57,64 +92,97 @@ class VOCDetectionDataset(chainer.dataset.DatasetMixin):
             warnings.warn(
                 'please pick mode from \'train\', \'trainval\', \'val\'')
 
-        id_list_file = os.path.join(
-            data_dir, 'ImageSets/Main/{0}.txt'.format(mode))
-
-        self.ids = [id_.strip() for id_ in open(id_list_file)]
+        self.source = as_file_source(data_dir)
+        id_list_file = 'ImageSets/Main/{0}.txt'.format(mode)
+        self.ids = [id_.strip() for id_ in
+                    self.source.read(id_list_file).decode().splitlines()]
 
         self.data_dir = data_dir
         self.use_difficult = use_difficult
+        self.resize_shape = resize_shape
+        self.image_cache = image_cache
 
-        # cache objects
         data_root = download.get_dataset_directory(voc_utils.root)
-
-        pkl_file = os.path.join(
-            data_root, 'detection_objects_{}_{}.pkl'.format(year, mode))
-        self.objects = cache_load(
-            pkl_file, self._collect_objects, delete_cache,
-            use_cache, args=(self.data_dir, self.ids, self.use_difficult))
-        self.keys = self.objects.keys()
-
-    def _collect_objects(self, data_dir, ids, use_difficult):
-        objects = {}
-        anno_dir = os.path.join(data_dir, 'Annotations')
-        for fn in glob.glob('{}/*.xml'.format(anno_dir)):
-            tree = ET.parse(fn)
-            filename = tree.find('filename').text
-            img_id = os.path.splitext(filename)[0]
-            # skip annotation that is not included in ids
-            if img_id not in ids:
-                continue
-
-            datums = []
-            for obj in tree.findall('object'):
-                # when in not using difficult mode, and the object is
-                # difficult, skipt it.
-                if not use_difficult and int(obj.find('difficult').text) == 1:
-                    continue
-
-                bbox_ = obj.find('bndbox')  # bndbox is the key used by raw VOC
-                bbox = [int(bbox_.find('xmin').text),
-                        int(bbox_.find('ymin').text),
-                        int(bbox_.find('xmax').text),
-                        int(bbox_.find('ymax').text)]
-                # make pixel indexes 0-based
-                bbox = [float(b - 1) for b in bbox]
-
-                datum = {
-                    'filename': filename,
-                    'name': obj.find('name').text.lower().strip(),
-                    'pose': obj.find('pose').text.lower().strip(),
-                    'truncated': int(obj.find('truncated').text),
-                    'difficult': int(obj.find('difficult').text),
-                    'bbox': bbox,
-                }
-                datums.append(datum)
-            objects[img_id] = datums
-        return objects
+        data_dir_hash = hashlib.md5(
+            self.source.key.encode('utf-8')).hexdigest()
+        # The manifest of parsed annotation files is shared by all splits
+        # of the same data directory.
+        manifest_file = os.path.join(
+            data_root, 'detection_annotations_{}.npz'.format(data_dir_hash))
+        if delete_cache and os.path.exists(manifest_file):
+            os.remove(manifest_file)
+        if not use_cache:
+            manifest_file = None
+
+        # The annotation files are read once, and their modification times
+        # and sizes are used by both the key and the indexer.
+        stats = stat_voc_annotations(self.source, self.ids)
+        if use_cache:
+            anno_files = [
+                'Annotations/{}.xml'.format(id_) for id_ in self.ids]
+            sources = file_manifest_digest(
+                [id_list_file] + anno_files, self.source,
+                [self.source.stat(id_list_file)] + list(zip(*stats)))
+        else:
+            sources = None
+        key = {'data_dir': self.source.key, 'mode': mode,
+               'use_difficult': use_difficult, 'sources': sources}
+        columns = cache_load_arrays(
+            os.path.join(data_root, 'detection_cache'), key,
+            self._collect_objects, use_cache, delete_cache,
+            args=(self.source, self.ids, self.use_difficult,
+                  manifest_file, stats))
+        self.bboxes = columns['bboxes']
+        self.difficult = columns['difficult']
+        self.truncated = columns['truncated']
+        self.bbox_offsets = columns['bbox_offsets']
+        # The columns are shared by all examples, and get_raw_data returns
+        # copies of their slices.
+        self.bboxes.flags.writeable = False
+
+    def _collect_objects(self, data_dir, ids, use_difficult, manifest_file,
+                         stats):
+        columns = index_voc_annotations(
+            data_dir, ids, manifest_file, stats=stats)
+        bboxes = np.concatenate(
+            (columns['bboxes'],
+             columns['label_ids'][:, None].astype(np.float32)), axis=1)
+        difficult = columns['difficult']
+        truncated = columns['truncated']
+        offsets = columns['offsets']
+        if not use_difficult:
+            # when in not using difficult mode, and the object is
+            # difficult, skipt it.
+            keep = np.logical_not(difficult)
+            img_indices = np.repeat(np.arange(len(ids)), np.diff(offsets))
+            offsets = np.zeros_like(offsets)
+            np.cumsum(np.bincount(img_indices[keep], minlength=len(ids)),
+                      out=offsets[1:])
+            bboxes = bboxes[keep]
+            difficult = difficult[keep]
+            truncated = truncated[keep]
+        return {'bboxes': bboxes, 'difficult': difficult,
+                'truncated': truncated, 'bbox_offsets': offsets}
 
     def __len__(self):
-        return len(self.objects)
+        return len(self.ids)
+
+    def get_image_shapes(self):
+        """Returns the heights and the widths of the images.
+
+        See
+        :func:`chainercv.utils.dataset_utils.read_image_shapes`. If
+        :obj:`resize_shape` is given, it is the shape of every image.
+
+        """
+        if self.resize_shape is not None:
+            return np.tile(np.array(self.resize_shape, dtype=np.int32),
+                           (len(self), 1))
+        return read_image_shapes(
+            ['JPEGImages/{}.jpg'.format(id_) for id_ in self.ids],
+            self.source,
+            os.path.join(download.get_dataset_directory(voc_utils.root),
+                         'image_shape_cache'))
 
     def get_example(self, i):
         """Returns the i-th example.
@@ -131,41 +199,63 @@ class VOCDetectionDataset(chainer.dataset.DatasetMixin):
         """
         if i >= len(self):
             raise IndexError('index is too large')
-        img, bboxes = self.get_raw_data(i)
-
-        img = img[:, :, ::-1]  # RGB to BGR
-        img = img.transpose(2, 0, 1).astype(np.float32)
+        img, bboxes = self.get_raw_data(i, copy=False)
+        img = hwc_to_chw(img)  # RGB to BGR
         return img, bboxes
 
-    def get_raw_data(self, i, rgb=True):
+    def get_examples(self, indices, out=None):
+        """Returns the examples at the given indices as a batch.
+
+        The images are written directly into one array, so that the batch
+        is assembled in one pass. This requires all images to have the
+        same shape.
+
+        Args:
+            indices (list of ints): The indices of the examples.
+            out (~numpy.ndarray): An array of shape :math:`(N, 3, H, W)`
+                to which BGR images are written. If this is :obj:`None`,
+                a new array of :obj:`dtype==numpy.float32` is allocated.
+
+        Returns:
+            tuple of an array of images and a list of bounding boxes
+
+        """
+        return batch_raw_data(
+            functools.partial(self.get_raw_data, copy=False), indices, out)
+
+    def get_raw_data(self, i, rgb=True, copy=True):
         """Returns the i-th example.
 
         This returns a color image and bounding boxes.
-        The color image has shape (H, W, 3).
+        The color image has shape (H, W, 3). The bounding boxes are a
+        copy of the entries of :obj:`bboxes`, which can be modified.
 
         Args:
             i (int): The index of the example.
             rgb (bool): If false, the returned image will be in BGR.
+            copy (bool): If false, the returned image may be a read-only
+                array. This saves a copy when the image is converted
+                afterwards.
 
         Returns:
             i-th example (image, bbox)
 
         """
-        # Load a bbox and its category
-        objects = self.objects[self.keys[i]]
-        bboxes = []
-        for obj in objects:
-            bbox = obj['bbox']
-            name = obj['name']
-            label_id = self.labels.index(name)
-            bbox = np.asarray([bbox[0], bbox[1], bbox[2], bbox[3], label_id],
-                              dtype=np.float32)
-            bboxes.append(bbox)
-        bboxes = np.stack(bboxes)
+        bboxes = self.bboxes[self.bbox_offsets[i]:self.bbox_offsets[i + 1]]
 
         # Load a image
-        img_file = os.path.join(self.data_dir, 'JPEGImages', obj['filename'])
-        img = read_image_as_array(img_file)  # RGB
+        with self.source.open(
+                'JPEGImages/{}.jpg'.format(self.ids[i])) as img_file:
+            if self.resize_shape is not None:
+                # The resized bounding boxes are a new array.
+                bboxes = resize_bbox(
+                    bboxes, read_image_shape(img_file), self.resize_shape)
+                img_file.seek(0)
+            else:
+                bboxes = bboxes.copy()
+            img = read_image_as_array(
+                img_file, copy=copy, output_shape=self.resize_shape,
+                cache=self.image_cache)  # RGB
         if not rgb:
             img = img[:, :, ::-1]
         return img, bboxes
@@ -0,0 +1,181 @@
+import numpy as np
+import os
+
+import chainer
+
+from chainercv.datasets.pascal_voc import voc_utils
+from chainercv import utils
+from chainercv.utils.dataset_utils import batch_raw_data
+
+
+def pack_voc_detection(dataset, out_dir):
+    """Decode all images of a detection dataset into a packed file.
+
+    This writes every decoded image of :obj:`dataset` into one flat binary
+    file and the bounding boxes into a compact index. The result can be
+    loaded by :class:`VOCPackedDetectionDataset`, which memory-maps the
+    packed images instead of decoding JPEGs on every access.
+
+    The layout of :obj:`out_dir` is as follows.
+
+    * :obj:`images.dat`: Concatenated HWC RGB images of \
+        :obj:`dtype==numpy.uint8`.
+    * :obj:`index.npz`: Offsets and shapes of the images, the \
+        concatenated bounding boxes and their per-image offsets.
+
+    Args:
+        dataset (~chainercv.datasets.VOCDetectionDataset): A dataset whose
+            :meth:`get_raw_data` returns an image in HWC format and
+            bounding boxes.
+        out_dir (string): Path to the directory where the packed files are
+            written.
+
+    """
+    if not os.path.exists(out_dir):
+        os.makedirs(out_dir)
+    images_file = os.path.join(out_dir, 'images.dat')
+    index_file = os.path.join(out_dir, 'index.npz')
+
+    n = len(dataset)
+    img_offsets = np.zeros(n + 1, dtype=np.int64)
+    img_shapes = np.zeros((n, 3), dtype=np.int32)
+    bbox_offsets = np.zeros(n + 1, dtype=np.int64)
+    bboxes = []
+
+    # Write to temporary files first so that a half-written pack is never
+    # picked up by a reader.
+    with open(images_file + '.tmp', 'wb') as f:
+        for i in range(n):
+            img, bbox = dataset.get_raw_data(i)
+            if img.ndim == 2:
+                img = utils.gray2rgb(img)
+            img = np.ascontiguousarray(img, dtype=np.uint8)
+            f.write(img.tobytes())
+            img_shapes[i] = img.shape
+            img_offsets[i + 1] = img_offsets[i] + img.size
+            bbox = np.asarray(bbox, dtype=np.float32).reshape(-1, 5)
+            bboxes.append(bbox)
+            bbox_offsets[i + 1] = bbox_offsets[i] + len(bbox)
+
+    if len(bboxes) > 0:
+        bboxes = np.concatenate(bboxes)
+    else:
+        bboxes = np.zeros((0, 5), dtype=np.float32)
+    with open(index_file + '.tmp', 'wb') as f:
+        np.savez(f, img_offsets=img_offsets, img_shapes=img_shapes,
+                 bboxes=bboxes, bbox_offsets=bbox_offsets)
+    os.rename(images_file + '.tmp', images_file)
+    os.rename(index_file + '.tmp', index_file)
+
+
+class VOCPackedDetectionDataset(chainer.dataset.DatasetMixin):
+
+    """Dataset class for VOC detection data packed by \
+    :func:`pack_voc_detection`.
+
+    This returns the same examples as
+    :class:`chainercv.datasets.VOCDetectionDataset`. Instead of decoding
+    JPEG files, the images are read from a memory-mapped file. The arrays
+    returned by :meth:`get_raw_data` are read-only views of the mapped
+    memory, so processes forked from the one that created this dataset
+    share the page cache instead of decoding the same files.
+
+    Args:
+        packed_dir (string): Path to the directory written by
+            :func:`pack_voc_detection`.
+
+    """
+
+    labels = voc_utils.pascal_voc_labels
+
+    def __init__(self, packed_dir):
+        self.packed_dir = packed_dir
+        index = np.load(os.path.join(packed_dir, 'index.npz'))
+        self.img_offsets = index['img_offsets']
+        self.img_shapes = index['img_shapes']
+        self.bboxes = index['bboxes']
+        self.bbox_offsets = index['bbox_offsets']
+        self.bboxes.flags.writeable = False
+        self._images = None
+
+    def __getstate__(self):
+        # The memory map is opened again lazily in each process.
+        state = self.__dict__.copy()
+        state['_images'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        # Pickling does not keep the flag of the array.
+        self.bboxes.flags.writeable = False
+
+    @property
+    def images(self):
+        if self._images is None:
+            self._images = np.memmap(
+                os.path.join(self.packed_dir, 'images.dat'),
+                dtype=np.uint8, mode='r')
+        return self._images
+
+    def __len__(self):
+        return len(self.img_shapes)
+
+    def get_example(self, i):
+        """Returns the i-th example.
+
+        Returns a color image and bounding boxes. The image is in CHW format.
+        The returned image is BGR.
+
+        Args:
+            i (int): The index of the example.
+
+        Returns:
+            tuple of an image and bounding boxes
+
+        """
+        if i >= len(self):
+            raise IndexError('index is too large')
+        img, bboxes = self.get_raw_data(i)
+        img = utils.hwc_to_chw(img)  # RGB to BGR
+        return img, bboxes
+
+    def get_examples(self, indices, out=None):
+        """Returns the examples at the given indices as a batch.
+
+        The images are written directly into one array, so that the batch
+        is assembled in one pass. This requires all images to have the
+        same shape.
+
+        Args:
+            indices (list of ints): The indices of the examples.
+            out (~numpy.ndarray): An array of shape :math:`(N, 3, H, W)`
+                to which BGR images are written. If this is :obj:`None`,
+                a new array of :obj:`dtype==numpy.float32` is allocated.
+
+        Returns:
+            tuple of an array of images and a list of bounding boxes
+
+        """
+        return batch_raw_data(self.get_raw_data, indices, out)
+
+    def get_raw_data(self, i, rgb=True):
+        """Returns the i-th example.
+
+        This returns a color image and bounding boxes.
+        The color image has shape (H, W, 3). Both arrays are read-only views
+        of the packed data.
+
+        Args:
+            i (int): The index of the example.
+            rgb (bool): If false, the returned image will be in BGR.
+
+        Returns:
+            i-th example (image, bbox)
+
+        """
+        start, end = self.img_offsets[i], self.img_offsets[i + 1]
+        img = self.images[start:end].reshape(self.img_shapes[i])
+        if not rgb:
+            img = img[:, :, ::-1]
+        bboxes = self.bboxes[self.bbox_offsets[i]:self.bbox_offsets[i + 1]]
+        return img, bboxes
@@ -1,10 +1,16 @@
+import functools
 import numpy as np
-import os.path as osp
+import os
 from PIL import Image
 
 import chainer
+from chainer.dataset import download
 
 from chainercv.datasets.pascal_voc import voc_utils
+from chainercv.utils import as_file_source
+from chainercv.utils.dataset_utils import batch_raw_data
+from chainercv.utils.dataset_utils import read_image_shapes
+from chainercv.utils import hwc_to_chw
 from chainercv.utils import read_image_as_array
 
 
@@ -18,18 +24,31 @@ class VOCSemanticSegmentationDataset(chainer.dataset.DatasetMixin):
         data_dir (string): Path to the root of the training data. If this is
             :obj:`auto`, this class will automatically download data for you
             under :obj:`$CHAINER_DATASET_ROOT/pfnet/chainercv/pascal_voc`.
+            This can also be a file source such as
+            :class:`chainercv.utils.ArchiveFileSource`, which reads the
+            files from the downloaded archive without extracting it.
         mode ({'train', 'val', 'trainval'}): select from dataset splits used
             in VOC.
         year ({'2007', '2012'}): use a dataset prepared for a challenge
             held in :obj:`year`.
         use_difficult (bool): If true, use images that are labeled as
             difficult in the original annotation.
+        resize_shape (tuple): If this is not :obj:`None`, images are
+            resized to this shape, which is a tuple of height and width,
+            while they are decoded. JPEG images are decoded at a reduced
+            scale, which is much cheaper than decoding at full resolution
+            and resizing afterwards. The label images are resized with
+            nearest neighbor interpolation.
+        image_cache (~chainercv.utils.DecodedImageCache): If this is not
+            :obj:`None`, decoded images are looked up in and added to this
+            cache, which can be shared by processes.
 
     """
 
     labels = voc_utils.pascal_voc_labels
 
-    def __init__(self, data_dir='auto', mode='train'):
+    def __init__(self, data_dir='auto', mode='train', resize_shape=None,
+                 image_cache=None):
         if mode not in ['train', 'trainval', 'val']:
             raise ValueError(
                 'please pick mode from \'train\', \'trainval\', \'val\'')
@@ -37,15 +56,35 @@ class VOCSemanticSegmentationDataset(chainer.dataset.DatasetMixin):
         if data_dir == 'auto':
             data_dir = voc_utils.get_pascal_voc('2012')
 
-        id_list_file = osp.join(
-            data_dir, 'ImageSets/Segmentation/{0}.txt'.format(mode))
-        self.ids = [id_.strip() for id_ in open(id_list_file)]
+        self.source = as_file_source(data_dir)
+        id_list_file = 'ImageSets/Segmentation/{0}.txt'.format(mode)
+        self.ids = [id_.strip() for id_ in
+                    self.source.read(id_list_file).decode().splitlines()]
 
         self.data_dir = data_dir
+        self.resize_shape = resize_shape
+        self.image_cache = image_cache
 
     def __len__(self):
         return len(self.ids)
 
+    def get_image_shapes(self):
+        """Returns the heights and the widths of the images.
+
+        See
+        :func:`chainercv.utils.dataset_utils.read_image_shapes`. If
+        :obj:`resize_shape` is given, it is the shape of every image.
+
+        """
+        if self.resize_shape is not None:
+            return np.tile(np.array(self.resize_shape, dtype=np.int32),
+                           (len(self), 1))
+        return read_image_shapes(
+            ['JPEGImages/{}.jpg'.format(id_) for id_ in self.ids],
+            self.source,
+            os.path.join(download.get_dataset_directory(voc_utils.root),
+                         'image_shape_cache'))
+
     def get_example(self, i):
         """Returns the i-th example.
 
@@ -64,13 +103,35 @@ class VOCSemanticSegmentationDataset(chainer.dataset.DatasetMixin):
         """
         if i >= len(self):
             raise IndexError('index is too large')
-        img, label = self.get_raw_data(i)
-        img = img[:, :, ::-1]  # RGB to BGR
-        img = img.transpose(2, 0, 1).astype(np.float32)
+        img, label = self.get_raw_data(i, copy=False)
+        img = hwc_to_chw(img)  # RGB to BGR
         label = label[None]
         return img, label
 
-    def get_raw_data(self, i, rgb=True):
+    def get_examples(self, indices, out=None):
+        """Returns the examples at the given indices as a batch.
+
+        The images are written directly into one array, so that the batch
+        is assembled in one pass. This requires all images to have the
+        same shape.
+
+        Args:
+            indices (list of ints): The indices of the examples.
+            out (~numpy.ndarray): An array of shape :math:`(N, 3, H, W)`
+                to which BGR images are written. If this is :obj:`None`,
+                a new array of :obj:`dtype==numpy.float32` is allocated.
+
+        Returns:
+            tuple of an array of images and an array of label images
+            whose shapes are :math:`(N, 3, H, W)` and :math:`(N, 1, H, W)`
+            respectively.
+
+        """
+        imgs, labels = batch_raw_data(
+            functools.partial(self.get_raw_data, copy=False), indices, out)
+        return imgs, np.stack(labels)[:, None]
+
+    def get_raw_data(self, i, rgb=True, copy=True):
         """Returns the i-th example's images in HWC format.
 
         This returns a color image and its label. The image is in HWC foramt.
@@ -78,23 +139,32 @@ class VOCSemanticSegmentationDataset(chainer.dataset.DatasetMixin):
         Args:
             i (int): The index of the example.
             rgb (bool): If false, the returned image will be in BGR.
+            copy (bool): If false, the returned image may be a read-only
+                array. This saves a copy when the image is converted
+                afterwards.
 
         Returns:
             i-th example (image, label image)
 
         """
-        img_file = osp.join(self.data_dir, 'JPEGImages', self.ids[i] + '.jpg')
-        img = read_image_as_array(img_file)
+        with self.source.open(
+                'JPEGImages/{}.jpg'.format(self.ids[i])) as img_file:
+            img = read_image_as_array(
+                img_file, copy=copy, output_shape=self.resize_shape,
+                cache=self.image_cache)
         if not rgb:
             img = img[:, :, ::-1]
-        label = self._load_label(self.data_dir, self.ids[i])
+        label = self._load_label(self.ids[i])
         return img, label
 
-    def _load_label(self, data_dir, id_):
-        label_rgb_file = osp.join(
-            data_dir, 'SegmentationClass', id_ + '.png')
-        im = Image.open(label_rgb_file)
-        label = np.array(im, dtype=np.uint8).astype(np.int32)
+    def _load_label(self, id_):
+        with self.source.open(
+                'SegmentationClass/{}.png'.format(id_)) as label_file:
+            im = Image.open(label_file)
+            if self.resize_shape is not None:
+                H, W = self.resize_shape
+                im = im.resize((W, H), Image.NEAREST)
+            label = np.array(im, dtype=np.uint8).astype(np.int32)
         label[label == 255] = -1
         return label
 
@@ -3,6 +3,7 @@ import os
 from chainer.dataset import download
 
 from chainercv import utils
+from chainercv.utils.download import extraction_in_progress
 
 
 root = 'pfnet/chainercv/pascal_voc'
@@ -20,16 +21,22 @@ def get_pascal_voc(year):
 
     data_root = download.get_dataset_directory(root)
     base_path = os.path.join(data_root, 'VOCdevkit/VOC{}'.format(year))
-    if os.path.exists(base_path):
+    if os.path.exists(base_path) and not extraction_in_progress(data_root):
         # skip downloading
         return base_path
 
     download_file_path = utils.cached_download(urls[year])
     ext = os.path.splitext(urls[year])[1]
-    utils.extractall(download_file_path, data_root, ext)
+    utils.extractall(download_file_path, data_root, ext,
+                     member_filter=_voc_member_filter)
     return base_path
 
 
+def _voc_member_filter(name):
+    # The instance segmentation labels are not used by the datasets.
+    return '/SegmentationObject/' not in name
+
+
 pascal_voc_labels = (
     'background',
     'aeroplane',
@@ -0,0 +1,258 @@
+import functools
+import io
+import numpy as np
+import os
+from PIL import Image
+import six
+
+import chainer
+
+from chainercv import utils
+from chainercv.utils.dataset_utils import batch_raw_data
+
+
+_img_formats = ('raw', 'png', 'jpeg')
+
+
+def _encode_image(img, img_format, jpeg_quality):
+    if img_format == 'raw':
+        return np.ascontiguousarray(img, dtype=np.uint8).tobytes()
+    buf = io.BytesIO()
+    if img_format == 'jpeg':
+        Image.fromarray(img).save(buf, format='JPEG', quality=jpeg_quality)
+    else:
+        Image.fromarray(img).save(buf, format='PNG')
+    return buf.getvalue()
+
+
+def export_records(dataset, out_dir, examples_per_shard=1000,
+                   img_format='raw', jpeg_quality=95):
+    """Write a dataset into sharded record files.
+
+    The examples returned by :meth:`get_raw_data` of :obj:`dataset` are
+    written in order into shard files, so that they can be read
+    sequentially by :class:`RecordDataset` instead of opening a file per
+    example. The first element of each example is an image in HWC format
+    with :obj:`dtype==numpy.uint8`. The other elements are pickled.
+
+    The layout of :obj:`out_dir` is as follows.
+
+    * :obj:`shard-XXXXX.rec`: Records of :obj:`examples_per_shard` \
+        examples. Each record is the image followed by the pickled \
+        annotations.
+    * :obj:`index.npz`: The shard, the offset and the sizes of each \
+        record and the shapes of the images.
+
+    Args:
+        dataset: A dataset that has :meth:`get_raw_data`, such as the
+            datasets in :mod:`chainercv.datasets`.
+        out_dir (string): Path to the directory where the records are
+            written.
+        examples_per_shard (int): The number of examples in a shard.
+        img_format ({'raw', 'png', 'jpeg'}): How the images are stored.
+            :obj:`raw` stores decoded pixels, which are read without
+            decoding. :obj:`png` and :obj:`jpeg` store encoded images,
+            which are smaller. :obj:`jpeg` is lossy.
+        jpeg_quality (int): The quality of JPEG encoding.
+
+    """
+    if img_format not in _img_formats:
+        raise ValueError('img_format must be one of {}'.format(_img_formats))
+    if not os.path.exists(out_dir):
+        os.makedirs(out_dir)
+
+    n = len(dataset)
+    shards = np.zeros(n, dtype=np.int32)
+    offsets = np.zeros(n, dtype=np.int64)
+    img_sizes = np.zeros(n, dtype=np.int64)
+    anno_sizes = np.zeros(n, dtype=np.int64)
+    # The number of channels is 0 for a grayscale image of shape (H, W).
+    img_shapes = np.zeros((n, 3), dtype=np.int32)
+
+    n_shard = max(-(-n // examples_per_shard), 1)
+    for s in six.moves.range(n_shard):
+        shard_file = os.path.join(out_dir, 'shard-{:05d}.rec'.format(s))
+        offset = 0
+        # Write to a temporary file first so that a half-written shard is
+        # never picked up by a reader.
+        with open(shard_file + '.tmp', 'wb') as f:
+            for i in six.moves.range(
+                    s * examples_per_shard,
+                    min((s + 1) * examples_per_shard, n)):
+                in_data = dataset.get_raw_data(i)
+                img = in_data[0]
+                img_bytes = _encode_image(img, img_format, jpeg_quality)
+                anno_bytes = six.moves.cPickle.dumps(
+                    tuple(in_data[1:]), protocol=2)
+                f.write(img_bytes)
+                f.write(anno_bytes)
+                shards[i] = s
+                offsets[i] = offset
+                img_sizes[i] = len(img_bytes)
+                anno_sizes[i] = len(anno_bytes)
+                img_shapes[i, :img.ndim] = img.shape
+                offset += len(img_bytes) + len(anno_bytes)
+        os.rename(shard_file + '.tmp', shard_file)
+
+    index_file = os.path.join(out_dir, 'index.npz')
+    with open(index_file + '.tmp', 'wb') as f:
+        np.savez(f, shards=shards, offsets=offsets, img_sizes=img_sizes,
+                 anno_sizes=anno_sizes, img_shapes=img_shapes,
+                 img_format=np.array(img_format),
+                 n_shard=np.array(n_shard))
+    os.rename(index_file + '.tmp', index_file)
+
+
+class RecordDataset(chainer.dataset.DatasetMixin):
+
+    """Dataset class for records written by :func:`export_records`.
+
+    The records can be read in two ways. :meth:`get_example` and
+    :meth:`get_raw_data` read an example at random from memory-mapped
+    shards. :meth:`stream` reads whole shards sequentially, which avoids
+    seek-bound reads on slow storage.
+
+    :meth:`get_example` returns the image in CHW format in BGR and the
+    other elements as they were recorded.
+
+    Args:
+        record_dir (string): Path to the directory written by
+            :func:`export_records`.
+
+    """
+
+    def __init__(self, record_dir):
+        self.record_dir = record_dir
+        index = np.load(os.path.join(record_dir, 'index.npz'))
+        self.shards = index['shards']
+        self.offsets = index['offsets']
+        self.img_sizes = index['img_sizes']
+        self.anno_sizes = index['anno_sizes']
+        self.img_shapes = index['img_shapes']
+        self.img_format = str(index['img_format'])
+        self.n_shard = int(index['n_shard'])
+        self._shard_maps = {}
+
+    def __getstate__(self):
+        # The memory maps are opened again lazily in each process.
+        state = self.__dict__.copy()
+        state['_shard_maps'] = {}
+        return state
+
+    def _shard_file(self, s):
+        return os.path.join(self.record_dir, 'shard-{:05d}.rec'.format(s))
+
+    def _shard_map(self, s):
+        if s not in self._shard_maps:
+            self._shard_maps[s] = np.memmap(
+                self._shard_file(s), dtype=np.uint8, mode='r')
+        return self._shard_maps[s]
+
+    def __len__(self):
+        return len(self.shards)
+
+    def _decode(self, buf, i, copy):
+        start = self.offsets[i]
+        img_end = start + self.img_sizes[i]
+        shape = self.img_shapes[i]
+        if shape[2] == 0:
+            shape = shape[:2]
+        if self.img_format == 'raw':
+            img = np.frombuffer(buf[start:img_end], dtype=np.uint8)
+            img = img.reshape(shape)
+            if copy:
+                img = img.copy()
+        else:
+            f = Image.open(io.BytesIO(buf[start:img_end].tobytes()))
+            img = np.asarray(f, dtype=np.uint8)
+            if copy:
+                img = img.copy()
+        # bytes() of a buffer is its repr on Python 2, so the contents are
+        # copied by tobytes(), which both memory maps and memoryviews have.
+        anno = six.moves.cPickle.loads(
+            buf[img_end:img_end + self.anno_sizes[i]].tobytes())
+        return (img,) + anno
+
+    def get_example(self, i):
+        """Returns the i-th example.
+
+        Returns an image in CHW format and the recorded annotations. The
+        returned image is BGR.
+
+        Args:
+            i (int): The index of the example.
+
+        Returns:
+            tuple of an image and the annotations
+
+        """
+        if i >= len(self):
+            raise IndexError('index is too large')
+        in_data = self.get_raw_data(i, copy=False)
+        return (utils.hwc_to_chw(in_data[0]),) + in_data[1:]  # RGB to BGR
+
+    def get_examples(self, indices, out=None):
+        """Returns the examples at the given indices as a batch.
+
+        The images are written directly into one array, so that the batch
+        is assembled in one pass. This requires all images to have the
+        same shape.
+
+        Args:
+            indices (list of ints): The indices of the examples.
+            out (~numpy.ndarray): An array of shape :math:`(N, 3, H, W)`
+                to which BGR images are written. If this is :obj:`None`,
+                a new array of :obj:`dtype==numpy.float32` is allocated.
+
+        Returns:
+            tuple of an array of images and lists of the annotations
+
+        """
+        return batch_raw_data(
+            functools.partial(self.get_raw_data, copy=False), indices, out)
+
+    def get_raw_data(self, i, rgb=True, copy=True):
+        """Returns the i-th example as it was recorded.
+
+        Args:
+            i (int): The index of the example.
+            rgb (bool): If false, the returned image will be in BGR.
+            copy (bool): If false, the returned image may be a read-only
+                view of the records.
+
+        Returns:
+            i-th example (image, annotations...)
+
+        """
+        in_data = self._decode(self._shard_map(self.shards[i]), i, copy)
+        if not rgb:
+            in_data = (in_data[0][:, :, ::-1],) + in_data[1:]
+        return in_data
+
+    def stream(self, shuffle=False):
+        """Read the examples shard by shard.
+
+        Each shard is read by one sequential read. When :obj:`shuffle` is
+        true, the order of the shards and the order of the examples in
+        each shard are shuffled with :mod:`numpy.random`. This gives a
+        different order in each epoch while keeping the reads sequential.
+
+        Args:
+            shuffle (bool): If true, the examples are shuffled.
+
+        Returns:
+            A generator that yields tuples of the index and the raw data
+            of the examples.
+
+        """
+        shard_order = np.arange(self.n_shard)
+        if shuffle:
+            np.random.shuffle(shard_order)
+        for s in shard_order:
+            with open(self._shard_file(s), 'rb') as f:
+                buf = memoryview(f.read())
+            indices = np.where(self.shards == s)[0]
+            if shuffle:
+                np.random.shuffle(indices)
+            for i in indices:
+                yield (i,) + self._decode(buf, i, copy=True)
@@ -0,0 +1,2 @@
+from chainercv.iterators.bucket_iterator import BucketIterator  # NOQA
+from chainercv.iterators.prefetch_iterator import PrefetchIterator  # NOQA
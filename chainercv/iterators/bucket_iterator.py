@@ -0,0 +1,103 @@
+import numpy as np
+
+from chainercv.iterators.prefetch_iterator import PrefetchIterator
+
+
+class BucketIterator(PrefetchIterator):
+
+    """Dataset iterator that makes batches of images of similar sizes.
+
+    When the images of a dataset vary in size, such as those of PASCAL
+    VOC, padding every example to the largest image wastes computation
+    and memory on the padded pixels. This iterator groups the examples
+    whose images have similar heights and widths into the same batch, so
+    that a batch converted by
+    :func:`chainercv.utils.pad_concat_examples` is padded only to the
+    largest image in it.
+
+    At the beginning of each epoch, the examples are shuffled and divided
+    into pools of :obj:`pool_size` batches. The examples in each pool are
+    sorted by their heights and widths and cut into batches, and then the
+    order of the batches is shuffled. Therefore, every example is visited
+    once in an epoch, and the composition of the batches changes from
+    epoch to epoch. When :obj:`shuffle` is false, all examples are sorted
+    in one pool and they are visited in the same order in every epoch.
+
+    The examples are read by a pool of threads as
+    :class:`chainercv.iterators.PrefetchIterator` does.
+
+    Args:
+        dataset: Dataset to iterate.
+        batch_size (int): Number of examples within each batch.
+        shapes (~numpy.ndarray): An array of shape :math:`(N, 2)` that
+            contains the height and the width of the image of each
+            example. If this is :obj:`None`, this is obtained by
+            :meth:`get_image_shapes` of :obj:`dataset`. The datasets in
+            :mod:`chainercv.datasets` read the shapes from the headers of
+            the image files without decoding them, and they cache the
+            shapes.
+        pool_size (int): Number of batches in a pool. A larger pool makes
+            the sizes in a batch closer, while the batches of an epoch
+            become less random.
+        repeat (bool): If :obj:`True`, it infinitely loops over the dataset.
+            Otherwise, it stops iteration at the end of the first epoch.
+        shuffle (bool): If :obj:`True`, the order of examples is shuffled at
+            the beginning of each epoch.
+        n_threads (int): Number of threads that read examples.
+        n_prefetch (int): Number of batches that are read ahead.
+        fetch (callable): A callable that takes an index and returns an
+            example. If this is :obj:`None`, :obj:`dataset[i]` is used.
+
+    """
+
+    def __init__(self, dataset, batch_size, shapes=None, pool_size=100,
+                 repeat=True, shuffle=True, n_threads=4, n_prefetch=2,
+                 fetch=None):
+        if shapes is None:
+            shapes = dataset.get_image_shapes()
+        shapes = np.asarray(shapes)
+        if shapes.shape != (len(dataset), 2):
+            raise ValueError(
+                'shapes must have shape (N, 2), where N is the length of '
+                'the dataset')
+        self.shapes = shapes
+        self.pool_size = pool_size
+        super(BucketIterator, self).__init__(
+            dataset, batch_size, repeat=repeat, shuffle=shuffle,
+            n_threads=n_threads, n_prefetch=n_prefetch, fetch=fetch)
+
+    def _new_order(self, order=None, offset=0):
+        if not self._shuffle:
+            # All examples are sorted in one pool, so that every epoch
+            # visits them in the same order. When the dataset is repeated,
+            # the last batch of an epoch is completed by the first examples
+            # of the next one.
+            return np.lexsort((self.shapes[:, 1], self.shapes[:, 0]))
+
+        order = np.random.permutation(len(self.dataset))
+        pool_size = max(self.pool_size * self.batch_size, 1)
+
+        # When the dataset is repeated, the first examples complete the
+        # last batch of the previous epoch. They are put aside, so that
+        # the following batches start at the boundaries of the buckets.
+        head = order[:offset]
+        order = order[offset:]
+        batches = []
+        for start in range(0, len(order), pool_size):
+            pool = order[start:start + pool_size]
+            shapes = self.shapes[pool]
+            # Sorted by the height and then the width. The sort is stable,
+            # so images of the same size stay in a random order.
+            pool = pool[np.lexsort((shapes[:, 1], shapes[:, 0]))]
+            batches.extend(
+                pool[i:i + self.batch_size]
+                for i in range(0, len(pool), self.batch_size))
+
+        # An incomplete batch is kept at the end, so that the other
+        # batches are not split across epochs.
+        tail = []
+        if len(batches) > 0 and len(batches[-1]) < self.batch_size:
+            tail = [batches.pop()]
+        perm = np.random.permutation(len(batches))
+        batches = [batches[i] for i in perm] + tail
+        return np.concatenate([head] + batches)
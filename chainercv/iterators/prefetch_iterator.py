@@ -0,0 +1,221 @@
+from __future__ import division
+
+import collections
+from multiprocessing import pool
+import numpy as np
+
+from chainer.dataset import iterator
+
+
+class PrefetchIterator(iterator.Iterator):
+
+    """Dataset iterator that prefetches batches with a thread pool.
+
+    This iterator makes batches as :class:`chainer.iterators.SerialIterator`
+    does, but the examples are read by a pool of threads. While a batch is
+    used by the training step, the next :obj:`n_prefetch` batches are being
+    read. Decoding images with PIL releases the GIL, so the threads read
+    examples in parallel without the cost of sending them between
+    processes.
+
+    The order of the batches is deterministic for a given seed of
+    :mod:`numpy.random`. However, when the examples are shuffled, the
+    permutation of the next epoch is drawn as soon as the read-ahead
+    reaches the end of the current epoch, which is up to
+    :obj:`n_prefetch` batches earlier than
+    :class:`~chainer.iterators.SerialIterator` draws it. Therefore, the
+    two iterators visit the examples in the same order only if nothing
+    else draws from :mod:`numpy.random` in the meantime.
+    At most :obj:`n_prefetch` batches are in flight at a time.
+    :meth:`finalize` should be called to stop the threads when the
+    iterator is no longer used.
+
+    Args:
+        dataset: Dataset to iterate.
+        batch_size (int): Number of examples within each batch.
+        repeat (bool): If :obj:`True`, it infinitely loops over the dataset.
+            Otherwise, it stops iteration at the end of the first epoch.
+        shuffle (bool): If :obj:`True`, the order of examples is shuffled at
+            the beginning of each epoch. Otherwise, examples are extracted
+            in the order of indexes.
+        n_threads (int): Number of threads that read examples.
+        n_prefetch (int): Number of batches that are read ahead.
+        fetch (callable): A callable that takes an index and returns an
+            example. This can be used to read examples through a cheaper
+            path than :obj:`dataset[i]`, such as :meth:`get_raw_data` of
+            the datasets. If this is :obj:`None`, :obj:`dataset[i]` is
+            used.
+
+    """
+
+    def __init__(self, dataset, batch_size, repeat=True, shuffle=True,
+                 n_threads=4, n_prefetch=2, fetch=None):
+        if n_prefetch < 1:
+            raise ValueError('n_prefetch must be a positive integer')
+        self.dataset = dataset
+        self.batch_size = batch_size
+        self.n_threads = n_threads
+        self.n_prefetch = n_prefetch
+        self._repeat = repeat
+        self._shuffle = shuffle
+        if fetch is None:
+            fetch = dataset.__getitem__
+        self._fetch = fetch
+
+        self._pool = None
+        self._in_flight = collections.deque()
+        self.reset()
+
+    def __next__(self):
+        if self._pool is None:
+            self._pool = pool.ThreadPool(self.n_threads)
+        self._fill()
+        if len(self._in_flight) == 0:
+            raise StopIteration
+
+        result, state = self._in_flight.popleft()
+        # Request the next batch before waiting for this one, so that
+        # the threads keep reading while the batch is used.
+        self._fill()
+        batch = result.get()
+
+        self._previous_epoch_detail = self.epoch_detail
+        (self.epoch, self.current_position, self.is_new_epoch,
+         self._order) = state
+        return batch
+
+    next = __next__
+
+    @property
+    def epoch_detail(self):
+        return self.epoch + self.current_position / len(self.dataset)
+
+    @property
+    def previous_epoch_detail(self):
+        if self._previous_epoch_detail < 0:
+            return None
+        return self._previous_epoch_detail
+
+    def _fill(self):
+        while len(self._in_flight) < self.n_prefetch:
+            indices = self._next_indices()
+            if indices is None:
+                break
+            result = self._pool.map_async(self._fetch, indices)
+            state = (self._next_epoch, self._next_position,
+                     self._next_is_new_epoch, self._next_order)
+            self._in_flight.append((result, state))
+
+    def _next_indices(self):
+        """Advance the read-ahead state and return the next batch indices.
+
+        Subclasses can override :meth:`_new_order` to change the order of
+        the examples in each epoch. The state of the iterator after each
+        batch is taken from :obj:`_next_epoch`, :obj:`_next_position`,
+        :obj:`_next_is_new_epoch` and :obj:`_next_order`.
+
+        Returns:
+            list of ints, or :obj:`None` at the end of the iteration.
+
+        """
+        if not self._repeat and self._next_epoch > 0:
+            return None
+
+        order = self._next_order
+        i = self._next_position
+        i_end = i + self.batch_size
+        N = len(self.dataset)
+
+        if order is None:
+            indices = list(range(i, min(i_end, N)))
+        else:
+            indices = list(order[i:i_end])
+
+        if i_end >= N:
+            if self._repeat:
+                rest = i_end - N
+                if order is not None:
+                    order = self._new_order(order, rest)
+                    self._next_order = order
+                if order is None:
+                    indices.extend(range(rest))
+                else:
+                    indices.extend(order[:rest])
+                self._next_position = rest
+            else:
+                self._next_position = 0
+            self._next_epoch += 1
+            self._next_is_new_epoch = True
+        else:
+            self._next_is_new_epoch = False
+            self._next_position = i_end
+        return indices
+
+    def _new_order(self, order=None, offset=0):
+        """Return the order of the examples in a new epoch.
+
+        Args:
+            order (~numpy.ndarray): The order in the previous epoch. This
+                is :obj:`None` at the first epoch.
+            offset (int): The number of the first examples in the new
+                order that complete the last batch of the previous epoch.
+
+        Returns:
+            ~numpy.ndarray or :obj:`None`, which means the order of the
+            indexes.
+
+        """
+        if not self._shuffle:
+            return None
+        if order is None:
+            return np.random.permutation(len(self.dataset))
+        # The batches in flight keep the order of their epoch.
+        order = order.copy()
+        np.random.shuffle(order)
+        return order
+
+    def _restart(self):
+        # Batches in flight are discarded and read again from the current
+        # state.
+        self._in_flight.clear()
+        self._next_epoch = self.epoch
+        self._next_position = self.current_position
+        self._next_is_new_epoch = self.is_new_epoch
+        self._next_order = self._order
+
+    def serialize(self, serializer):
+        self.current_position = serializer('current_position',
+                                           self.current_position)
+        self.epoch = serializer('epoch', self.epoch)
+        self.is_new_epoch = serializer('is_new_epoch', self.is_new_epoch)
+        if self._order is not None:
+            self._order = np.array(self._order)
+            serializer('order', self._order)
+        self._previous_epoch_detail = serializer(
+            'previous_epoch_detail', self._previous_epoch_detail)
+        self._restart()
+
+    def reset(self):
+        self._order = self._new_order()
+
+        self.current_position = 0
+        self.epoch = 0
+        self.is_new_epoch = False
+
+        # use -1 instead of None internally.
+        self._previous_epoch_detail = -1.
+        self._restart()
+
+    def finalize(self):
+        """Stop the threads.
+
+        The iterator can be used again after this, in which case new
+        threads are started.
+
+        """
+        self._in_flight.clear()
+        if self._pool is not None:
+            self._pool.close()
+            self._pool.join()
+            self._pool = None
+        self._restart()
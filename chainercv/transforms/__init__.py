@@ -1,11 +1,32 @@
+from chainercv.transforms.bbox.affine_bbox_transform import affine_bbox  # NOQA
 from chainercv.transforms.bbox.flip_bbox_transform import flip_bbox  # NOQA
+from chainercv.transforms.bbox.ragged_bboxes import RaggedBboxes  # NOQA
 from chainercv.transforms.bbox.resize_bbox_transform import resize_bbox  # NOQA
 from chainercv.transforms.extend_dataset import extend  # NOQA
 from chainercv.transforms.extend_dataset import extend_cache  # NOQA
+from chainercv.transforms.image.affine_transform import affine  # NOQA
+from chainercv.transforms.image.affine_transform import affine_matrix  # NOQA
 from chainercv.transforms.image.chw_to_pil_image_transform import chw_to_pil_image  # NOQA
 from chainercv.transforms.image.chw_to_pil_image_transform import chw_to_pil_image_tuple  # NOQA
 from chainercv.transforms.image.pad_transform import pad  # NOQA
+from chainercv.transforms.image.random_affine_transform import random_affine  # NOQA
+from chainercv.transforms.image.random_crop_batch_transform import random_crop_batch  # NOQA
 from chainercv.transforms.image.random_crop_transform import random_crop  # NOQA
+from chainercv.transforms.image.random_flip_batch_transform import random_flip_batch  # NOQA
 from chainercv.transforms.image.random_flip_transform import random_flip  # NOQA
 from chainercv.transforms.image.resize_transform import resize  # NOQA
+from chainercv.transforms.keypoint.affine_keypoint_transform import affine_keypoint  # NOQA
+from chainercv.transforms.keypoint.crop_keypoint_transform import crop_keypoint  # NOQA
+from chainercv.transforms.keypoint.flip_keypoint_transform import flip_keypoint  # NOQA
 from chainercv.transforms.keypoint.resize_keypoint_transform import resize_keypoint  # NOQA
+from chainercv.transforms.keypoint.translate_keypoint_transform import translate_keypoint  # NOQA
+from chainercv.transforms.pipeline import Pipeline  # NOQA
+from chainercv.transforms.pipeline import PipelineStage  # NOQA
+from chainercv.transforms.pipeline import RandomCrop  # NOQA
+from chainercv.transforms.pipeline import RandomFlip  # NOQA
+from chainercv.transforms.pipeline import SubtractMean  # NOQA
+from chainercv.transforms.pipeline import Transform  # NOQA
+from chainercv.transforms.pipeline import ViewStage  # NOQA
+from chainercv.transforms.transform_cache import ArraySlotCache  # NOQA
+from chainercv.transforms.transform_cache import evict_caches  # NOQA
+from chainercv.transforms.transform_cache import transform_fingerprint  # NOQA
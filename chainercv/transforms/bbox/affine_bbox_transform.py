@@ -0,0 +1,50 @@
+import numpy as np
+
+
+def affine_bbox(bboxes, matrix, output_shape=None):
+    """Transform bounding boxes by an affine matrix.
+
+    The four corners of each bounding box are transformed, and the
+    bounding box is replaced by the smallest box that contains them. This
+    is exact for the matrices made by
+    :func:`chainercv.transforms.affine_matrix`, which scale, translate and
+    flip but do not rotate.
+
+    The bounding box is expected to be a two dimensional tensor of shape
+    :math:`(R, 5)`, where :math:`R` is the number of bounding boxes in
+    the image. The second axis represents attributes of the bounding box.
+    They are :obj:`(x_min, y_min, x_max, y_max, label_id)`, where first
+    four attributes are coordinates of the bottom left and the top right
+    vertices. The last attribute is the label id, which points to the
+    category of the object in the bounding box.
+
+    Args:
+        bboxes (~numpy.ndarray): shape is :math:`(R, 5)`. :math:`R` is
+            the number of bounding boxes.
+        matrix (~numpy.ndarray): An affine matrix of shape :math:`(2, 3)`
+            that is applied to the image. This can also be an array of
+            shape :math:`(R, 2, 3)` that has a matrix for each bounding box.
+        output_shape (tuple): The height and the width of the transformed
+            image. If this is not :obj:`None`, the bounding boxes are
+            clipped to the image. A bounding box outside the image has
+            zero area after clipping.
+
+    Returns:
+        ~numpy.ndarray:
+        Bounding boxes transformed by the matrix.
+
+    """
+    matrix = np.asarray(matrix, dtype=np.float64)
+    # The corners in (x, y) order, whose shape is (R, 4, 2).
+    corners = bboxes[:, [[0, 1], [2, 1], [0, 3], [2, 3]]]
+    corners = np.matmul(corners, np.swapaxes(matrix[..., :2], -1, -2)) + \
+        matrix[..., None, :, 2]
+
+    bboxes = bboxes.copy()
+    bboxes[:, :2] = corners.min(axis=1)
+    bboxes[:, 2:4] = corners.max(axis=1)
+    if output_shape is not None:
+        H, W = output_shape
+        bboxes[:, 0:4:2] = np.clip(bboxes[:, 0:4:2], 0, W - 1)
+        bboxes[:, 1:4:2] = np.clip(bboxes[:, 1:4:2], 0, H - 1)
+    return bboxes
@@ -0,0 +1,298 @@
+import numpy as np
+
+from chainercv.transforms.bbox.affine_bbox_transform import affine_bbox
+
+
+class RaggedBboxes(object):
+
+    """Bounding boxes of a batch of images stored in one array.
+
+    The bounding boxes of all images are concatenated into :obj:`data`,
+    which is an array of shape :math:`(R, 5)`, where :math:`R` is the
+    total number of bounding boxes in the batch. The second axis is
+    :obj:`(x_min, y_min, x_max, y_max, label_id)` as in
+    :func:`chainercv.transforms.flip_bbox`. The bounding boxes of the
+    :math:`i`-th image are :obj:`data[offsets[i]:offsets[i + 1]]`.
+
+    The transforms of this class apply to all bounding boxes of the batch
+    at once. Their parameters are given for each image as arrays of
+    length :math:`N`, the number of images, or as values shared by all
+    images. A parameter of an image is broadcasted to its bounding boxes
+    by :obj:`image_indices`, so that each transform is a few NumPy calls
+    regardless of the numbers of images and bounding boxes. A transform
+    returns new :class:`RaggedBboxes` and does not modify this one.
+
+    The parameters of :func:`chainercv.transforms.random_flip_batch` and
+    :func:`chainercv.transforms.random_crop_batch` can be passed to
+    :meth:`flip` and :meth:`crop` as they are.
+
+    Args:
+        data (~numpy.ndarray): An array of shape :math:`(R, 5)`.
+        offsets (~numpy.ndarray): An integer array of shape
+            :math:`(N + 1,)`. It starts with :obj:`0` and ends with
+            :math:`R`.
+
+    """
+
+    def __init__(self, data, offsets):
+        offsets = np.asarray(offsets, dtype=np.int64)
+        if offsets.ndim != 1 or len(offsets) == 0:
+            raise ValueError('offsets must be a non-empty 1-D array')
+        if offsets[0] != 0 or offsets[-1] != len(data):
+            raise ValueError(
+                'offsets must start with 0 and end with the number of '
+                'bounding boxes')
+        self.data = data
+        self.offsets = offsets
+        self._image_indices = None
+
+    @classmethod
+    def from_list(cls, bboxes):
+        """Concatenate the bounding boxes of images.
+
+        Args:
+            bboxes (list of arrays): The bounding boxes of each image.
+                Each array has shape :math:`(R_i, 5)`.
+
+        Returns:
+            ~chainercv.transforms.RaggedBboxes
+
+        """
+        bboxes = [np.asarray(bbox).reshape(-1, 5) for bbox in bboxes]
+        if len(bboxes) == 0:
+            return cls(np.zeros((0, 5), dtype=np.float32), [0])
+        offsets = np.zeros(len(bboxes) + 1, dtype=np.int64)
+        np.cumsum([len(bbox) for bbox in bboxes], out=offsets[1:])
+        return cls(np.concatenate(bboxes), offsets)
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+    def __getitem__(self, i):
+        return self.data[self.offsets[i]:self.offsets[i + 1]]
+
+    def to_list(self):
+        """Split the bounding boxes into arrays of the images.
+
+        Returns:
+            list of arrays, which are views of :obj:`data`.
+
+        """
+        return np.split(self.data, self.offsets[1:-1])
+
+    @property
+    def image_indices(self):
+        """The index of the image of each bounding box.
+
+        This is an integer array of shape :math:`(R,)`.
+
+        """
+        if self._image_indices is None:
+            self._image_indices = np.repeat(
+                np.arange(len(self)), np.diff(self.offsets))
+        return self._image_indices
+
+    def _per_box(self, values, shape=()):
+        values = np.broadcast_to(np.asarray(values), (len(self),) + shape)
+        return values[self.image_indices]
+
+    def _new(self, data):
+        bboxes = RaggedBboxes(data, self.offsets)
+        bboxes._image_indices = self._image_indices
+        return bboxes
+
+    def take(self, indices):
+        """Select images.
+
+        For example, the bounding boxes of a batch of
+        :class:`chainercv.datasets.VOCDetectionDataset` can be gathered by
+        :obj:`RaggedBboxes(dataset.bboxes, dataset.bbox_offsets).take(
+        indices)`.
+
+        Args:
+            indices (~numpy.ndarray): The indices of the images.
+
+        Returns:
+            ~chainercv.transforms.RaggedBboxes
+
+        """
+        indices = np.asarray(indices, dtype=np.int64)
+        lengths = np.diff(self.offsets)[indices]
+        offsets = np.zeros(len(indices) + 1, dtype=np.int64)
+        np.cumsum(lengths, out=offsets[1:])
+        box_indices = np.repeat(
+            self.offsets[indices] - offsets[:-1], lengths) + \
+            np.arange(offsets[-1])
+        return RaggedBboxes(self.data[box_indices], offsets)
+
+    def select(self, mask):
+        """Select bounding boxes.
+
+        Args:
+            mask (~numpy.ndarray): A boolean array of shape :math:`(R,)`.
+                The bounding boxes where this is true are kept.
+
+        Returns:
+            ~chainercv.transforms.RaggedBboxes
+
+        """
+        mask = np.asarray(mask, dtype=bool)
+        offsets = np.zeros_like(self.offsets)
+        np.cumsum(np.bincount(self.image_indices[mask], minlength=len(self)),
+                  out=offsets[1:])
+        return RaggedBboxes(self.data[mask], offsets)
+
+    def area(self):
+        """Compute the areas of the bounding boxes.
+
+        Returns:
+            ~numpy.ndarray: An array of shape :math:`(R,)`.
+
+        """
+        return (self.data[:, 2] - self.data[:, 0]) * \
+            (self.data[:, 3] - self.data[:, 1])
+
+    def filter_area(self, min_area=0):
+        """Remove small bounding boxes.
+
+        This removes the bounding boxes that a crop has moved out of the
+        image, whose areas are zero after :meth:`crop`. Since :meth:`crop`
+        keeps the number of bounding boxes, the ratio of the remaining
+        area of each bounding box can also be computed by :meth:`area`
+        before and after the crop and given to :meth:`select`.
+
+        Args:
+            min_area (float or ~numpy.ndarray): The bounding boxes whose
+                areas are larger than this are kept. This can be given for
+                each image.
+
+        Returns:
+            ~chainercv.transforms.RaggedBboxes
+
+        """
+        return self.select(self.area() > self._per_box(min_area))
+
+    def flip(self, img_shapes, h_flip=False, v_flip=False):
+        """Flip bounding boxes accordingly.
+
+        This is a batch version of :func:`chainercv.transforms.flip_bbox`.
+
+        Args:
+            img_shapes (~numpy.ndarray): The heights and the widths of the
+                images. This is an array of shape :math:`(N, 2)` or a
+                tuple of length 2 shared by all images.
+            h_flip (bool or ~numpy.ndarray): Flip bounding boxes according
+                to horizontal flips of the images. This is a boolean array
+                of shape :math:`(N,)` or a value shared by all images.
+            v_flip (bool or ~numpy.ndarray): Flip bounding boxes according
+                to vertical flips of the images.
+
+        Returns:
+            ~chainercv.transforms.RaggedBboxes
+
+        """
+        shapes = self._per_box(img_shapes, (2,))
+        data = self.data.copy()
+        for axis, flip in ((1, h_flip), (0, v_flip)):
+            # The columns of the minimum and the maximum along the axis.
+            columns = [1 - axis, 3 - axis]
+            flipped = shapes[:, axis, None] - 1 - self.data[:, columns[::-1]]
+            data[:, columns] = np.where(
+                self._per_box(flip)[:, None], flipped, self.data[:, columns])
+        return self._new(data)
+
+    def resize(self, input_shapes, output_shapes):
+        """Resize bounding boxes according to image resize.
+
+        This is a batch version of :func:`chainercv.transforms.resize_bbox`.
+
+        Args:
+            input_shapes (~numpy.ndarray): The heights and the widths of the
+                images before resized. This is an array of shape
+                :math:`(N, 2)` or a tuple of length 2.
+            output_shapes (~numpy.ndarray): The heights and the widths of
+                the images after resized.
+
+        Returns:
+            ~chainercv.transforms.RaggedBboxes
+
+        """
+        scales = np.asarray(output_shapes, dtype=np.float64) / \
+            np.asarray(input_shapes, dtype=np.float64)
+        scales = self._per_box(scales, (2,))
+        data = self.data.copy()
+        data[:, 1:4:2] = self.data[:, 1:4:2] * scales[:, 0, None]
+        data[:, 0:4:2] = self.data[:, 0:4:2] * scales[:, 1, None]
+        return self._new(data)
+
+    def translate(self, y_offset=0, x_offset=0):
+        """Translate bounding boxes.
+
+        Args:
+            y_offset (int or ~numpy.ndarray): The offset added to the y
+                coordinates. This can be given for each image.
+            x_offset (int or ~numpy.ndarray): The offset added to the x
+                coordinates.
+
+        Returns:
+            ~chainercv.transforms.RaggedBboxes
+
+        """
+        data = self.data.copy()
+        data[:, 1:4:2] += self._per_box(y_offset)[:, None]
+        data[:, 0:4:2] += self._per_box(x_offset)[:, None]
+        return self._new(data)
+
+    def affine(self, matrices, output_shapes=None):
+        """Transform bounding boxes by affine matrices.
+
+        This is a batch version of :func:`chainercv.transforms.affine_bbox`.
+
+        Args:
+            matrices (~numpy.ndarray): The affine matrices applied to the
+                images. This is an array of shape :math:`(N, 2, 3)` or a
+                matrix of shape :math:`(2, 3)` shared by all images.
+            output_shapes (~numpy.ndarray): The heights and the widths of
+                the transformed images. If this is not :obj:`None`, the
+                bounding boxes are clipped to the images.
+
+        Returns:
+            ~chainercv.transforms.RaggedBboxes
+
+        """
+        bboxes = self._new(affine_bbox(
+            self.data, self._per_box(matrices, (2, 3))))
+        if output_shapes is not None:
+            bboxes = bboxes.crop(0, 0, output_shapes)
+        return bboxes
+
+    def crop(self, y_offset, x_offset, output_shapes):
+        """Crop bounding boxes according to image crop.
+
+        The bounding boxes are translated so that the top left corners of
+        the regions become the origins, and they are clipped to the
+        regions. A bounding box outside the region becomes a box of zero
+        area on its boundary, which can be removed by :meth:`filter_area`.
+
+        Args:
+            y_offset (int or ~numpy.ndarray): The top coordinates of the
+                regions. This can be given for each image.
+            x_offset (int or ~numpy.ndarray): The left coordinates of the
+                regions.
+            output_shapes (~numpy.ndarray): The heights and the widths of
+                the regions. This is an array of shape :math:`(N, 2)` or a
+                tuple of length 2.
+
+        Returns:
+            ~chainercv.transforms.RaggedBboxes
+
+        """
+        bboxes = self.translate(
+            -np.asarray(y_offset), -np.asarray(x_offset))
+        shapes = self._per_box(output_shapes, (2,))
+        data = bboxes.data
+        for columns, size in ((slice(1, 4, 2), shapes[:, 0]),
+                              (slice(0, 4, 2), shapes[:, 1])):
+            data[:, columns] = np.clip(
+                data[:, columns], 0, size[:, None] - 1)
+        return bboxes
@@ -1,6 +1,14 @@
 import os
-import shelve
-import tempfile
+import warnings
+
+from chainer.dataset import download
+
+from chainercv.transforms.transform_cache import ArraySlotCache
+from chainercv.transforms.transform_cache import evict_caches
+from chainercv.transforms.transform_cache import transform_fingerprint
+
+
+root = 'pfnet/chainercv/transform_cache'
 
 
 def extend(dataset, transform, method_name='get_example'):
@@ -58,7 +66,8 @@ def extend(dataset, transform, method_name='get_example'):
     setattr(dataset, method_name, _extended)
 
 
-def extend_cache(dataset, transform, method_name='get_example'):
+def extend_cache(dataset, transform, method_name='get_example',
+                 cache_dir=None, max_bytes=10 * 1024 ** 3):
     """Extend a method to transform examples and cache the result.
 
     This method updates a method of a dataset to apply a transformation to
@@ -75,6 +84,26 @@ def extend_cache(dataset, transform, method_name='get_example'):
     function will be lost. Namely, the example extract for the first time for
     the given index will be retrieved from the second time.
 
+    The transformed examples are stored in a
+    :class:`chainercv.transforms.ArraySlotCache`. Arrays whose shapes are
+    the same for all examples are kept in memory-mapped arrays indexed by
+    the example, and the other values are pickled. The cache can be read
+    and filled by the worker processes of
+    :class:`chainer.iterators.MultiprocessIterator` at the same time.
+
+    By default, the cache persists across runs. It is stored under the
+    dataset root of Chainer in a directory named after
+    :func:`chainercv.transforms.transform_fingerprint` of the dataset and
+    the transform, so a repeated experiment with the same preprocessing
+    starts with a filled cache, while editing the code or the constants
+    of the transform selects a new cache. When the caches under the root
+    exceed :obj:`max_bytes`, the least recently used ones are removed.
+    Data that the fingerprint does not cover, such as the contents of the
+    files of the dataset, should be changed together with the path of
+    the dataset or :obj:`cache_dir`. When the fingerprint cannot be
+    computed, a warning is shown and the examples are transformed
+    without a cache.
+
     Args:
         dataset (~chainer.dataset.DatasetMixin): a dataset whose method
             will be decorated.
@@ -82,20 +111,41 @@ def extend_cache(dataset, transform, method_name='get_example'):
             and returns the transformed.
         method_name (string): name of the :obj:`dataset`'s method which
             will be decorated.
+        cache_dir (string): Path to the directory where the cache is
+            stored. If this is :obj:`None`, a directory under the dataset
+            root selected by the fingerprint is used.
+        max_bytes (int): The budget of the total size of the caches under
+            the dataset root in bytes. This is ignored when
+            :obj:`cache_dir` is given.
 
     .. seealso::
         :func:`chainercv.transform.extend`.
 
     """
-    filename = os.path.join(tempfile.mkdtemp(), 'chainercv.db')
-    cache = shelve.open(filename, protocol=2)
+    if cache_dir is None:
+        try:
+            name = transform_fingerprint(dataset, transform, method_name)
+        except ValueError as e:
+            warnings.warn(
+                'the examples are not cached because the transform cannot '
+                'be fingerprinted: {}. Please give cache_dir to cache '
+                'them.'.format(e))
+            extend(dataset, transform, method_name)
+            return
+        cache_root = download.get_dataset_directory(root)
+        cache = ArraySlotCache(os.path.join(cache_root, name), len(dataset))
+        # The modification time records the last use.
+        os.utime(cache.cache_dir, None)
+        evict_caches(cache_root, max_bytes, keep=(name,))
+    else:
+        cache = ArraySlotCache(cache_dir, len(dataset))
 
     method = getattr(dataset, method_name)
 
     def _extended(i):
-        key = str(i)
-        if key not in cache:
-            in_data = method(i)
-            cache[key] = transform(in_data)
-        return cache[key]
+        out_data = cache.get(i)
+        if out_data is None:
+            out_data = transform(method(i))
+            cache.put(i, out_data)
+        return out_data
     setattr(dataset, method_name, _extended)
@@ -0,0 +1,183 @@
+from __future__ import division
+
+import numpy as np
+import six
+
+try:
+    import cv2
+    _available = True
+
+except ImportError:
+    _available = False
+
+try:
+    from scipy import ndimage
+    _ndimage_available = True
+
+except ImportError:
+    _ndimage_available = False
+
+
+_cv2_interpolations = {
+    'nearest': 'INTER_NEAREST',
+    'linear': 'INTER_LINEAR',
+    'cubic': 'INTER_CUBIC',
+}
+_ndimage_orders = {'nearest': 0, 'linear': 1, 'cubic': 3}
+# The types that cv2.warpAffine accepts for all interpolations.
+_cv2_dtypes = (np.uint8, np.uint16, np.int16, np.float32, np.float64)
+
+
+def affine_matrix(output_shape, scale=1., y_offset=0, x_offset=0,
+                  h_flip=False, v_flip=False):
+    """Compose an affine matrix of scaling, cropping and flipping.
+
+    The matrix maps the coordinates of a pixel of an input image to those
+    of the output image. The input image is scaled first, and the region
+    of :obj:`output_shape` whose top left corner is at
+    :obj:`(y_offset, x_offset)` is cut out of the scaled image. Then, the
+    region is flipped. A negative offset translates the image towards
+    the bottom right, and the area outside the image is filled.
+
+    The matrix has shape :math:`(2, 3)`. A point :obj:`(x, y)` is mapped
+    to :obj:`matrix.dot((x, y, 1))`, which is the convention of
+    :func:`cv2.warpAffine`. It can be given to
+    :func:`chainercv.transforms.affine`,
+    :func:`chainercv.transforms.affine_bbox` and
+    :func:`chainercv.transforms.affine_keypoint`, so that the image and
+    its annotations are transformed consistently.
+
+    Args:
+        output_shape (tuple): The height and the width of the output.
+        scale (float or tuple): The scale of the image. If this is a
+            tuple, it is the scales in the vertical and the horizontal
+            directions. For example, :obj:`(H' / H, W' / W)` resizes an
+            image of shape :math:`(H, W)` to :math:`(H', W')`.
+        y_offset (float): The top coordinate of the region in the scaled
+            image.
+        x_offset (float): The left coordinate of the region in the scaled
+            image.
+        h_flip (bool): Flip the region horizontally.
+        v_flip (bool): Flip the region vertically.
+
+    Returns:
+        ~numpy.ndarray: An affine matrix of shape :math:`(2, 3)`.
+
+    """
+    if isinstance(scale, (tuple, list)):
+        y_scale, x_scale = scale
+    else:
+        y_scale, x_scale = scale, scale
+    H, W = output_shape
+    matrix = np.array([[x_scale, 0, -x_offset],
+                       [0, y_scale, -y_offset]], dtype=np.float64)
+    if h_flip:
+        matrix[0] = -matrix[0]
+        matrix[0, 2] += W - 1
+    if v_flip:
+        matrix[1] = -matrix[1]
+        matrix[1, 2] += H - 1
+    return matrix
+
+
+def _affine_cv2(x, matrix, H, W, interpolation, fill_value, out):
+    flag = getattr(cv2, _cv2_interpolations[interpolation])
+    kwargs = {'flags': flag, 'borderMode': cv2.BORDER_CONSTANT,
+              'borderValue': fill_value}
+    # Each channel is warped as a plane of the CHW array, as resize does.
+    for c in six.moves.range(x.shape[0]):
+        src = np.ascontiguousarray(x[c])
+        if out[c].flags.c_contiguous:
+            cv2.warpAffine(src, matrix, (W, H), dst=out[c], **kwargs)
+        else:
+            out[c] = cv2.warpAffine(src, matrix, (W, H), **kwargs)
+
+
+def _affine_ndimage(x, matrix, H, W, interpolation, fill_value, out):
+    # ndimage maps the coordinates of the output to those of the input in
+    # the order of (y, x).
+    A = matrix[::-1, 1::-1]
+    t = matrix[::-1, 2]
+    inv_A = np.linalg.inv(A)
+    # The image is padded with the fill value, so that the pixels near the
+    # border are interpolated with it as OpenCV does. The mode
+    # 'grid-constant', which does the same, requires SciPy 1.6 or later.
+    pad = 2
+    for c in six.moves.range(x.shape[0]):
+        src = np.pad(x[c], pad, mode='constant', constant_values=fill_value)
+        out[c] = ndimage.affine_transform(
+            src, inv_A, offset=pad - inv_A.dot(t), output_shape=(H, W),
+            order=_ndimage_orders[interpolation], mode='constant',
+            cval=fill_value)
+
+
+def affine(x, matrix, output_shape, interpolation='linear', fill_value=0,
+           out=None):
+    """Warp an image by an affine matrix.
+
+    The image is resampled once, so a composition of transforms such as
+    resizing, cropping and flipping, which is made by
+    :func:`chainercv.transforms.affine_matrix`, does not blur the image
+    more than once or allocate intermediate images.
+
+    The image is warped by :func:`cv2.warpAffine`. When OpenCV is not
+    installed, it is warped by :func:`scipy.ndimage.affine_transform`.
+    The results can differ slightly from those of OpenCV. An integer
+    array whose type is not supported is warped in
+    :obj:`numpy.float32` and rounded back to its type, so a label image
+    warped with :obj:`interpolation='nearest'` keeps its labels.
+
+    Args:
+        x (~numpy.ndarray): An image in CHW format.
+        matrix (~numpy.ndarray): An affine matrix of shape :math:`(2, 3)`
+            that maps the coordinates of the input to those of the output.
+        output_shape (tuple): The height and the width of the output.
+        interpolation (string): The interpolation method. This is one of
+            :obj:`'nearest'`, :obj:`'linear'` and :obj:`'cubic'`.
+        fill_value (scalar): The value of the pixels that are mapped from
+            outside the image.
+        out (~numpy.ndarray): An array of shape :math:`(C, H, W)` to which
+            the result is written. If this is :obj:`None`, a new array of
+            the same type as :obj:`x` is allocated.
+
+    Returns:
+        ~numpy.ndarray: The warped image.
+
+    """
+    if interpolation not in _cv2_interpolations:
+        raise ValueError(
+            'interpolation must be one of {}'.format(
+                sorted(_cv2_interpolations)))
+    if not _available and not _ndimage_available:
+        raise RuntimeError(
+            'affine requires OpenCV or SciPy. Please install one of them.\n\n'
+            '  $ pip install opencv-python\n')
+    H, W = output_shape
+    if out is None:
+        out = np.empty((x.shape[0], H, W), dtype=x.dtype)
+    elif out.shape != (x.shape[0], H, W):
+        raise ValueError(
+            'out has shape {}, but {} is expected'.format(
+                out.shape, (x.shape[0], H, W)))
+    matrix = np.asarray(matrix, dtype=np.float64)
+
+    if _available:
+        needs_cast = x.dtype not in _cv2_dtypes
+    else:
+        needs_cast = x.dtype.kind != 'f'
+    if needs_cast:
+        warped = affine(x.astype(np.float32), matrix, output_shape,
+                        interpolation, fill_value)
+        if x.dtype.kind in 'biu':
+            np.rint(warped, out=warped)
+        if x.dtype.kind in 'iu':
+            info = np.iinfo(x.dtype)
+            np.clip(warped, info.min, info.max, out=warped)
+        out[...] = warped
+        return out
+
+    if _available:
+        _affine_cv2(x, matrix, H, W, interpolation, fill_value, out)
+    else:
+        _affine_ndimage(x, matrix, H, W, interpolation, fill_value, out)
+    return out
@@ -13,11 +13,13 @@ def pad(x, max_size, bg_value):
     Returns:
         ~numpy.ndarray: a padded array
 
+    .. seealso::
+        :func:`chainercv.utils.pad_concat_examples` pads the examples of
+        a batch while they are concatenated.
+
     """
     x_slices, y_slices = _get_pad_slices(x, max_size=max_size)
-    out = bg_value * np.ones((x.shape[0],) + max_size, dtype=x.dtype)
-    print(y_slices)
-    print(x_slices)
+    out = np.full((x.shape[0],) + tuple(max_size), bg_value, dtype=x.dtype)
     out[:, y_slices, x_slices] = x
     return out
 
@@ -32,22 +34,14 @@ def _get_pad_slices(img, max_size):
     _, H, W = img.shape
 
     if H < max_size[0]:
-        diff_y = max_size[0] - H
-        margin_y = diff_y / 2
-        if diff_y % 2 == 0:
-            y_slices = slice(int(margin_y), int(max_size[0] - margin_y))
-        else:
-            y_slices = slice(int(margin_y), int(max_size[0] - margin_y - 1))
+        margin_y = (max_size[0] - H) // 2
+        y_slices = slice(margin_y, margin_y + H)
     else:
         y_slices = slice(0, int(max_size[0]))
 
     if W < max_size[1]:
-        diff_x = max_size[1] - W
-        margin_x = diff_x / 2
-        if diff_x % 2 == 0:
-            x_slices = slice(int(margin_x), int(max_size[1] - margin_x))
-        else:
-            x_slices = slice(int(margin_x), int(max_size[1] - margin_x - 1))
+        margin_x = (max_size[1] - W) // 2
+        x_slices = slice(margin_x, margin_x + W)
     else:
         x_slices = slice(0, int(max_size[1]))
     return x_slices, y_slices
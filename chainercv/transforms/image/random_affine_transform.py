@@ -0,0 +1,96 @@
+import numpy as np
+import random
+
+from chainercv.transforms.image.affine_transform import affine
+from chainercv.transforms.image.affine_transform import affine_matrix
+
+
+def random_affine(xs, output_shape, scale_range=(1., 1.),
+                  horizontal_flip=False, vertical_flip=False,
+                  interpolation='linear', fill_value=0, return_param=False):
+    """Randomly scale, crop and flip images in one resampling.
+
+    This is a combination of :func:`chainercv.transforms.resize`,
+    :func:`chainercv.transforms.random_crop` and
+    :func:`chainercv.transforms.random_flip`, whose parameters are
+    composed into one affine matrix by
+    :func:`chainercv.transforms.affine_matrix`. Each image is warped once
+    by :func:`chainercv.transforms.affine`.
+
+    The image is scaled by a factor drawn uniformly from
+    :obj:`scale_range`. A region of :obj:`output_shape` is drawn from the
+    scaled image. If the scaled image is smaller than the region, the
+    image is placed at a random position in the region instead, and the
+    rest is filled with :obj:`fill_value`.
+
+    The bounding boxes and the keypoints of the image can be transformed
+    by :func:`chainercv.transforms.affine_bbox` and
+    :func:`chainercv.transforms.affine_keypoint` with the returned matrix.
+
+    Args:
+        xs (tuple of arrays or an numpy.ndarray): Arrays in CHW format.
+            If this is a tuple, the arrays should have the same height and
+            width, and they are transformed by the same matrix.
+        output_shape (tuple): The height and the width of the output.
+        scale_range (tuple): The minimum and the maximum of the scale.
+        horizontal_flip (bool): Randomly flip in horizontal direction.
+        vertical_flip (bool): Randomly flip in vertical direction.
+        interpolation (string or tuple): The interpolation method of
+            :func:`chainercv.transforms.affine`. If this is a tuple, it
+            specifies the method for each array, such as
+            :obj:`('linear', 'nearest')` for an image and a label image.
+        fill_value (scalar or tuple): The value of the pixels outside the
+            image. If this is a tuple, it specifies the value for each
+            array.
+        return_param (bool): Returns the parameters of the transform.
+
+    Returns:
+        Transformed :obj:`xs` and the parameters.
+        If :obj:`return_param` is False, the parameters will not be
+        returned. The parameters are a dictionary with keys
+        :obj:`matrix`, :obj:`scale`, :obj:`y_offset`, :obj:`x_offset`,
+        :obj:`h` and :obj:`v`. :obj:`matrix` is the affine matrix, and
+        the others are the arguments given to
+        :func:`chainercv.transforms.affine_matrix`.
+
+    """
+    force_array = False
+    if not isinstance(xs, tuple):
+        xs = (xs,)
+        force_array = True
+    if not isinstance(interpolation, tuple):
+        interpolation = (interpolation,) * len(xs)
+    if not isinstance(fill_value, tuple):
+        fill_value = (fill_value,) * len(xs)
+
+    H, W = xs[0].shape[1:]
+    out_H, out_W = output_shape
+    scale = random.uniform(*scale_range)
+    offsets = []
+    for size, out_size in ((H, out_H), (W, out_W)):
+        margin = size * scale - out_size
+        offsets.append(random.randint(
+            int(np.ceil(min(margin, 0))), int(np.floor(max(margin, 0)))))
+    y_offset, x_offset = offsets
+    h_flip, v_flip = False, False
+    if horizontal_flip:
+        h_flip = random.choice([True, False])
+    if vertical_flip:
+        v_flip = random.choice([True, False])
+
+    matrix = affine_matrix(
+        output_shape, scale, y_offset, x_offset, h_flip, v_flip)
+    outs = [affine(x, matrix, output_shape, interp, value)
+            for x, interp, value in zip(xs, interpolation, fill_value)]
+
+    if force_array:
+        outs = outs[0]
+    else:
+        outs = tuple(outs)
+
+    if return_param:
+        return outs, {'matrix': matrix, 'scale': scale,
+                      'y_offset': y_offset, 'x_offset': x_offset,
+                      'h': h_flip, 'v': v_flip}
+    else:
+        return outs
@@ -0,0 +1,60 @@
+import numpy as np
+from numpy.lib.stride_tricks import as_strided
+
+
+def random_crop_batch(xs, output_shape, return_offsets=False):
+    """Crop each image of a batch randomly into :obj:`output_shape`.
+
+    This is a batch version of :func:`chainercv.transforms.random_crop`.
+    The regions are drawn for each example with :mod:`numpy.random`. All
+    examples are cut out by one gather from a strided view whose elements
+    are the windows of the images, so the cost does not grow with the
+    number of Python calls.
+
+    Args:
+        xs (tuple of arrays or an numpy.ndarray): Arrays in NCHW format.
+            If this is a tuple, the arrays should have the same batch size,
+            height and width, and the examples of all arrays are cropped
+            by the same regions.
+        output_shape (tuple): The height and the width after cropping.
+        return_offsets (bool): returns the offsets of the regions.
+
+    Returns:
+        Cropped :obj:`xs` and the offsets of the regions.
+        If :obj:`return_offsets` is False, the offsets will not be
+        returned. The offsets are a dictionary with key :obj:`y_offset`
+        and :obj:`x_offset` whose values are integer arrays of shape
+        :math:`(N,)`. They can be used to crop the annotations of the
+        examples.
+
+    """
+    force_array = False
+    if not isinstance(xs, tuple):
+        xs = (xs,)
+        force_array = True
+
+    N, _, H, W = xs[0].shape
+    out_H, out_W = output_shape
+    if out_H > H or out_W > W:
+        raise ValueError('shape of image is larger than output_shape')
+    y_offset = np.random.randint(0, H - out_H + 1, size=N)
+    x_offset = np.random.randint(0, W - out_W + 1, size=N)
+
+    outs = []
+    batch_indices = np.arange(N)
+    for x in xs:
+        s_n, s_c, s_h, s_w = x.strides
+        windows = as_strided(
+            x, (N, H - out_H + 1, W - out_W + 1, x.shape[1], out_H, out_W),
+            (s_n, s_h, s_w, s_c, s_h, s_w))
+        outs.append(windows[batch_indices, y_offset, x_offset])
+
+    if force_array:
+        outs = outs[0]
+    else:
+        outs = tuple(outs)
+
+    if return_offsets:
+        return outs, {'y_offset': y_offset, 'x_offset': x_offset}
+    else:
+        return outs
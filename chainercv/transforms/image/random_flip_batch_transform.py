@@ -0,0 +1,64 @@
+import numpy as np
+
+
+def random_flip_batch(xs, horizontal_flip=False, vertical_flip=False,
+                      return_flip=False):
+    """Randomly flip each image of a batch.
+
+    This is a batch version of :func:`chainercv.transforms.random_flip`.
+    The flips are drawn for each example with :mod:`numpy.random`. The
+    examples are grouped by their combination of flips, and each group is
+    gathered by one indexing operation, so the number of operations does
+    not depend on the size of the batch.
+
+    Args:
+        xs (tuple of arrays or an numpy.ndarray): Arrays in NCHW format
+            that are flipped. If this is a tuple, the examples of all
+            arrays are flipped in the same way.
+        horizontal_flip (bool): randomly flip in horizontal direction.
+        vertical_flip (bool): randomly flip in vertical direction.
+        return_flip (bool): returns information of flip.
+
+    Returns:
+        Transformed :obj:`xs` and information about flip.
+        If :obj:`return_flip` is False, information about flip will not be
+        returned. The information is a dictionary with key :obj:`h` and
+        :obj:`v` whose values are boolean arrays of shape :math:`(N,)`.
+        They can be used to flip the annotations of the examples.
+
+    """
+    force_array = False
+    if not isinstance(xs, tuple):
+        xs = (xs,)
+        force_array = True
+
+    n = len(xs[0])
+    h_flip = np.zeros(n, dtype=bool)
+    v_flip = np.zeros(n, dtype=bool)
+    if horizontal_flip:
+        h_flip = np.random.randint(0, 2, size=n).astype(bool)
+    if vertical_flip:
+        v_flip = np.random.randint(0, 2, size=n).astype(bool)
+
+    code = h_flip + 2 * v_flip
+    groups = [(np.nonzero(code == c)[0], c) for c in range(4)]
+    outs = []
+    for x in xs:
+        out = np.empty_like(x)
+        for indices, c in groups:
+            if len(indices) == 0:
+                continue
+            v_step = -1 if c & 2 else 1
+            h_step = -1 if c & 1 else 1
+            out[indices] = x[indices, :, ::v_step, ::h_step]
+        outs.append(out)
+
+    if force_array:
+        outs = outs[0]
+    else:
+        outs = tuple(outs)
+
+    if return_flip:
+        return outs, {'h': h_flip, 'v': v_flip}
+    else:
+        return outs
@@ -1,3 +1,8 @@
+from __future__ import division
+
+import numpy as np
+import six
+
 try:
     import cv2
     _available = True
@@ -6,29 +11,162 @@ except ImportError:
     _available = False
 
 
-def resize(x, output_shape):
+_cv2_interpolations = {
+    'nearest': 'INTER_NEAREST',
+    'linear': 'INTER_LINEAR',
+    'area': 'INTER_AREA',
+    'cubic': 'INTER_CUBIC',
+}
+# The types that cv2.resize accepts for all interpolations.
+_cv2_dtypes = (np.uint8, np.uint16, np.int16, np.float32, np.float64)
+
+
+def _nearest_indices(in_size, out_size):
+    # The same rule as INTER_NEAREST of OpenCV.
+    indices = np.floor(np.arange(out_size) * (in_size / out_size))
+    return np.minimum(indices.astype(np.intp), in_size - 1)
+
+
+def _cubic(t, a=-0.75):
+    t = np.abs(t)
+    return np.where(
+        t <= 1, ((a + 2) * t - (a + 3)) * t * t + 1,
+        np.where(t < 2, ((a * t - 5 * a) * t + 8 * a) * t - 4 * a, 0))
+
+
+def _weights(in_size, out_size, interpolation):
+    # Returns a matrix of shape (out_size, in_size) which resamples an axis.
+    scale = in_size / out_size
+    weights = np.zeros((out_size, in_size))
+    rows = np.arange(out_size)
+    if interpolation == 'area' and scale > 1:
+        # The average of the source pixels covered by each output pixel.
+        start = rows * scale
+        end = start + scale
+        pixels = np.arange(in_size)
+        overlap = np.minimum(end[:, None], pixels + 1) - \
+            np.maximum(start[:, None], pixels)
+        return np.maximum(overlap, 0) / scale
+
+    if interpolation == 'area':
+        # INTER_AREA of OpenCV enlarges an image by interpolating only
+        # near the boundaries of the source pixels.
+        base = np.floor(rows * scale).astype(np.intp)
+        frac = (rows + 1) - (base + 1) / scale
+        frac = np.where(frac <= 0, 0, frac - np.floor(frac))
+        np.add.at(weights, (rows, base), 1 - frac)
+        np.add.at(
+            weights, (rows, np.minimum(base + 1, in_size - 1)), frac)
+        return weights
+
+    src = (rows + 0.5) * scale - 0.5
+    if interpolation == 'cubic':
+        base = np.floor(src).astype(np.intp)
+        for k in range(-1, 3):
+            np.add.at(
+                weights, (rows, np.clip(base + k, 0, in_size - 1)),
+                _cubic(src - (base + k)))
+    else:
+        src = np.clip(src, 0, in_size - 1)
+        base = np.minimum(np.floor(src).astype(np.intp), in_size - 1)
+        frac = src - base
+        np.add.at(weights, (rows, base), 1 - frac)
+        np.add.at(
+            weights, (rows, np.minimum(base + 1, in_size - 1)), frac)
+    return weights
+
+
+def _resize_numpy(x, H, W, interpolation):
+    in_H, in_W = x.shape[1:]
+    y_weights = _weights(in_H, H, interpolation)
+    x_weights = _weights(in_W, W, interpolation)
+    return np.matmul(np.matmul(y_weights, x), x_weights.T)
+
+
+def _resize_cv2(x, H, W, interpolation, out):
+    flag = getattr(cv2, _cv2_interpolations[interpolation])
+    # OpenCV resizes all channels of an HWC image in one call. An image
+    # with more than four channels is resized in chunks of four channels,
+    # which every interpolation of OpenCV accepts.
+    for c in six.moves.range(0, x.shape[0], 4):
+        src = np.ascontiguousarray(x[c:c + 4].transpose(1, 2, 0))
+        dst = cv2.resize(src, dsize=(W, H), interpolation=flag)
+        out[c:c + 4] = dst.reshape(H, W, -1).transpose(2, 0, 1)
+
+
+def resize(x, output_shape, interpolation='linear', out=None):
     """Resize image to match the given shape.
 
-    A bilinear interpolation is used for resizing.
+    The interpolation follows the one of :func:`cv2.resize`.
+
+    An array of an integer type, such as a label image, is resized
+    with :obj:`interpolation='nearest'` by gathering the pixels, so
+    the type is kept and no label is mixed with another. With the other
+    interpolations, an integer array whose type OpenCV does not support
+    is resized in :obj:`numpy.float32` and rounded back to its type.
+
+    An image with any number of channels is accepted. An image with more
+    than four channels is resized in chunks of four channels. When OpenCV
+    is not installed, the image is resized by NumPy. The results can
+    differ slightly from those of OpenCV.
 
     Args:
         x (~numpy.ndarray): array to be transformed. This is in CHW format.
         output_shape (tuple): this is a tuple of length 2. Its elements are
             ordered as (height, width).
+        interpolation (string): The interpolation method. This is one of
+            :obj:`'nearest'`, :obj:`'linear'`, :obj:`'area'` and
+            :obj:`'cubic'`. :obj:`'area'` averages the pixels when the
+            image is shrunk, which avoids aliasing.
+        out (~numpy.ndarray): An array of shape :math:`(C, H, W)` to which
+            the result is written. It should have the same type as
+            :obj:`x` when an integer array is resized with
+            :obj:`interpolation='nearest'`. If this is :obj:`None`, a new
+            array of the same type as :obj:`x` is allocated.
 
     Returns:
         ~numpy.ndarray: a resize array
 
     """
-    if not _available:
-        raise ValueError('cv2 is not installed on your environment, '
-                         'so nothing will be plotted at this time. '
-                         'Please install OpenCV.\n\n Under Anaconda '
-                         ' environment, you can install it by '
-                         '$ conda install -c menpo opencv=2.4.11\n')
-
+    if interpolation not in _cv2_interpolations:
+        raise ValueError(
+            'interpolation must be one of {}'.format(
+                sorted(_cv2_interpolations)))
     H, W = output_shape
-    x = x.transpose(1, 2, 0)
-    x = cv2.resize(x, dsize=(W, H))
-    x = x.transpose(2, 0, 1)
-    return x
+    if out is None:
+        out = np.empty((x.shape[0], H, W), dtype=x.dtype)
+    elif out.shape != (x.shape[0], H, W):
+        raise ValueError(
+            'out has shape {}, but {} is expected'.format(
+                out.shape, (x.shape[0], H, W)))
+
+    if interpolation == 'nearest' and (
+            not _available or x.dtype.kind in 'biu'):
+        if out.dtype != x.dtype:
+            raise ValueError(
+                'out has type {}, but {} is expected'.format(
+                    out.dtype, x.dtype))
+        y_indices = _nearest_indices(x.shape[1], H)
+        x_indices = _nearest_indices(x.shape[2], W)
+        np.take(x.take(y_indices, axis=1), x_indices, axis=2, out=out)
+        return out
+
+    if _available:
+        needs_cast = x.dtype not in _cv2_dtypes
+    else:
+        needs_cast = x.dtype.kind != 'f'
+    if needs_cast:
+        resized = resize(x.astype(np.float32), output_shape, interpolation)
+        if x.dtype.kind in 'biu':
+            np.rint(resized, out=resized)
+        if x.dtype.kind in 'iu':
+            info = np.iinfo(x.dtype)
+            np.clip(resized, info.min, info.max, out=resized)
+        out[...] = resized
+        return out
+
+    if _available:
+        _resize_cv2(x, H, W, interpolation, out)
+    else:
+        out[...] = _resize_numpy(x, H, W, interpolation)
+    return out
@@ -0,0 +1,39 @@
+import numpy as np
+
+
+def affine_keypoint(keypoints, matrix, output_shape=None):
+    """Transform keypoints by an affine matrix.
+
+    The shape of keypoints is :math:`(K, 3)`. :math:`K` is the number of
+    keypoints in the image.
+    The last dimension is composed of :obj:`(x, y, valid)` in this order.
+    :obj:`x` and :obj:`y` are coordinates of the keypoint. :obj:`valid`
+    is whether the keypoint is visible in the image or not.
+
+    Args:
+        keypoints (~numpy.ndarray): Keypoints in the image.
+        matrix (~numpy.ndarray): An affine matrix of shape :math:`(2, 3)`
+            that is applied to the image, such as the one made by
+            :func:`chainercv.transforms.affine_matrix`.
+        output_shape (tuple): The height and the width of the transformed
+            image. If this is not :obj:`None`, the keypoints that are
+            moved out of the image become invalid.
+
+    Returns:
+        ~numpy.ndarray:
+        Keypoints transformed by the matrix.
+
+    """
+    matrix = np.asarray(matrix, dtype=np.float64)
+    xy = np.matmul(keypoints[..., :2], np.swapaxes(matrix[..., :2], -1, -2))
+    xy += matrix[..., None, :, 2]
+
+    keypoints = keypoints.copy()
+    keypoints[..., :2] = xy
+    if output_shape is not None:
+        H, W = output_shape
+        inside = np.logical_and(
+            np.all(xy >= 0, axis=-1),
+            np.logical_and(xy[..., 0] <= W - 1, xy[..., 1] <= H - 1))
+        keypoints[..., 2] *= inside
+    return keypoints
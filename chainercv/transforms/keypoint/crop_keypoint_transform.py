@@ -0,0 +1,50 @@
+import numpy as np
+
+from chainercv.transforms.keypoint.translate_keypoint_transform import \
+    translate_keypoint
+
+
+def crop_keypoint(keypoints, y_offset, x_offset, output_shape, copy=True):
+    """Crop keypoints according to image crop.
+
+    The keypoints are translated so that the top left corner of the
+    region becomes the origin. The keypoints outside the region become
+    invalid, and their :obj:`valid` values are set to :math:`0`.
+
+    The shape of keypoints is :math:`(K, 3)` for an image or
+    :math:`(N, K, 3)` for a batch of images. :math:`K` is the number of
+    keypoints in an image.
+    The last dimension is composed of :obj:`(x, y, valid)` in this order.
+    :obj:`x` and :obj:`y` are coordinates of the keypoint. :obj:`valid`
+    is whether the keypoint is visible in the image or not.
+
+    The offsets returned by :func:`chainercv.transforms.random_crop_batch`
+    can be given as they are, and all images of a batch are cropped at
+    once.
+
+    Args:
+        keypoints (~numpy.ndarray): Keypoints in the image or the images.
+        y_offset (int or ~numpy.ndarray): The top coordinate of the
+            region. For a batch, this can also be an array of shape
+            :math:`(N,)`.
+        x_offset (int or ~numpy.ndarray): The left coordinate of the
+            region.
+        output_shape (tuple or ~numpy.ndarray): The height and the width
+            of the region. For a batch, this can also be an array of shape
+            :math:`(N, 2)`.
+        copy (bool): If false, :obj:`keypoints` is modified in place.
+
+    Returns:
+        ~numpy.ndarray:
+        Keypoints cropped by the given region.
+
+    """
+    keypoints = translate_keypoint(
+        keypoints, -np.asarray(y_offset), -np.asarray(x_offset), copy)
+    output_shape = np.asarray(output_shape)
+    x, y = keypoints[..., 0], keypoints[..., 1]
+    inside = (x >= 0) & (y >= 0) & \
+        (x <= output_shape[..., 1, None] - 1) & \
+        (y <= output_shape[..., 0, None] - 1)
+    keypoints[..., 2] *= inside
+    return keypoints
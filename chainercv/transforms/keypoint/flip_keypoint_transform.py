@@ -0,0 +1,61 @@
+import numpy as np
+
+
+def flip_keypoint(keypoints, img_shape, h_flip=False, v_flip=False,
+                  flip_pairs=None, copy=True):
+    """Flip keypoints accordingly.
+
+    The shape of keypoints is :math:`(K, 3)` for an image or
+    :math:`(N, K, 3)` for a batch of images. :math:`K` is the number of
+    keypoints in an image.
+    The last dimension is composed of :obj:`(x, y, valid)` in this order.
+    :obj:`x` and :obj:`y` are coordinates of the keypoint. :obj:`valid`
+    is whether the keypoint is visible in the image or not.
+
+    The parameters can be given for each image of a batch as arrays, such
+    as those returned by :func:`chainercv.transforms.random_flip_batch`,
+    and all images are flipped at once.
+
+    When an image of a bird is flipped horizontally, its left wing looks
+    like a right wing. :obj:`flip_pairs` swaps such keypoints of the
+    horizontally flipped images, so that each keypoint keeps its meaning.
+    For :class:`chainercv.datasets.CUBKeypointsDataset`, this is
+    :obj:`CUBKeypointsDataset.flip_pairs`.
+
+    Args:
+        keypoints (~numpy.ndarray): Keypoints in the image or the images.
+        img_shape (tuple or ~numpy.ndarray): The height and the width of
+            the image. For a batch, this can also be an array of shape
+            :math:`(N, 2)`.
+        h_flip (bool or ~numpy.ndarray): Flip keypoints according to a
+            horizontal flip of the image. For a batch, this can also be a
+            boolean array of shape :math:`(N,)`.
+        v_flip (bool or ~numpy.ndarray): Flip keypoints according to a
+            vertical flip of the image.
+        flip_pairs (list of tuples): Pairs of the indices of the keypoints
+            that are swapped by a horizontal flip.
+        copy (bool): If false, :obj:`keypoints` is modified in place.
+
+    Returns:
+        ~numpy.ndarray:
+        Keypoints flipped according to the given flips.
+
+    """
+    if copy:
+        keypoints = keypoints.copy()
+    img_shape = np.asarray(img_shape)
+    h_flip = np.asarray(h_flip, dtype=bool)[..., None]
+    v_flip = np.asarray(v_flip, dtype=bool)[..., None]
+
+    if flip_pairs is not None and np.any(h_flip):
+        perm = np.arange(keypoints.shape[-2])
+        for i, j in flip_pairs:
+            perm[i], perm[j] = j, i
+        keypoints[...] = np.where(
+            h_flip[..., None], keypoints[..., perm, :], keypoints)
+
+    for axis, flip, size in ((0, h_flip, img_shape[..., 1, None]),
+                             (1, v_flip, img_shape[..., 0, None])):
+        keypoints[..., axis] = np.where(
+            flip, size - 1 - keypoints[..., axis], keypoints[..., axis])
+    return keypoints
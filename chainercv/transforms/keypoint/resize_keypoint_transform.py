@@ -1,13 +1,20 @@
-def resize_keypoint(keypoints, input_shape, output_shape):
+import numpy as np
+
+
+def resize_keypoint(keypoints, input_shape, output_shape, copy=True):
     """Change values of keypoints according to paramters for resizing an image.
 
     The shape of keypoints is :math:`(K, 3)`. :math:`K` is the number of
     keypoints in the image.
     The last dimension is composed of :obj:`(x, y, valid)` in this order.
     These are discriptions of a corresponding keypoint.
-    :obj;`x` and :obj:`y` are coordinates of the keypoint. :obj:`valid`
+    :obj:`x` and :obj:`y` are coordinates of the keypoint. :obj:`valid`
     is whether the keypoint is visible in the image or not.
 
+    The keypoints of a batch of images can also be given as an array of
+    shape :math:`(N, K, 3)`, and the shapes can be given for each image as
+    arrays of shape :math:`(N, 2)`.
+
     Args:
         keypoints (~numpy.ndarray): keypoints in the image. This can be
             either a float or integer array. Please see description
@@ -16,15 +23,17 @@ def resize_keypoint(keypoints, input_shape, output_shape):
             of the image before resized.
         output_shape (tuple): A tuple of length 2. The height and the width
             of the image after resized.
+        copy (bool): If false, :obj:`keypoints` is modified in place.
 
     Returns:
         ~numpy.ndarray:
         Keypoints rescaled according to the given image shapes.
 
     """
-    keypoints = keypoints.copy()
-    h_scale = float(output_shape[1]) / input_shape[1]
-    v_scale = float(output_shape[0]) / input_shape[0]
-    keypoints[:, 0] = h_scale * keypoints[:, 0]
-    keypoints[:, 1] = v_scale * keypoints[:, 1]
+    if copy:
+        keypoints = keypoints.copy()
+    scale = np.asarray(output_shape, dtype=np.float64) / \
+        np.asarray(input_shape, dtype=np.float64)
+    keypoints[..., 0] = scale[..., 1, None] * keypoints[..., 0]
+    keypoints[..., 1] = scale[..., 0, None] * keypoints[..., 1]
     return keypoints
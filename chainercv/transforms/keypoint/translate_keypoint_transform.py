@@ -0,0 +1,34 @@
+import numpy as np
+
+
+def translate_keypoint(keypoints, y_offset=0, x_offset=0, copy=True):
+    """Translate keypoints.
+
+    The shape of keypoints is :math:`(K, 3)` for an image or
+    :math:`(N, K, 3)` for a batch of images. :math:`K` is the number of
+    keypoints in an image.
+    The last dimension is composed of :obj:`(x, y, valid)` in this order.
+    :obj:`x` and :obj:`y` are coordinates of the keypoint. :obj:`valid`
+    is whether the keypoint is visible in the image or not.
+
+    Args:
+        keypoints (~numpy.ndarray): Keypoints in the image or the images.
+            This is either a float or integer array. The translated
+            coordinates are cast to the type of this array.
+        y_offset (int or ~numpy.ndarray): The offset added to the y
+            coordinates. For a batch, this can also be an array of shape
+            :math:`(N,)`.
+        x_offset (int or ~numpy.ndarray): The offset added to the x
+            coordinates.
+        copy (bool): If false, :obj:`keypoints` is modified in place.
+
+    Returns:
+        ~numpy.ndarray:
+        Keypoints translated by the given offsets.
+
+    """
+    if copy:
+        keypoints = keypoints.copy()
+    keypoints[..., 0] = keypoints[..., 0] + np.asarray(x_offset)[..., None]
+    keypoints[..., 1] = keypoints[..., 1] + np.asarray(y_offset)[..., None]
+    return keypoints
@@ -0,0 +1,349 @@
+import collections
+import numpy as np
+import random
+import six
+import timeit
+
+
+def _compose_slices(s1, s2, n):
+    # Returns a slice equivalent to applying s1 and then s2 to an axis of
+    # length n.
+    start1, stop1, step1 = s1.indices(n)
+    n1 = len(six.moves.range(start1, stop1, step1))
+    start2, stop2, step2 = s2.indices(n1)
+    n2 = len(six.moves.range(start2, stop2, step2))
+    start = start1 + start2 * step1
+    step = step1 * step2
+    stop = start + n2 * step
+    if stop < 0:
+        stop = None
+    return slice(start, stop, step), n2
+
+
+class PipelineStage(object):
+
+    """A stage of :class:`Pipeline`.
+
+    A stage is also callable by itself. In that case, it behaves as a
+    pipeline that consists of the stage only.
+
+    Args:
+        name (string): The name of the stage used in the statistics of the
+            pipeline. If this is :obj:`None`, the name of the class is
+            used.
+
+    """
+
+    def __init__(self, name=None):
+        if name is None:
+            name = type(self).__name__
+        self.name = name
+
+    def __call__(self, in_data):
+        return Pipeline([self])(in_data)
+
+
+class ViewStage(PipelineStage):
+
+    """A stage that selects a region of arrays by slicing.
+
+    The output of a view stage is a view of the input, and adjacent view
+    stages that apply to the same arrays are fused into one indexing
+    operation by :class:`Pipeline`.
+
+    Args:
+        indices (tuple of ints): The positions of the arrays in an example
+            to which the stage applies. The arrays are sliced by the same
+            region. If this is :obj:`None`, the stage applies to all
+            arrays in the example.
+        name (string): The name of the stage.
+
+    """
+
+    def __init__(self, indices=None, name=None):
+        super(ViewStage, self).__init__(name)
+        self.indices = indices
+
+    def slices(self, shape):
+        """Return slices that select a region of an array.
+
+        Args:
+            shape (tuple of ints): The shape of the array.
+
+        Returns:
+            tuple of slices whose length is the same as :obj:`shape`.
+
+        """
+        raise NotImplementedError
+
+
+class RandomFlip(ViewStage):
+
+    """Randomly flip arrays in CHW format.
+
+    This is a stage version of :func:`chainercv.transforms.random_flip`.
+
+    Args:
+        horizontal_flip (bool): Randomly flip in horizontal direction.
+        vertical_flip (bool): Randomly flip in vertical direction.
+        indices (tuple of ints): The positions of the arrays to which the
+            stage applies.
+        name (string): The name of the stage.
+
+    """
+
+    def __init__(self, horizontal_flip=False, vertical_flip=False,
+                 indices=None, name=None):
+        super(RandomFlip, self).__init__(indices, name)
+        self.horizontal_flip = horizontal_flip
+        self.vertical_flip = vertical_flip
+
+    def slices(self, shape):
+        h_flip, v_flip = False, False
+        if self.horizontal_flip:
+            h_flip = random.choice([True, False])
+        if self.vertical_flip:
+            v_flip = random.choice([True, False])
+        flip = slice(None, None, -1)
+        return (slice(None),
+                flip if v_flip else slice(None),
+                flip if h_flip else slice(None))
+
+
+class RandomCrop(ViewStage):
+
+    """Randomly crop arrays into :obj:`output_shape`.
+
+    This is a stage version of :func:`chainercv.transforms.random_crop`.
+
+    Args:
+        output_shape (tuple): Shape of the arrays after cropping. If
+            :obj:`None` is included in the tuple, that dimension will not
+            be cropped.
+        indices (tuple of ints): The positions of the arrays to which the
+            stage applies.
+        name (string): The name of the stage.
+
+    """
+
+    def __init__(self, output_shape, indices=None, name=None):
+        super(RandomCrop, self).__init__(indices, name)
+        self.output_shape = output_shape
+
+    def slices(self, shape):
+        if len(self.output_shape) != len(shape):
+            raise ValueError
+        slices = []
+        for size, dim in zip(shape, self.output_shape):
+            if dim is None:
+                slices.append(slice(None))
+                continue
+            if size == dim:
+                start = 0
+            elif size > dim:
+                start = random.choice(six.moves.range(size - dim))
+            else:
+                raise ValueError('shape of image is larger than output_shape')
+            slices.append(slice(start, start + dim))
+        return tuple(slices)
+
+
+class SubtractMean(PipelineStage):
+
+    """Subtract a mean from an array.
+
+    When the array belongs to the pipeline, is writeable and has a
+    floating point type, the mean is subtracted in place. Otherwise, the
+    result is written to a new array, which also makes a view selected by
+    the preceding stages contiguous.
+
+    Args:
+        mean (~numpy.ndarray): The mean, which is broadcastable to the
+            array.
+        index (int): The position of the array in an example.
+        name (string): The name of the stage.
+
+    """
+
+    def __init__(self, mean, index=0, name=None):
+        super(SubtractMean, self).__init__(name)
+        self.mean = np.asarray(mean)
+        self.index = index
+
+    def _apply(self, values, owned):
+        x = values[self.index]
+        if (owned[self.index] and x.flags.writeable and
+                x.dtype.kind == 'f' and
+                np.result_type(x, self.mean) == x.dtype):
+            np.subtract(x, self.mean, out=x)
+        else:
+            values[self.index] = x - self.mean
+            owned[self.index] = True
+
+
+class Transform(PipelineStage):
+
+    """A stage that applies a function to examples.
+
+    Args:
+        transform (function): A function that takes an example and returns
+            the transformed, like the one given to
+            :func:`chainercv.transforms.extend`.
+        name (string): The name of the stage. If this is :obj:`None`, the
+            name of :obj:`transform` is used.
+
+    """
+
+    def __init__(self, transform, name=None):
+        if name is None:
+            name = getattr(transform, '__name__', type(transform).__name__)
+        super(Transform, self).__init__(name)
+        self.transform = transform
+
+
+class _FusedViews(object):
+
+    def __init__(self, stages):
+        self.stages = stages
+        self.indices = stages[0].indices
+        self.name = '+'.join(stage.name for stage in stages)
+
+    def _apply(self, values, owned):
+        if self.indices is None:
+            indices = [k for k, value in enumerate(values)
+                       if isinstance(value, np.ndarray)]
+        else:
+            indices = self.indices
+        shape = values[indices[0]].shape
+        slices = [slice(None)] * len(shape)
+        for stage in self.stages:
+            new_shape = []
+            for axis, s in enumerate(stage.slices(shape)):
+                slices[axis], size = _compose_slices(
+                    slices[axis], s, values[indices[0]].shape[axis])
+                new_shape.append(size)
+            shape = tuple(new_shape)
+        slices = tuple(slices)
+        for k in indices:
+            values[k] = values[k][slices]
+
+
+class Pipeline(object):
+
+    """A sequence of transforms applied to examples.
+
+    A pipeline applies its stages to an example in order, and it can be
+    attached to a dataset with :meth:`attach` in one step instead of a
+    call of :func:`chainercv.transforms.extend` per transform.
+
+    Adjacent stages are fused when they can share buffers.
+
+    * Adjacent :class:`ViewStage` objects that apply to the same arrays, \
+        such as :class:`RandomFlip` and :class:`RandomCrop`, are composed \
+        into one slice per axis, so that the arrays are indexed once and \
+        no intermediate array is allocated.
+    * :class:`SubtractMean` writes to the array in place when the array \
+        belongs to the pipeline. This is the case when the array was \
+        allocated by a preceding :class:`SubtractMean`, or when \
+        :obj:`owns_input` is true.
+
+    The wall time spent on each stage is recorded and can be read with
+    :meth:`stats`. Fused stages are recorded together under their names
+    joined by :obj:`+`. When the pipeline runs in worker processes, the
+    statistics are recorded in the workers.
+
+    Args:
+        stages (list): The stages. A function in this list is wrapped by
+            :class:`Transform`.
+        owns_input (bool): If true, the arrays in the examples given to
+            the pipeline are assumed to be fresh copies, which the stages
+            may modify in place. Read-only arrays are never modified. The
+            datasets in :mod:`chainercv.datasets` return fresh images from
+            :meth:`get_example`, but their bounding boxes and keypoints
+            may be read-only views of arrays shared by all examples.
+
+    """
+
+    def __init__(self, stages, owns_input=False):
+        self.stages = [stage if isinstance(stage, PipelineStage)
+                       else Transform(stage) for stage in stages]
+        self.owns_input = owns_input
+
+        self._groups = []
+        for stage in self.stages:
+            if (isinstance(stage, ViewStage) and self._groups and
+                    isinstance(self._groups[-1], _FusedViews) and
+                    self._groups[-1].indices == stage.indices):
+                self._groups[-1] = _FusedViews(
+                    self._groups[-1].stages + [stage])
+            elif isinstance(stage, ViewStage):
+                self._groups.append(_FusedViews([stage]))
+            else:
+                self._groups.append(stage)
+
+        # Stages with the same name are numbered in the statistics.
+        names = [group.name for group in self._groups]
+        self._names = []
+        for k, name in enumerate(names):
+            if names.count(name) > 1:
+                name = '{}_{}'.format(name, names[:k].count(name))
+            self._names.append(name)
+        self.reset_stats()
+
+    def __call__(self, in_data):
+        is_tuple = isinstance(in_data, tuple)
+        values = list(in_data) if is_tuple else [in_data]
+        owned = [self.owns_input] * len(values)
+
+        timer = timeit.default_timer
+        for group, stat in zip(self._groups, self._stats):
+            start = timer()
+            if isinstance(group, Transform):
+                out_data = group.transform(
+                    tuple(values) if is_tuple else values[0])
+                values = list(out_data) if is_tuple else [out_data]
+                owned = [False] * len(values)
+            else:
+                group._apply(values, owned)
+            stat[0] += 1
+            stat[1] += timer() - start
+
+        if is_tuple:
+            return tuple(values)
+        return values[0]
+
+    def attach(self, dataset, method_name='get_example'):
+        """Apply the pipeline to the examples of a dataset.
+
+        Args:
+            dataset (~chainer.dataset.DatasetMixin): A dataset whose method
+                will be decorated.
+            method_name (string): Name of the :obj:`dataset`'s method which
+                will be decorated.
+
+        """
+        method = getattr(dataset, method_name)
+
+        def _extended(i):
+            return self(method(i))
+        setattr(dataset, method_name, _extended)
+
+    def stats(self):
+        """Return the wall time spent on each stage.
+
+        Returns:
+            collections.OrderedDict: A dictionary that maps the names of
+            the stages to dictionaries with keys :obj:`count`,
+            :obj:`total` and :obj:`mean`. :obj:`total` and :obj:`mean`
+            are in seconds.
+
+        """
+        stats = collections.OrderedDict()
+        for name, (count, total) in zip(self._names, self._stats):
+            stats[name] = {'count': count, 'total': total,
+                           'mean': total / count if count > 0 else 0.}
+        return stats
+
+    def reset_stats(self):
+        """Reset the statistics of the stages."""
+        self._stats = [[0, 0.] for _ in self._groups]
@@ -0,0 +1,361 @@
+import filelock
+import functools
+import hashlib
+import json
+import numpy as np
+import os
+import shutil
+import six
+import six.moves.cPickle as pickle
+import types
+
+
+class ArraySlotCache(object):
+
+    """A cache of examples stored in memory-mapped arrays.
+
+    Each example is a tuple of values, or a single value, and each of its
+    fields is stored in a preallocated array of slots indexed by the id
+    of the example. The shapes and the types of the slots are taken from
+    the first example that is added. A value that does not fit its slot,
+    such as an array whose shape differs from example to example or an
+    object that is not an array, is pickled into a variable-size slab
+    file instead. A validity array records which examples are stored.
+
+    The arrays are memory-mapped from files in :obj:`cache_dir`. Writers
+    take a file lock, and an example becomes visible to readers only
+    after all of its fields are written. Therefore, processes that open
+    the same directory, including the workers forked by
+    :class:`chainer.iterators.MultiprocessIterator`, can read and fill
+    the cache at the same time.
+
+    Args:
+        cache_dir (string): Path to the directory of the cache.
+        n (int): The number of examples.
+
+    """
+
+    def __init__(self, cache_dir, n):
+        self.cache_dir = cache_dir
+        self.n = n
+        self._lock_path = os.path.join(cache_dir, 'lock')
+        self._layout_path = os.path.join(cache_dir, 'layout.json')
+        self._valid_path = os.path.join(cache_dir, 'valid.npy')
+        self._slab_index_path = os.path.join(cache_dir, 'slab_index.npy')
+        self._slab_path = os.path.join(cache_dir, 'slab.dat')
+
+        if not os.path.exists(cache_dir):
+            try:
+                os.makedirs(cache_dir)
+            except OSError:
+                if not os.path.isdir(cache_dir):
+                    raise
+        with filelock.FileLock(self._lock_path):
+            if not os.path.exists(self._valid_path):
+                np.lib.format.open_memmap(
+                    self._slab_index_path, mode='w+', dtype=np.int64,
+                    shape=(n, 2))
+                np.lib.format.open_memmap(
+                    self._valid_path, mode='w+', dtype=np.uint8,
+                    shape=(n,))
+                open(self._slab_path, 'ab').close()
+        self._open()
+
+    def _open(self):
+        self._valid = np.load(self._valid_path, mmap_mode='r+')
+        if len(self._valid) != self.n:
+            raise ValueError(
+                'the cache in {} holds {} examples, but {} are '
+                'expected'.format(self.cache_dir, len(self._valid), self.n))
+        self._slab_index = np.load(self._slab_index_path, mmap_mode='r+')
+        self._layout = None
+        self._slots = None
+
+    def __getstate__(self):
+        # The memory maps are opened again in each process.
+        state = self.__dict__.copy()
+        for key in ('_valid', '_slab_index', '_layout', '_slots'):
+            state[key] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._open()
+
+    def __len__(self):
+        return self.n
+
+    def _load_layout(self):
+        if self._layout is None and os.path.exists(self._layout_path):
+            with open(self._layout_path) as f:
+                self._layout = json.load(f)
+            self._slots = [
+                None if field is None else np.load(
+                    os.path.join(self.cache_dir, 'field_{}.npy'.format(k)),
+                    mmap_mode='r+')
+                for k, field in enumerate(self._layout['fields'])]
+        return self._layout
+
+    def _create_layout(self, values, is_tuple):
+        fields = []
+        for k, value in enumerate(values):
+            if not isinstance(value, np.ndarray) or value.dtype == object:
+                fields.append(None)
+                continue
+            np.lib.format.open_memmap(
+                os.path.join(self.cache_dir, 'field_{}.npy'.format(k)),
+                mode='w+', dtype=value.dtype, shape=(self.n,) + value.shape)
+            fields.append({'shape': value.shape, 'dtype': value.dtype.str})
+        with open(self._layout_path + '.tmp', 'w') as f:
+            json.dump({'tuple': is_tuple, 'fields': fields}, f)
+        os.rename(self._layout_path + '.tmp', self._layout_path)
+
+    def __contains__(self, i):
+        return bool(self._valid[i])
+
+    def get(self, i):
+        """Return the i-th example.
+
+        Args:
+            i (int): The id of the example.
+
+        Returns:
+            A copy of the stored example, or :obj:`None` if it is not
+            stored.
+
+        """
+        if not self._valid[i]:
+            return None
+        layout = self._load_layout()
+        offset, size = self._slab_index[i]
+        extra = {}
+        if size > 0:
+            with open(self._slab_path, 'rb') as f:
+                f.seek(offset)
+                extra = pickle.loads(f.read(size))
+
+        values = []
+        for k, slot in enumerate(self._slots):
+            if k in extra:
+                values.append(extra[k])
+            else:
+                values.append(np.array(slot[i]))
+        if layout['tuple']:
+            return tuple(values)
+        return values[0]
+
+    def put(self, i, example):
+        """Store the i-th example.
+
+        Args:
+            i (int): The id of the example.
+            example: A tuple of values or a single value. The number of
+                the values must be the same for all examples.
+
+        """
+        is_tuple = isinstance(example, tuple)
+        values = example if is_tuple else (example,)
+        with filelock.FileLock(self._lock_path):
+            if self._valid[i]:
+                return
+            if self._load_layout() is None:
+                self._create_layout(values, is_tuple)
+                self._load_layout()
+            if (self._layout['tuple'] != is_tuple or
+                    len(self._slots) != len(values)):
+                raise ValueError(
+                    'the example {} does not have the same fields as the '
+                    'examples in the cache'.format(i))
+
+            extra = {}
+            for k, (slot, value) in enumerate(zip(self._slots, values)):
+                if (slot is not None and isinstance(value, np.ndarray) and
+                        value.shape == slot.shape[1:] and
+                        value.dtype == slot.dtype):
+                    slot[i] = value
+                else:
+                    extra[k] = value
+            if extra:
+                data = pickle.dumps(extra, protocol=2)
+                with open(self._slab_path, 'ab') as f:
+                    f.seek(0, os.SEEK_END)
+                    self._slab_index[i] = f.tell(), len(data)
+                    f.write(data)
+            # The example is marked after its data is written, so that a
+            # reader never sees a partially written example.
+            self._valid[i] = 1
+
+
+def _update_digest(md5, value, seen):
+    if isinstance(value, (six.integer_types, float, bool, complex,
+                          six.string_types, bytes, type(None), np.dtype,
+                          slice, type(Ellipsis))):
+        md5.update(repr(value).encode('utf-8'))
+        return
+    if id(value) in seen:
+        md5.update(b'<cycle>')
+        return
+    # The objects are kept alive so that their ids are not reused.
+    seen[id(value)] = value
+
+    md5.update(type(value).__name__.encode('utf-8'))
+    if isinstance(value, (np.ndarray, np.generic)):
+        value = np.ascontiguousarray(value)
+        md5.update(
+            '{}{}'.format(value.dtype.str, value.shape).encode('utf-8'))
+        md5.update(value.tobytes())
+    elif isinstance(value, (tuple, list, set, frozenset)):
+        if isinstance(value, (set, frozenset)):
+            value = sorted(value, key=repr)
+        for v in value:
+            _update_digest(md5, v, seen)
+    elif isinstance(value, dict):
+        for k in sorted(value, key=repr):
+            _update_digest(md5, k, seen)
+            _update_digest(md5, value[k], seen)
+    elif isinstance(value, types.CodeType):
+        md5.update(value.co_code)
+        _update_digest(md5, value.co_consts, seen)
+        _update_digest(md5, value.co_names, seen)
+    elif isinstance(value, types.FunctionType):
+        code = value.__code__
+        _update_digest(md5, code, seen)
+        _update_digest(md5, value.__defaults__, seen)
+        if value.__closure__ is not None:
+            _update_digest(
+                md5, [cell.cell_contents for cell in value.__closure__],
+                seen)
+        # Global variables used by the function, such as a mean image
+        # defined at the module level.
+        _update_digest(md5, dict(
+            (name, value.__globals__[name]) for name in code.co_names
+            if name in value.__globals__), seen)
+    elif isinstance(value, functools.partial):
+        _update_digest(md5, value.func, seen)
+        _update_digest(md5, value.args, seen)
+        _update_digest(md5, value.keywords, seen)
+    elif isinstance(value, types.MethodType):
+        _update_digest(md5, value.__func__, seen)
+        _update_digest(md5, value.__self__, seen)
+    elif isinstance(value, types.ModuleType):
+        md5.update(value.__name__.encode('utf-8'))
+    elif isinstance(value, (type, types.BuiltinFunctionType, np.ufunc)):
+        md5.update('{}.{}'.format(
+            getattr(value, '__module__', None),
+            value.__name__).encode('utf-8'))
+    else:
+        md5.update('{}.{}'.format(
+            type(value).__module__, type(value).__name__).encode('utf-8'))
+        attributes = getattr(value, '__dict__', None)
+        if attributes is None:
+            raise ValueError(
+                'cannot fingerprint an object of {}, whose state is not '
+                'known'.format(type(value)))
+        if callable(value):
+            # A callable object is identified by the code of its __call__
+            # and all of its attributes, which are its parameters.
+            _update_digest(md5, type(value).__call__, seen)
+        else:
+            # The state of an object is summarized by its public
+            # attributes. Objects that hold open files or locks keep them
+            # private.
+            attributes = dict((k, v) for k, v in attributes.items()
+                              if not k.startswith('_'))
+        _update_digest(md5, attributes, seen)
+
+
+def transform_fingerprint(dataset, transform, method_name='get_example'):
+    """Compute a fingerprint of a dataset and a transform.
+
+    The fingerprint is a digest of the identity of :obj:`dataset` and of
+    the function :obj:`transform`. The identity of the dataset consists
+    of its class, its length and its public attributes, such as the
+    path to the data and the split. The function is identified by its
+    compiled code, its constants, its default arguments and the values
+    captured in its closure, so editing a constant of the transform
+    changes the fingerprint. A :func:`functools.partial` is identified
+    by its function and its arguments, and a callable object is
+    identified by the code of its :meth:`__call__` and all of its
+    attributes. Arrays are identified by their contents. Other objects
+    are identified by their class and their public attributes.
+    :class:`ValueError` is raised for an object whose state cannot be
+    read in these ways, such as an object implemented in C, so that two
+    transforms that differ in such an object never share a fingerprint.
+
+    Args:
+        dataset (~chainer.dataset.DatasetMixin): A dataset.
+        transform (function): A function applied to the examples.
+        method_name (string): The name of the method to which
+            :obj:`transform` is applied.
+
+    Returns:
+        str: A hex digest.
+
+    """
+    md5 = hashlib.md5()
+    seen = {}
+    _update_digest(md5, type(dataset), seen)
+    _update_digest(md5, len(dataset), seen)
+    _update_digest(md5, method_name, seen)
+    # The method itself is included since it may already be extended by
+    # another transform.
+    method = getattr(dataset, method_name)
+    if isinstance(method, types.MethodType):
+        _update_digest(md5, method.__func__, seen)
+    else:
+        _update_digest(md5, method, seen)
+    _update_digest(md5, dict(
+        (k, v) for k, v in vars(dataset).items()
+        if not k.startswith('_') and k != method_name), seen)
+    _update_digest(md5, transform, seen)
+    return md5.hexdigest()
+
+
+def _disk_usage(path):
+    total = 0
+    for fn in os.listdir(path):
+        st = os.stat(os.path.join(path, fn))
+        # The slots are sparse files, so the allocated blocks are counted.
+        total += getattr(st, 'st_blocks', st.st_size // 512) * 512
+    return total
+
+
+def evict_caches(cache_root, max_bytes, keep=()):
+    """Remove the least recently used caches in a directory.
+
+    Each subdirectory of :obj:`cache_root` is a cache, whose modification
+    time is updated when it is opened by :func:`extend_cache`. The
+    caches are removed from the least recently used one until the total
+    size is at most :obj:`max_bytes`. A cache whose lock is held by a
+    writer of :class:`ArraySlotCache` is skipped.
+
+    Args:
+        cache_root (string): Path to the directory of caches.
+        max_bytes (int): The budget of the total size in bytes.
+        keep (iterable of strings): Names of caches that are not removed.
+
+    """
+    with filelock.FileLock(os.path.join(cache_root, 'lock')):
+        caches = []
+        for fn in os.listdir(cache_root):
+            path = os.path.join(cache_root, fn)
+            if not os.path.isdir(path):
+                continue
+            caches.append((os.stat(path).st_mtime, _disk_usage(path), fn))
+        caches.sort()
+
+        total = sum(cache[1] for cache in caches)
+        for _, size, fn in caches:
+            if total <= max_bytes:
+                break
+            if fn in keep:
+                continue
+            path = os.path.join(cache_root, fn)
+            # The lock of ArraySlotCache is taken, so that a cache that
+            # another process is writing to is not removed.
+            try:
+                with filelock.FileLock(os.path.join(path, 'lock'), timeout=0):
+                    shutil.rmtree(path, ignore_errors=True)
+            except filelock.Timeout:
+                continue
+            total -= size
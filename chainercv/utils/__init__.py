@@ -1,9 +1,17 @@
+from chainercv.utils.collate import concat_bbox_examples  # NOQA
+from chainercv.utils.collate import pad_concat_examples  # NOQA
 from chainercv.utils.download import cached_download  # NOQA
 from chainercv.utils.download import extractall  # NOQA
 from chainercv.utils.extension_utils import check_type  # NOQA
 from chainercv.utils.extension_utils import forward  # NOQA
+from chainercv.utils.file_source import ArchiveFileSource  # NOQA
+from chainercv.utils.file_source import as_file_source  # NOQA
+from chainercv.utils.file_source import DirectorySource  # NOQA
+from chainercv.utils.image_cache import DecodedImageCache  # NOQA
 from chainercv.utils.image_utils import gray2rgb  # NOQA
+from chainercv.utils.image_utils import hwc_to_chw  # NOQA
 from chainercv.utils.image_utils import read_image_as_array  # NOQA
+from chainercv.utils.image_utils import read_image_shape  # NOQA
 from chainercv.utils.test_utils import ConstantReturnModel  # NOQA
 from chainercv.utils.test_utils import DummyDataset  # NOQA
 from chainercv.utils.test_utils import SimpleDataset  # NOQA
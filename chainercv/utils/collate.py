@@ -0,0 +1,133 @@
+import functools
+import numpy as np
+import six
+
+from chainer.dataset.convert import to_device
+
+from chainercv.transforms.bbox.ragged_bboxes import RaggedBboxes
+
+
+def _aligned(size, align):
+    if align is None:
+        return size
+    return -(-size // align) * align
+
+
+def pad_concat_examples(batch, device=None, fill_value=0, align=None,
+                        return_mask=False):
+    """Concatenate examples of different sizes into padded arrays.
+
+    This is a converter like :func:`chainer.dataset.concat_examples`, which
+    can be given to :class:`chainer.training.StandardUpdater` and
+    :class:`chainer.training.extensions.Evaluator` with
+    :func:`functools.partial`. Each field of the examples is written
+    directly into one array filled with :obj:`fill_value`, whose shape is
+    the largest shape in the batch. The examples are placed at the top
+    left corner, so the coordinates of the pixels do not change. Unlike
+    padding each example by :func:`chainercv.transforms.pad` before
+    concatenation, the arrays are copied only once.
+
+    Args:
+        batch (list): A list of examples. An example is a tuple of arrays
+            or an array.
+        device (int): Device ID to which each array is sent. If this is
+            :obj:`None` or negative, the arrays stay on CPU.
+        fill_value (scalar or tuple): The value of the padded elements.
+            If this is a tuple, it specifies the value for each field,
+            and its length should be the number of the fields.
+            For example, :obj:`(0, -1)` fills the images with :obj:`0` and
+            the label images with :obj:`-1`.
+        align (int): If this is not :obj:`None`, the height and the width
+            of the fields in CHW format are rounded up to a multiple of
+            this value. This helps networks that downsample the input.
+        return_mask (bool): If true, a boolean array of shape
+            :math:`(N, H, W)` is returned after the fields. It is true in
+            the region covered by the first field of each example, so the
+            padded region can be skipped.
+
+    Returns:
+        A tuple of arrays if the examples are tuples. Otherwise, an array.
+        When :obj:`return_mask` is true, the mask is appended to the
+        tuple, or a tuple of the array and the mask is returned.
+
+    """
+    if len(batch) == 0:
+        raise ValueError('batch is empty')
+
+    is_tuple = isinstance(batch[0], tuple)
+    if is_tuple:
+        fields = list(six.moves.zip(*batch))
+    else:
+        fields = [batch]
+    if not isinstance(fill_value, tuple):
+        fill_value = (fill_value,) * len(fields)
+    elif len(fill_value) != len(fields):
+        raise ValueError(
+            'fill_value has {} values, but the examples have {} fields'
+            .format(len(fill_value), len(fields)))
+
+    outs = []
+    for field, value in zip(fields, fill_value):
+        field = [np.asarray(x) for x in field]
+        shape = tuple(np.max([x.shape for x in field], axis=0))
+        if len(shape) == 3:
+            shape = (shape[0], _aligned(shape[1], align),
+                     _aligned(shape[2], align))
+        dtype = functools.reduce(np.promote_types, [x.dtype for x in field])
+        out = np.full((len(field),) + shape, value, dtype=dtype)
+        for i, x in enumerate(field):
+            out[(i,) + tuple(slice(0, s) for s in x.shape)] = x
+        outs.append(out)
+
+    if return_mask:
+        mask = np.zeros((len(batch),) + outs[0].shape[-2:], dtype=bool)
+        for i, x in enumerate(fields[0]):
+            mask[i, :x.shape[-2], :x.shape[-1]] = True
+        outs.append(mask)
+
+    if device is not None and device >= 0:
+        outs = [to_device(device, out) for out in outs]
+    if is_tuple or return_mask:
+        return tuple(outs)
+    return outs[0]
+
+
+def concat_bbox_examples(batch, device=None, fill_value=0, align=None,
+                         return_shapes=False):
+    """Concatenate examples of images and bounding boxes.
+
+    This is a converter for examples of
+    :class:`chainercv.datasets.VOCDetectionDataset`, which are tuples of
+    an image in CHW format and bounding boxes of shape :math:`(R, 5)`.
+    The images are padded and concatenated by
+    :func:`chainercv.utils.pad_concat_examples`. Since the images are
+    placed at the top left corner, the coordinates of the bounding boxes
+    do not change. The bounding boxes are concatenated into one
+    :class:`chainercv.transforms.RaggedBboxes` by one
+    :func:`numpy.concatenate`, and they can be transformed as a batch.
+
+    Args:
+        batch (list): A list of tuples of an image and bounding boxes.
+        device (int): Device ID to which the images are sent. The bounding
+            boxes stay on CPU.
+        fill_value (scalar): The value of the padded pixels.
+        align (int): If this is not :obj:`None`, the height and the width
+            of the images are rounded up to a multiple of this value.
+        return_shapes (bool): If true, an integer array of shape
+            :math:`(N, 2)` that contains the height and the width of each
+            image before padding is also returned. This can be passed to
+            the transforms of :class:`chainercv.transforms.RaggedBboxes`.
+
+    Returns:
+        A tuple of the images and the bounding boxes, followed by the
+        shapes of the images if :obj:`return_shapes` is true.
+
+    """
+    if len(batch) == 0:
+        raise ValueError('batch is empty')
+    imgs = [example[0] for example in batch]
+    bboxes = RaggedBboxes.from_list([example[1] for example in batch])
+    outs = (pad_concat_examples(imgs, device, fill_value, align), bboxes)
+    if return_shapes:
+        outs += (np.array([img.shape[1:] for img in imgs], dtype=np.int32),)
+    return outs
@@ -1,27 +1,232 @@
+import filelock
+import hashlib
+import numpy as np
 import os
-import os.path as osp
-import pickle
+import shutil
+import tempfile
 
+from chainercv.utils.image_utils import hwc_to_chw
+from chainercv.utils.image_utils import read_image_shape
 
-def cache_load(cache_pkl_fn, creator, delete_cache, use_cache, args=()):
-    """Cache a file if it does not exist, or loads it otherwise.
+
+# Increment this when the layout of the cache changes.
+_cache_version = 1
+
+
+def file_manifest_digest(paths, source=None, stats=None):
+    """Compute a digest of the modification time and the size of files.
+
+    Args:
+        paths (list of strings): Paths to the files.
+        source: If this is not :obj:`None`, :obj:`paths` are names of
+            files in this file source, such as
+            :class:`chainercv.utils.ArchiveFileSource`.
+        stats (list of tuples): The modification time and the size of
+            each file. If this is given, the files are not read again.
+
+    Returns:
+        str: A hex digest that changes when one of the files changes.
+
+    """
+    md5 = hashlib.md5()
+    if stats is None:
+        stats = [None] * len(paths)
+    for path, stat in zip(paths, stats):
+        if stat is not None:
+            mtime, size = stat
+        elif source is None:
+            st = os.stat(path)
+            mtime, size = st.st_mtime, st.st_size
+        else:
+            mtime, size = source.stat(path)
+        md5.update('{}:{!r}:{}\n'.format(
+            path, float(mtime), int(size)).encode('utf-8'))
+    return md5.hexdigest()
+
+
+def _key_digest(key):
+    md5 = hashlib.md5()
+    md5.update('version={}\n'.format(_cache_version).encode('utf-8'))
+    for k in sorted(key):
+        md5.update('{}={!r}\n'.format(k, key[k]).encode('utf-8'))
+    return md5.hexdigest()
+
+
+def cache_load_arrays(cache_dir, key, creator, use_cache=True,
+                      delete_cache=False, args=()):
+    """Load arrays from a content-keyed cache, or create and cache them.
+
+    The cache is stored under :obj:`cache_dir` in a directory whose name is
+    a digest of :obj:`key` and the version of the cache layout.
+    :obj:`key` should contain every argument that affects the output of
+    :obj:`creator`, including a digest of the source files such as the
+    one computed by :func:`file_manifest_digest`. A stale cache is never
+    served because a different key points to a different directory.
+
+    The arrays are stored as uncompressed :obj:`.npy` files and loaded as
+    read-only memory maps. The cache is written to a temporary directory
+    and moved in place under a file lock, so that processes building the
+    same cache concurrently do not corrupt it.
 
     Args:
-        cache_pkl_fn (string): filename of the pkl file that contains cache
-        creator (callable): a callable that creates the cache.
-        delete_cache (bool): if true, the previous cache will be deleted.
+        cache_dir (string): Path to the directory where caches are stored.
+        key (dict): Values that identify the cache. The values should have
+            a deterministic :func:`repr`.
+        creator (callable): A callable that returns a dictionary which maps
+            names to arrays.
         use_cache (bool): If true, the previously stored cache will be used.
             Also, if this is true, newly created contents will be cached.
-        Args (tuple): arguments for creator.
+        delete_cache (bool): If true, the caches stored in :obj:`cache_dir`
+            will be deleted. This includes the caches of other keys, such
+            as the ones left by earlier versions of the source files.
+        args (tuple): Arguments for :obj:`creator`.
+
+    Returns:
+        dict of numpy.ndarray
+
     """
-    if delete_cache and os.path.exists(cache_pkl_fn):
-        os.remove(cache_pkl_fn)
-    if use_cache and osp.exists(cache_pkl_fn):
-        with open(cache_pkl_fn, 'rb') as f:
-            out = pickle.load(f)
-    else:
-        out = creator(*args)
-        if use_cache:
-            with open(cache_pkl_fn, 'wb') as f:
-                pickle.dump(out, f, protocol=2)
+    path = os.path.join(cache_dir, _key_digest(key))
+    lock_path = path + '.lock'
+
+    if delete_cache:
+        _delete_caches(cache_dir)
+    if use_cache and os.path.exists(path):
+        return _load_arrays(path)
+
+    out = creator(*args)
+    if not use_cache:
+        return out
+
+    if not os.path.exists(cache_dir):
+        try:
+            os.makedirs(cache_dir)
+        except OSError:
+            if not os.path.isdir(cache_dir):
+                raise
+    temp_path = tempfile.mkdtemp(dir=cache_dir)
+    try:
+        for name, array in out.items():
+            np.save(os.path.join(temp_path, name + '.npy'),
+                    np.asarray(array))
+        with filelock.FileLock(lock_path):
+            if not os.path.exists(path):
+                os.rename(temp_path, path)
+    finally:
+        if os.path.exists(temp_path):
+            shutil.rmtree(temp_path)
+    return _load_arrays(path)
+
+
+def _delete_caches(cache_dir):
+    if not os.path.isdir(cache_dir):
+        return
+    for name in os.listdir(cache_dir):
+        path = os.path.join(cache_dir, name)
+        # Temporary directories of caches being written are left alone.
+        if not _is_key_digest(name) or not os.path.isdir(path):
+            continue
+        with filelock.FileLock(path + '.lock'):
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def _is_key_digest(name):
+    return len(name) == 32 and all(c in '0123456789abcdef' for c in name)
+
+
+def _load_arrays(path):
+    out = {}
+    for fn in os.listdir(path):
+        name, ext = os.path.splitext(fn)
+        if ext == '.npy':
+            out[name] = np.load(os.path.join(path, fn), mmap_mode='r')
     return out
+
+
+def _read_image_shapes(paths, source):
+    shapes = np.empty((len(paths), 2), dtype=np.int32)
+    for i, path in enumerate(paths):
+        if source is None:
+            shapes[i] = read_image_shape(path)
+        else:
+            with source.open(path) as f:
+                shapes[i] = read_image_shape(f)
+    return {'shapes': shapes}
+
+
+def read_image_shapes(paths, source=None, cache_dir=None):
+    """Read the shapes of images from the headers of their files.
+
+    The images are not decoded. If :obj:`cache_dir` is given, the shapes
+    are cached by :func:`cache_load_arrays`, keyed by the modification
+    times and the sizes of the files, so the headers are read only once.
+
+    The datasets in :mod:`chainercv.datasets` provide the shapes of their
+    images by :meth:`get_image_shapes`, which reads them with this
+    function and caches them under the dataset root. The shapes are those
+    of the images returned by :meth:`get_raw_data`, and they are used by
+    :class:`chainercv.iterators.BucketIterator` to group the examples
+    without reading them.
+
+    Args:
+        paths (list of strings): Paths to the image files.
+        source: If this is not :obj:`None`, :obj:`paths` are names of
+            files in this file source.
+        cache_dir (string): Path to the directory where the cache is
+            stored. If this is :obj:`None`, the shapes are not cached.
+
+    Returns:
+        ~numpy.ndarray: An array of shape :math:`(N, 2)` that contains
+        the height and the width of each image.
+
+    """
+    if cache_dir is None:
+        return _read_image_shapes(paths, source)['shapes']
+    key = {'data_dir': None if source is None else source.key,
+           'sources': file_manifest_digest(paths, source)}
+    return cache_load_arrays(
+        cache_dir, key, _read_image_shapes, args=(paths, source))['shapes']
+
+
+def batch_raw_data(get_raw_data, indices, out=None):
+    """Read examples into one batch of CHW images.
+
+    :obj:`get_raw_data` is expected to return a tuple whose first element
+    is an RGB image in HWC format. The image is written directly into
+    :obj:`out` as a BGR image in CHW format, so that the batch is
+    assembled without an intermediate array per example. The remaining
+    elements of the tuples are collected into lists.
+
+    Args:
+        get_raw_data (callable): A method that takes an index and returns
+            a tuple of an image and other data.
+        indices (list of ints): Indices of the examples.
+        out (~numpy.ndarray): An array of shape :math:`(N, 3, H, W)` to
+            which the images are written. :math:`N` is the length of
+            :obj:`indices`. If this is :obj:`None`, an array of
+            :obj:`dtype==numpy.float32` is allocated from the shape of the
+            first image. All images need to have the same shape.
+
+    Returns:
+        tuple of an array of images and lists of the other data.
+
+    """
+    fields = None
+    for k, i in enumerate(indices):
+        in_data = get_raw_data(i)
+        img = in_data[0]
+        if out is None:
+            out = np.empty((len(indices), 3) + img.shape[:2],
+                           dtype=np.float32)
+        if img.shape[:2] != out.shape[2:]:
+            raise ValueError(
+                'the image of the example {} has shape {}, which does not '
+                'match the batch of shape {}'.format(
+                    i, img.shape[:2], out.shape[2:]))
+        hwc_to_chw(img, out=out[k])  # RGB to BGR
+        if fields is None:
+            fields = tuple([] for _ in in_data[1:])
+        for field, data in zip(fields, in_data[1:]):
+            field.append(data)
+    if fields is None:
+        raise ValueError('indices must not be empty')
+    return (out,) + fields
@@ -1,9 +1,13 @@
 from __future__ import print_function
 import hashlib
+import json
+import multiprocessing
+from multiprocessing.pool import ThreadPool
 import os
 import shutil
+import six
 import tarfile
-import tempfile
+import warnings
 import zipfile
 
 import filelock
@@ -15,6 +19,7 @@ import time
 
 _dataset_root = os.environ.get('CHAINER_DATASET_ROOT',
                                os.path.expanduser('~/.chainer/dataset'))
+_block_size = 64 * 1024
 
 
 def reporthook(count, block_size, total_size):
@@ -31,7 +36,162 @@ def reporthook(count, block_size, total_size):
     sys.stdout.flush()
 
 
-def cached_download(url):
+def _progress_file(cache_path):
+    return cache_path + '.progress'
+
+
+def _load_progress(cache_path, validator):
+    try:
+        with open(_progress_file(cache_path)) as f:
+            progress = json.load(f)
+    except (IOError, ValueError):
+        return None
+    if validator is None:
+        # Without a validator, a change of the remote file cannot be
+        # detected, so the partial file is discarded.
+        return None
+    if progress.get('validator') != validator or \
+            not os.path.exists(cache_path + '.part'):
+        # The remote file has changed or the partial file is gone.
+        return None
+    return progress
+
+
+def _save_progress(cache_path, progress):
+    temp_path = _progress_file(cache_path) + '.tmp'
+    with open(temp_path, 'w') as f:
+        json.dump(progress, f)
+    os.rename(temp_path, _progress_file(cache_path))
+
+
+def _probe(url):
+    """Return the size and a validator of a file if ranges are supported."""
+    req = request.Request(url, headers={'Range': 'bytes=0-0'})
+    try:
+        res = request.urlopen(req)
+    except (IOError, ValueError):
+        return None, None
+    try:
+        content_range = res.headers.get('Content-Range')
+        if res.getcode() != 206 or content_range is None:
+            return None, None
+        total = content_range.rsplit('/', 1)[-1]
+        if not total.isdigit():
+            return None, None
+        etag = res.headers.get('ETag')
+        last_modified = res.headers.get('Last-Modified')
+        if etag is None and last_modified is None:
+            validator = None
+        else:
+            validator = '{}|{}'.format(etag, last_modified)
+        return int(total), validator
+    finally:
+        res.close()
+
+
+def _download_chunk(url, part_path, start, end):
+    req = request.Request(
+        url, headers={'Range': 'bytes={}-{}'.format(start, end - 1)})
+    res = request.urlopen(req)
+    try:
+        if res.getcode() != 206:
+            raise IOError('the server did not return the requested range')
+        with open(part_path, 'r+b') as f:
+            f.seek(start)
+            pos = start
+            while pos < end:
+                buf = res.read(min(_block_size, end - pos))
+                if not buf:
+                    raise IOError(
+                        'connection closed at {} of the range {}-{}'.format(
+                            pos, start, end))
+                f.write(buf)
+                pos += len(buf)
+    finally:
+        res.close()
+
+
+def _download_ranges(url, cache_path, total, validator, n_connections,
+                     chunk_size, hash_):
+    part_path = cache_path + '.part'
+    progress = _load_progress(cache_path, validator)
+    if progress is None or progress['chunk_size'] != chunk_size:
+        progress = {'validator': validator, 'chunk_size': chunk_size,
+                    'done': []}
+        with open(part_path, 'wb') as f:
+            f.truncate(total)
+        _save_progress(cache_path, progress)
+
+    n_chunk = max(-(-total // chunk_size), 1)
+    done = set(progress['done'])
+    pending = [k for k in six.moves.range(n_chunk) if k not in done]
+
+    # The checksum is computed over the completed prefix of the file while
+    # the remaining chunks are downloaded. The chunks are completed out of
+    # order by the connections, and the chunks of a resumed download exist
+    # only in the partial file, so each chunk is hashed by reading it back
+    # once the chunks before it are hashed. The data is read from the page
+    # cache right after it is written, instead of keeping the chunks that
+    # are completed early in memory.
+    state = {'hashed': 0}
+
+    def update_hash():
+        if hash_ is None:
+            return
+        with open(part_path, 'rb') as f:
+            while state['hashed'] in done:
+                k = state['hashed']
+                f.seek(k * chunk_size)
+                hash_.update(f.read(min(chunk_size, total - k * chunk_size)))
+                state['hashed'] += 1
+
+    def fetch(k):
+        _download_chunk(
+            url, part_path, k * chunk_size, min((k + 1) * chunk_size, total))
+        return k
+
+    update_hash()
+    reporthook(0, chunk_size, total)
+    pool = ThreadPool(n_connections)
+    try:
+        for k in pool.imap_unordered(fetch, pending):
+            done.add(k)
+            progress['done'].append(k)
+            _save_progress(cache_path, progress)
+            update_hash()
+            reporthook(len(done), chunk_size, total)
+    finally:
+        pool.close()
+        pool.join()
+    return part_path
+
+
+def _download_stream(url, cache_path, hash_):
+    part_path = cache_path + '.part'
+    res = request.urlopen(url)
+    try:
+        total = res.headers.get('Content-Length')
+        total = int(total) if total is not None else -1
+        count = 0
+        reporthook(0, _block_size, total)
+        with open(part_path, 'wb') as f:
+            while True:
+                buf = res.read(_block_size)
+                if not buf:
+                    break
+                f.write(buf)
+                if hash_ is not None:
+                    hash_.update(buf)
+                count += 1
+                if total > 0:
+                    reporthook(count, _block_size, total)
+    finally:
+        res.close()
+    return part_path
+
+
+def cached_download(url, n_connections=4, chunk_size=8 * 1024 * 1024,
+                    checksum=None, hash_algorithm='md5'):
     """Downloads a file and caches it.
 
     This is different from the original ``cached_download`` in that the
@@ -43,8 +203,31 @@ def cached_download(url):
     for the given URL, it just returns the path to the cache without
     downloading the same file.
 
+    When the server supports HTTP range requests, the file is downloaded
+    in chunks of :obj:`chunk_size` bytes over :obj:`n_connections`
+    concurrent connections. The completed chunks are recorded next to the
+    partial file, so that a download interrupted by an error or by the
+    end of the process is resumed from the remaining chunks. A download is
+    resumed only when the server identifies the version of the file by
+    :obj:`ETag` or :obj:`Last-Modified`, and the partial file is discarded
+    when the version differs. Otherwise, the file is downloaded in a single
+    stream.
+
     Args:
         url (str): URL to download from.
+        n_connections (int): The number of concurrent connections.
+        chunk_size (int): The size of a chunk in bytes.
+        checksum (str): If this is not :obj:`None`, the hex digest of the
+            downloaded file is compared with this and :class:`RuntimeError`
+            is raised when they differ. The digest is computed while the
+            file is downloaded. The chunks are hashed in order as soon as
+            the chunks before them are completed, by reading them back from
+            the partial file, since they are completed out of order and a
+            resumed download has the chunks downloaded before only in the
+            partial file.
+        hash_algorithm (str): The name of the hash algorithm in
+            :mod:`hashlib` used for :obj:`checksum`, such as :obj:`md5`
+            and :obj:`sha256`.
 
     Returns:
         str: Path to the downloaded file.
@@ -65,26 +248,276 @@ def cached_download(url):
         if os.path.exists(cache_path):
             return cache_path
 
-    temp_root = tempfile.mkdtemp(dir=cache_root)
-    try:
-        temp_path = os.path.join(temp_root, 'dl')
+    # Only one process downloads the same URL at a time.
+    with filelock.FileLock(cache_path + '.lock'):
+        if os.path.exists(cache_path):
+            return cache_path
+
+        if checksum is None:
+            hash_ = None
+        else:
+            hash_ = hashlib.new(hash_algorithm)
         print('Downloading from {}...'.format(url))
-        request.urlretrieve(url, temp_path, reporthook)
+        total, validator = _probe(url)
+        if total is not None:
+            part_path = _download_ranges(
+                url, cache_path, total, validator, n_connections,
+                chunk_size, hash_)
+        else:
+            part_path = _download_stream(url, cache_path, hash_)
+
+        if os.path.exists(_progress_file(cache_path)):
+            os.remove(_progress_file(cache_path))
+        if hash_ is not None and hash_.hexdigest() != checksum.lower():
+            os.remove(part_path)
+            raise RuntimeError(
+                'the {} checksum of the file downloaded from {} is {}, '
+                'which does not match {}'.format(
+                    hash_algorithm, url, hash_.hexdigest(), checksum))
         with filelock.FileLock(lock_path):
-            shutil.move(temp_path, cache_path)
-    finally:
-        shutil.rmtree(temp_root)
+            os.rename(part_path, cache_path)
 
     return cache_path
 
 
-def extractall(file_path, destination, ext):
-    if ext == '.zip':
-        with zipfile.ZipFile(file_path, 'r') as z:
-            z.extractall(destination)
-    elif ext == '.tar':
-        with tarfile.TarFile(file_path, 'r') as t:
-            t.extractall(destination)
-    elif ext == '.gz' or ext == '.tgz':
-        with tarfile.open(file_path, 'r:gz') as t:
-            t.extractall(destination)
+def _log_header(file_path):
+    st = os.stat(file_path)
+    return '{} {!r}\n'.format(st.st_size, st.st_mtime)
+
+
+# A line written at the end of the log when all members are extracted.
+# This is never the name of a member, since absolute paths are rejected.
+_all_members = '/'
+
+
+def _read_log(log_path, header):
+    """Return the names of the members extracted before."""
+    if not os.path.exists(log_path):
+        return set()
+    with open(log_path) as f:
+        lines = f.read().split('\n')
+    if lines[0] + '\n' != header:
+        # The archive has changed.
+        return set()
+    # The last line may be incomplete.
+    return set(lines[1:-1])
+
+
+def _member_path(destination, name):
+    norm = os.path.normpath(name)
+    if os.path.isabs(norm) or norm == '..' or \
+            norm.startswith('..' + os.sep):
+        raise ValueError(
+            'the member {} is outside of the destination'.format(name))
+    return os.path.join(destination, norm)
+
+
+def _makedirs(path):
+    try:
+        os.makedirs(path)
+    except OSError:
+        if not os.path.isdir(path):
+            raise
+
+
+def _extract_link(member, path, destination):
+    # The target of a link is checked in the same way as the names of the
+    # members, so that a link does not point outside of the destination.
+    if member.issym():
+        target = os.path.join(os.path.dirname(member.name), member.linkname)
+    else:
+        target = member.linkname
+    target_path = _member_path(destination, target)
+    if member.islnk() and not os.path.exists(target_path):
+        warnings.warn(
+            'the hard link {} is not extracted, since its target {} is '
+            'not extracted'.format(member.name, member.linkname))
+        return False
+
+    _makedirs(os.path.dirname(path))
+    if os.path.lexists(path):
+        # A link left by an interrupted extraction.
+        os.remove(path)
+    if member.issym():
+        os.symlink(member.linkname, path)
+    else:
+        try:
+            os.link(target_path, path)
+        except OSError:
+            # The file system does not support hard links.
+            shutil.copy2(target_path, path)
+    return True
+
+
+def _extract_tar(file_path, destination, mode, member_filter, done, log):
+    directories = []
+    # The archive is read in one sequential pass, which is the only way
+    # to read a compressed tar archive without decompressing it twice.
+    with tarfile.open(file_path, mode) as t:
+        for member in t:
+            if member.isdir():
+                path = _member_path(destination, member.name)
+                _makedirs(path)
+                directories.append((path, member))
+                continue
+            if member.name in done:
+                continue
+            if member_filter is not None and not member_filter(member.name):
+                continue
+            path = _member_path(destination, member.name)
+            if member.issym() or member.islnk():
+                if not _extract_link(member, path, destination):
+                    continue
+            elif member.isfile():
+                _makedirs(os.path.dirname(path))
+                src = t.extractfile(member)
+                with open(path, 'wb') as f:
+                    shutil.copyfileobj(src, f, _block_size)
+                os.chmod(path, member.mode & 0o777)
+                os.utime(path, (member.mtime, member.mtime))
+            else:
+                warnings.warn(
+                    'the member {} is not extracted, since it is not a '
+                    'regular file, a directory or a link'.format(
+                        member.name))
+                continue
+            log.write(member.name + '\n')
+            log.flush()
+
+    # The modes of the directories are set after their members are
+    # written, as tarfile does, so that a read-only directory is filled.
+    for path, member in reversed(directories):
+        os.chmod(path, member.mode & 0o777)
+        os.utime(path, (member.mtime, member.mtime))
+
+
+def _extract_zip_members(args):
+    file_path, destination, names = args
+    with zipfile.ZipFile(file_path, 'r') as z:
+        for name in names:
+            # The directories are created by the parent process, so the
+            # processes do not race to create them.
+            with z.open(name) as src, \
+                    open(_member_path(destination, name), 'wb') as f:
+                shutil.copyfileobj(src, f, _block_size)
+    return names
+
+
+def _extract_zip(file_path, destination, member_filter, done, log,
+                 n_processes):
+    with zipfile.ZipFile(file_path, 'r') as z:
+        names = [name for name in z.namelist()
+                 if not name.endswith('/') and name not in done and
+                 (member_filter is None or member_filter(name))]
+    for dirname in sorted(set(
+            os.path.dirname(_member_path(destination, name))
+            for name in names)):
+        _makedirs(dirname)
+
+    if n_processes is None:
+        n_processes = multiprocessing.cpu_count()
+    n_chunk = min(len(names), 4 * n_processes)
+    chunks = [(file_path, destination, names[k::n_chunk])
+              for k in six.moves.range(n_chunk)]
+    if n_processes > 1 and n_chunk > 1:
+        # Members are decompressed in parallel. Each process opens the
+        # archive by itself.
+        pool = multiprocessing.Pool(n_processes)
+        try:
+            results = pool.imap_unordered(_extract_zip_members, chunks)
+            for extracted in results:
+                log.write(''.join(name + '\n' for name in extracted))
+                log.flush()
+        finally:
+            pool.close()
+            pool.join()
+    else:
+        for chunk in chunks:
+            _extract_zip_members(chunk)
+            log.write(''.join(name + '\n' for name in chunk[2]))
+            log.flush()
+
+
+def extraction_in_progress(destination):
+    """Check if an extraction into a directory has not completed.
+
+    Args:
+        destination (str): Path to the directory passed to
+            :func:`extractall`.
+
+    Returns:
+        bool: :obj:`True` if :func:`extractall` into :obj:`destination`
+        was interrupted.
+
+    """
+    if not os.path.isdir(destination):
+        return False
+    return any(fn.startswith('.') and fn.endswith('.extracting')
+               for fn in os.listdir(destination))
+
+
+def extractall(file_path, destination, ext, member_filter=None,
+               n_processes=None):
+    """Extracts an archive.
+
+    The names of the extracted members are logged in a file in
+    :obj:`destination`. When the extraction is interrupted, the next call
+    extracts only the remaining members. After all members are extracted,
+    the next call returns immediately. When only the members selected by
+    :obj:`member_filter` were extracted, the next call extracts the
+    members that are selected by its filter and not extracted yet.
+
+    Tar archives, including compressed ones, are read in a single
+    streaming pass. The modes of their files and directories are restored,
+    and their symbolic links and hard links are created. A link whose
+    target is outside of :obj:`destination` raises :class:`ValueError`. A
+    hard link whose target is not extracted and the other special members,
+    such as devices, are skipped with a warning. The members of a zip
+    archive are decompressed in parallel by a pool of processes.
+
+    Args:
+        file_path (str): Path to the archive.
+        destination (str): Path to the directory where the members are
+            written.
+        ext (str): The extension of the archive, which is one of
+            :obj:`.zip`, :obj:`.tar`, :obj:`.gz` and :obj:`.tgz`.
+        member_filter (callable): A callable that takes the name of a
+            member and returns whether it is extracted. If this is
+            :obj:`None`, all members are extracted.
+        n_processes (int): The number of processes used for zip archives.
+            If this is :obj:`None`, the number of CPUs is used.
+
+    """
+    name = os.path.basename(file_path)
+    log_path = os.path.join(destination, '.{}.extracting'.format(name))
+    complete_path = os.path.join(destination, '.{}.extracted'.format(name))
+    if os.path.exists(complete_path):
+        with open(complete_path) as f:
+            if f.read().endswith('\n' + _all_members + '\n'):
+                return
+        # Only the members selected by a filter were extracted. The other
+        # members are extracted by resuming from the log.
+        os.rename(complete_path, log_path)
+    _makedirs(destination)
+
+    header = _log_header(file_path)
+    done = _read_log(log_path, header)
+    if len(done) == 0:
+        with open(log_path, 'w') as log:
+            log.write(header)
+    with open(log_path, 'a') as log:
+        if ext == '.zip':
+            _extract_zip(
+                file_path, destination, member_filter, done, log,
+                n_processes)
+        elif ext == '.tar':
+            _extract_tar(
+                file_path, destination, 'r|', member_filter, done, log)
+        elif ext == '.gz' or ext == '.tgz':
+            _extract_tar(
+                file_path, destination, 'r|gz', member_filter, done, log)
+        else:
+            raise ValueError('unsupported extension {}'.format(ext))
+        if member_filter is None:
+            log.write(_all_members + '\n')
+    os.rename(log_path, complete_path)
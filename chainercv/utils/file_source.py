@@ -0,0 +1,276 @@
+import io
+import numpy as np
+import os
+import six
+import tarfile
+import threading
+import time
+import zipfile
+import zlib
+
+
+class DirectorySource(object):
+
+    """Files in a directory.
+
+    This is the file source used by the datasets when a path to a
+    directory is given as :obj:`data_dir`.
+
+    Args:
+        root (string): Path to the directory.
+
+    """
+
+    def __init__(self, root):
+        self.root = root
+
+    @property
+    def key(self):
+        """A string that identifies the source in cache keys."""
+        return os.path.abspath(self.root)
+
+    def open(self, name):
+        """Open a file.
+
+        Args:
+            name (string): Path to the file relative to the root. The
+                directories are separated by :obj:`/`.
+
+        Returns:
+            A binary file object.
+
+        """
+        return open(os.path.join(self.root, name), 'rb')
+
+    def read(self, name):
+        """Read the contents of a file."""
+        with self.open(name) as f:
+            return f.read()
+
+    def stat(self, name):
+        """Return the modification time and the size of a file."""
+        st = os.stat(os.path.join(self.root, name))
+        return st.st_mtime, st.st_size
+
+
+class _MemberFile(io.BytesIO):
+
+    def __init__(self, data, name, mtime):
+        super(_MemberFile, self).__init__(data)
+        self.name = name
+        self.mtime = mtime
+        self.size = len(data)
+
+
+_STORED = 0
+_DEFLATED = 8
+
+
+def _index_tar(archive_path):
+    names, offsets, sizes, mtimes = [], [], [], []
+    try:
+        # Only uncompressed archives can be read at random.
+        t = tarfile.open(archive_path, 'r:')
+    except tarfile.ReadError:
+        raise ValueError(
+            '{} is not an uncompressed tar archive. Compressed tar archives '
+            'cannot be read at random, so they need to be decompressed '
+            'or extracted first.'.format(archive_path))
+    with t:
+        for member in t:
+            if not member.isfile():
+                continue
+            names.append(member.name)
+            offsets.append(member.offset_data)
+            sizes.append(member.size)
+            mtimes.append(member.mtime)
+    methods = np.full(len(names), _STORED, dtype=np.int8)
+    return names, offsets, sizes, sizes, methods, mtimes
+
+
+def _index_zip(archive_path):
+    names, offsets, sizes, file_sizes, methods, mtimes = \
+        [], [], [], [], [], []
+    with zipfile.ZipFile(archive_path, 'r') as z, \
+            open(archive_path, 'rb') as f:
+        for info in z.infolist():
+            if info.filename.endswith('/'):
+                continue
+            # The data follows the local header, whose variable-length
+            # fields can differ from those in the central directory.
+            f.seek(info.header_offset)
+            header = f.read(30)
+            name_len, extra_len = np.frombuffer(
+                header[26:30], dtype='<u2')
+            names.append(info.filename)
+            offsets.append(
+                info.header_offset + 30 + int(name_len) + int(extra_len))
+            sizes.append(info.compress_size)
+            file_sizes.append(info.file_size)
+            methods.append(info.compress_type)
+            mtimes.append(time.mktime(info.date_time + (0, 0, -1)))
+    return names, offsets, sizes, file_sizes, methods, mtimes
+
+
+def _build_index(archive_path):
+    if zipfile.is_zipfile(archive_path):
+        index = _index_zip(archive_path)
+    else:
+        index = _index_tar(archive_path)
+    names, offsets, sizes, file_sizes, methods, mtimes = index
+    return {'names': np.array(names, dtype=np.str_),
+            'offsets': np.array(offsets, dtype=np.int64),
+            'sizes': np.array(sizes, dtype=np.int64),
+            'file_sizes': np.array(file_sizes, dtype=np.int64),
+            'methods': np.array(methods, dtype=np.int8),
+            'mtimes': np.array(mtimes, dtype=np.float64)}
+
+
+class ArchiveFileSource(object):
+
+    """Files in a tar or zip archive, read without extraction.
+
+    The offsets of the members are indexed once and stored in
+    :obj:`index_file`. The index is built again when the archive changes.
+    After that, a file is read from the archive by one positioned read
+    (:func:`os.pread`) without scanning the archive. Members of a zip
+    archive that are compressed with deflate are decompressed on read.
+
+    Since a gzip or bzip2 stream cannot be read at random, compressed tar
+    archives such as :obj:`.tar.gz` are not supported.
+
+    Args:
+        archive_path (string): Path to the archive.
+        root (string): The directory in the archive that corresponds to
+            the root of the data. For example, this is
+            :obj:`VOCdevkit/VOC2012` for the VOC2012 archive.
+        index_file (string): Path to the index. If this is :obj:`None`,
+            :obj:`archive_path + '.index.npz'` is used.
+
+    """
+
+    def __init__(self, archive_path, root='', index_file=None):
+        self.archive_path = archive_path
+        self.root = root.strip('/')
+        if index_file is None:
+            index_file = archive_path + '.index.npz'
+        self.index_file = index_file
+
+        st = os.stat(archive_path)
+        index = None
+        if os.path.exists(index_file):
+            with np.load(index_file) as f:
+                if (f['archive_mtime'] == st.st_mtime and
+                        f['archive_size'] == st.st_size):
+                    index = dict((key, f[key]) for key in f.files)
+        if index is None:
+            index = _build_index(archive_path)
+            index['archive_mtime'] = np.array(st.st_mtime)
+            index['archive_size'] = np.array(st.st_size)
+            tmp_file = '{}.{}.tmp'.format(index_file, os.getpid())
+            with open(tmp_file, 'wb') as f:
+                np.savez(f, **index)
+            os.rename(tmp_file, index_file)
+
+        self.names = index['names']
+        self.offsets = index['offsets']
+        self.sizes = index['sizes']
+        self.file_sizes = index['file_sizes']
+        self.methods = index['methods']
+        self.mtimes = index['mtimes']
+        self._member_index = dict(
+            (name, i) for i, name in enumerate(self.names))
+        self._fd = None
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # The file is opened again lazily in each process.
+        state = self.__dict__.copy()
+        state['_fd'] = None
+        state['_lock'] = None
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lock = threading.Lock()
+
+    def __del__(self):
+        if getattr(self, '_fd', None) is not None:
+            os.close(self._fd)
+
+    @property
+    def key(self):
+        """A string that identifies the source in cache keys."""
+        return '{}:{}'.format(os.path.abspath(self.archive_path), self.root)
+
+    def _find(self, name):
+        if self.root:
+            name = self.root + '/' + name
+        try:
+            return self._member_index[name]
+        except KeyError:
+            raise IOError('{} is not in {}'.format(name, self.archive_path))
+
+    def _pread(self, size, offset):
+        if self._fd is None:
+            with self._lock:
+                if self._fd is None:
+                    self._fd = os.open(
+                        self.archive_path, os.O_RDONLY |
+                        getattr(os, 'O_BINARY', 0))
+        if hasattr(os, 'pread'):
+            return os.pread(self._fd, size, offset)
+        with self._lock:
+            os.lseek(self._fd, offset, os.SEEK_SET)
+            return os.read(self._fd, size)
+
+    def open(self, name):
+        """Open a member of the archive.
+
+        Args:
+            name (string): Path to the file relative to :obj:`root`. The
+                directories are separated by :obj:`/`.
+
+        Returns:
+            A binary file object that holds the contents of the member.
+            It has the attributes :obj:`name` and :obj:`mtime`.
+
+        """
+        i = self._find(name)
+        data = self._pread(int(self.sizes[i]), int(self.offsets[i]))
+        method = self.methods[i]
+        if method == _DEFLATED:
+            data = zlib.decompress(data, -zlib.MAX_WBITS)
+        elif method != _STORED:
+            raise IOError(
+                'compression method {} of {} is not supported'.format(
+                    method, name))
+        return _MemberFile(
+            data, '{}/{}'.format(self.archive_path, self.names[i]),
+            float(self.mtimes[i]))
+
+    def read(self, name):
+        """Read the contents of a member."""
+        return self.open(name).getvalue()
+
+    def stat(self, name):
+        """Return the modification time and the size of a member."""
+        i = self._find(name)
+        return float(self.mtimes[i]), int(self.file_sizes[i])
+
+
+def as_file_source(data_dir):
+    """Return a file source for a path to a directory or a file source.
+
+    Args:
+        data_dir (string or file source): A path to a directory or an
+            object such as :class:`ArchiveFileSource`.
+
+    Returns:
+        :obj:`data_dir` itself if it is a file source. Otherwise,
+        :class:`DirectorySource` of :obj:`data_dir`.
+
+    """
+    if isinstance(data_dir, six.string_types):
+        return DirectorySource(data_dir)
+    return data_dir
@@ -0,0 +1,191 @@
+import filelock
+import hashlib
+import numpy as np
+import os
+import tempfile
+
+
+_HITS, _MISSES, _EVICTIONS, _BYTES = range(4)
+
+
+def _default_cache_dir():
+    # /dev/shm is a memory-backed file system on Linux, so the cached
+    # images live in shared memory.
+    if os.path.isdir('/dev/shm'):
+        root = '/dev/shm'
+    else:
+        root = tempfile.gettempdir()
+    return os.path.join(root, 'chainercv_image_cache')
+
+
+class DecodedImageCache(object):
+
+    """A cache of decoded images shared by processes.
+
+    Decoded images are stored as :obj:`.npy` files in :obj:`cache_dir` and
+    read back as read-only memory maps. By default, the directory is in
+    :obj:`/dev/shm`, so the cached images are kept in shared memory and
+    every process that uses the same directory, such as the workers of
+    :class:`chainer.iterators.MultiprocessIterator`, shares the entries.
+
+    When the total size of the entries exceeds :obj:`max_bytes`, the least
+    recently used entries are evicted. The numbers of hits, misses and
+    evictions are counted across all processes and can be read with
+    :meth:`stats`, which helps to size the cache.
+
+    The cache is used by passing it to
+    :func:`chainercv.utils.read_image_as_array` or to the
+    :obj:`image_cache` argument of the datasets.
+
+    Args:
+        cache_dir (string): Path to the directory of the cache. If this is
+            :obj:`None`, a directory in :obj:`/dev/shm` is used.
+        max_bytes (int): The budget of the total size of the cached
+            images in bytes.
+
+    """
+
+    def __init__(self, cache_dir=None, max_bytes=1024 ** 3):
+        if cache_dir is None:
+            cache_dir = _default_cache_dir()
+        self.cache_dir = cache_dir
+        self.max_bytes = max_bytes
+        self._lock_path = os.path.join(cache_dir, '_lock')
+        self._stats_path = os.path.join(cache_dir, '_stats')
+        self._counters = None
+
+        if not os.path.exists(cache_dir):
+            try:
+                os.makedirs(cache_dir)
+            except OSError:
+                if not os.path.isdir(cache_dir):
+                    raise
+        with filelock.FileLock(self._lock_path):
+            if not os.path.exists(self._stats_path):
+                np.zeros(4, dtype=np.int64).tofile(self._stats_path)
+
+    def __getstate__(self):
+        # The memory map of the counters is opened again in each process.
+        state = self.__dict__.copy()
+        state['_counters'] = None
+        return state
+
+    @property
+    def counters(self):
+        if self._counters is None:
+            self._counters = np.memmap(
+                self._stats_path, dtype=np.int64, mode='r+', shape=(4,))
+        return self._counters
+
+    def _entry_path(self, key):
+        digest = hashlib.sha1(repr(key).encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, digest + '.npy')
+
+    def get(self, key):
+        """Look up a decoded image.
+
+        Args:
+            key: A value with a deterministic :func:`repr` that identifies
+                the image.
+
+        Returns:
+            ~numpy.ndarray:
+            A read-only image if :obj:`key` is in the cache. Otherwise,
+            :obj:`None`.
+
+        """
+        path = self._entry_path(key)
+        try:
+            img = np.load(path, mmap_mode='r')
+            # The modification time records the last use.
+            os.utime(path, None)
+        except (IOError, OSError, ValueError):
+            # The entry does not exist or was evicted while being read.
+            self.counters[_MISSES] += 1
+            return None
+        self.counters[_HITS] += 1
+        return img
+
+    def put(self, key, img):
+        """Add a decoded image.
+
+        Args:
+            key: A value with a deterministic :func:`repr` that identifies
+                the image.
+            img (~numpy.ndarray): The image.
+
+        """
+        path = self._entry_path(key)
+        fd, temp_path = tempfile.mkstemp(
+            dir=self.cache_dir, suffix='.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.save(f, img)
+            nbytes = os.path.getsize(temp_path)
+            if nbytes > self.max_bytes:
+                return
+            with filelock.FileLock(self._lock_path):
+                if os.path.exists(path):
+                    return
+                os.rename(temp_path, path)
+                self.counters[_BYTES] += nbytes
+                if self.counters[_BYTES] > self.max_bytes:
+                    self._evict()
+        finally:
+            if os.path.exists(temp_path):
+                os.remove(temp_path)
+
+    def _evict(self):
+        # Evict down to 90% of the budget so that the directory is not
+        # scanned on every insertion.
+        target = int(0.9 * self.max_bytes)
+        entries = []
+        for fn in os.listdir(self.cache_dir):
+            if not fn.endswith('.npy'):
+                continue
+            path = os.path.join(self.cache_dir, fn)
+            try:
+                st = os.stat(path)
+            except OSError:
+                continue
+            entries.append((st.st_mtime, st.st_size, path))
+        entries.sort()
+
+        total = sum(entry[1] for entry in entries)
+        n_evicted = 0
+        for _, size, path in entries:
+            if total <= target:
+                break
+            # Readers that already mapped the file keep a valid mapping.
+            os.remove(path)
+            total -= size
+            n_evicted += 1
+        self.counters[_BYTES] = total
+        self.counters[_EVICTIONS] += n_evicted
+
+    def stats(self):
+        """Return the counters of the cache.
+
+        The counters are shared by all processes that use the same
+        :obj:`cache_dir`. Hits and misses are counted without a lock, so
+        they can be slightly off when processes update them at the same
+        time.
+
+        Returns:
+            dict: A dictionary with keys :obj:`hits`, :obj:`misses`,
+            :obj:`evictions` and :obj:`bytes`.
+
+        """
+        counters = self.counters
+        return {'hits': int(counters[_HITS]),
+                'misses': int(counters[_MISSES]),
+                'evictions': int(counters[_EVICTIONS]),
+                'bytes': int(counters[_BYTES])}
+
+    def clear(self):
+        """Remove all entries and reset the counters."""
+        with filelock.FileLock(self._lock_path):
+            for fn in os.listdir(self.cache_dir):
+                if fn.endswith('.npy'):
+                    os.remove(os.path.join(self.cache_dir, fn))
+            self.counters[:] = 0
@@ -1,14 +1,97 @@
 import numpy as np
+import os
 from PIL import Image
+import six
 
 
-def read_image_as_array(path, dtype=np.uint8, copy=True):
+def read_image_as_array(path, dtype=np.uint8, copy=True, output_shape=None,
+                        cache=None, crop=None, color=False):
+    """Read an image from a file.
+
+    Args:
+        path (string): Path to the image file. This can also be a binary
+            file object, such as one returned by a file source.
+        dtype: The type of the returned array.
+        copy (bool): If true, the returned array is editable.
+        output_shape (tuple): If this is not :obj:`None`, the image is
+            resized to this shape, which is a tuple of height and width.
+            For JPEG files, the image is decoded at the smallest of 1/1,
+            1/2, 1/4 and 1/8 scale that is still at least as large as
+            :obj:`output_shape` before it is resized. This is much cheaper
+            than decoding the image at full resolution.
+        cache (~chainercv.utils.DecodedImageCache): If this is not
+            :obj:`None`, the decoded image is looked up in and added to
+            this cache. The entries are keyed by the path, the
+            modification time and the size of the file together with
+            the other arguments. For a file object, its :obj:`name` is
+            used as the path.
+        crop (tuple): If this is not :obj:`None`, only this region of the
+            image is returned. This is a tuple of
+            :obj:`(x_min, y_min, x_max, y_max)` and it is clipped by the
+            boundary of the image. The region is cut out before the image
+            is converted to an array. When :obj:`output_shape` is also
+            given, the region is resized to :obj:`output_shape` and the
+            scale of JPEG decoding is chosen from the size of the region.
+        color (bool): If true, an image that is not RGB, such as a
+            grayscale image, is converted to RGB.
+
+    Returns:
+        ~numpy.ndarray: An image in HWC format.
+
+    """
+    if crop is not None:
+        crop = tuple(int(v) for v in crop)
+    if cache is not None:
+        key = _file_key(path) + (
+            np.dtype(dtype).str, output_shape, crop, color)
+        image = cache.get(key)
+        if image is None:
+            image = read_image_as_array(
+                path, dtype, copy=False, output_shape=output_shape,
+                crop=crop, color=color)
+            cache.put(key, image)
+        if copy:
+            image = np.array(image)
+        return image
+
     f = Image.open(path)
     try:
-        image = np.asarray(f, dtype=dtype)
+        in_W, in_H = f.size
+        if crop is None:
+            x_min, y_min, x_max, y_max = 0, 0, in_W, in_H
+        else:
+            x_min, y_min = max(crop[0], 0), max(crop[1], 0)
+            x_max, y_max = min(crop[2], in_W), min(crop[3], in_H)
+            x_max, y_max = max(x_max, x_min), max(y_max, y_min)
+
+        if output_shape is not None:
+            H, W = output_shape
+            # JPEG files are decoded with DCT scaling. This does nothing
+            # for the other formats.
+            f.draft(f.mode, (
+                int(np.ceil(float(in_W) * W / max(x_max - x_min, 1))),
+                int(np.ceil(float(in_H) * H / max(y_max - y_min, 1)))))
+
+        img = f
+        if crop is not None:
+            x_scale = float(f.size[0]) / in_W
+            y_scale = float(f.size[1]) / in_H
+            img = img.crop((
+                int(round(x_min * x_scale)), int(round(y_min * y_scale)),
+                int(round(x_max * x_scale)), int(round(y_max * y_scale))))
+        # A grayscale image is converted after it is resized, which gives
+        # the same result on fewer pixels.
+        if color and img.mode not in ('RGB', 'L'):
+            img = img.convert('RGB')
+        if output_shape is not None:
+            img = img.resize((W, H), Image.BILINEAR)
+        if color and img.mode == 'L':
+            img = img.convert('RGB')
+        image = np.asarray(img, dtype=dtype)
     finally:
-        # Only pillow >= 3.0 has 'close' method
-        if hasattr(f, 'close'):
+        # Only pillow >= 3.0 has 'close' method. A file object given by
+        # the caller is left open, since closing the image closes it.
+        if hasattr(f, 'close') and isinstance(path, six.string_types):
             f.close()
     if copy:
         # you need this to make the array editable
@@ -16,6 +99,80 @@ def read_image_as_array(path, dtype=np.uint8, copy=True):
     return image
 
 
+def _file_key(path):
+    if isinstance(path, six.string_types):
+        st = os.stat(path)
+        return os.path.abspath(path), st.st_mtime, st.st_size
+    if hasattr(path, 'mtime'):
+        # a member of an archive
+        return path.name, path.mtime, path.size
+    st = os.fstat(path.fileno())
+    return os.path.abspath(path.name), st.st_mtime, st.st_size
+
+
+def read_image_shape(path):
+    """Read the shape of an image without decoding it.
+
+    Args:
+        path (string): Path to the image file. This can also be a binary
+            file object.
+
+    Returns:
+        tuple of the height and the width of the image.
+
+    """
+    f = Image.open(path)
+    try:
+        W, H = f.size
+    finally:
+        if hasattr(f, 'close') and isinstance(path, six.string_types):
+            f.close()
+    return H, W
+
+
+def hwc_to_chw(img, out=None, reverse_color_channel=True, mean=None,
+               dtype=np.float32):
+    """Convert an HWC image into a CHW array in one pass.
+
+    The channel reorder, the transpose, the type conversion and the mean
+    subtraction are all done while the pixels are written to :obj:`out`.
+    A grayscale image is broadcasted to three channels.
+
+    Args:
+        img (~numpy.ndarray): An image in HWC format or a grayscale image
+            in HW format.
+        out (~numpy.ndarray): An array in CHW format to which the result
+            is written. If this is :obj:`None`, a new array is allocated.
+        reverse_color_channel (bool): If true, the order of the channels
+            is reversed, which converts RGB to BGR.
+        mean (~numpy.ndarray): If this is not :obj:`None`, this is
+            subtracted from the image. This should be broadcastable to
+            the shape of :obj:`out` and its channels follow the order of
+            the output.
+        dtype: The type of the allocated array when :obj:`out` is
+            :obj:`None`.
+
+    Returns:
+        ~numpy.ndarray: An image in CHW format.
+
+    """
+    if img.ndim == 2:
+        src = img[None]
+        n_channel = 3
+    else:
+        src = img.transpose(2, 0, 1)
+        if reverse_color_channel:
+            src = src[::-1]
+        n_channel = src.shape[0]
+    if out is None:
+        out = np.empty((n_channel,) + img.shape[:2], dtype=dtype)
+    if mean is None:
+        out[...] = src
+    else:
+        np.subtract(src, mean, out=out, casting='unsafe')
+    return out
+
+
 def gray2rgb(img):
     assert img.ndim == 2
     img = Image.fromarray(img)
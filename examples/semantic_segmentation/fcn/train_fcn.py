@@ -1,4 +1,5 @@
 import argparse
+import functools
 import numpy as np
 import os.path as osp
 
@@ -9,6 +10,7 @@ from chainer.training import extensions
 from chainercv.datasets import VOCSemanticSegmentationDataset
 from chainercv.extensions import SemanticSegmentationVisReport
 from chainercv import transforms
+from chainercv.utils import pad_concat_examples
 
 from fcn32s import FCN32s
 
@@ -57,8 +59,6 @@ def main():
         vgg_subtract_bgr = np.array(
             [103.939, 116.779, 123.68], np.float32)[:, None, None]
         img -= vgg_subtract_bgr
-        img = transforms.pad(img, max_size=(512, 512), bg_value=0)
-        label = transforms.pad(label, max_size=(512, 512), bg_value=-1)
         return img, label
 
     train_data = VOCSemanticSegmentationDataset(mode='train')
@@ -84,14 +84,19 @@ def main():
     test_iter = chainer.iterators.SerialIterator(
         test_data, batch_size=1, repeat=False, shuffle=False)
 
-    updater = training.StandardUpdater(train_iter, optimizer, device=gpu)
+    # The examples are padded to the largest one in each batch while they
+    # are concatenated. The padded pixels of the labels are ignored.
+    converter = functools.partial(pad_concat_examples, fill_value=(0, -1))
+    updater = training.StandardUpdater(
+        train_iter, optimizer, converter=converter, device=gpu)
     trainer = training.Trainer(updater, (iteration, 'iteration'), out=out)
 
     val_interval = 3000, 'iteration'
     log_interval = 100, 'iteration'
 
     trainer.extend(
-        TestModeEvaluator(test_iter, model, device=gpu), trigger=val_interval)
+        TestModeEvaluator(test_iter, model, converter=converter, device=gpu),
+        trigger=val_interval)
 
     # reporter related
     trainer.extend(extensions.LogReport(trigger=log_interval))
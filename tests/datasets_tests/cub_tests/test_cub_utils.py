@@ -0,0 +1,163 @@
+import unittest
+
+import collections
+import numpy as np
+import os
+from PIL import Image
+import tempfile
+
+from chainer.dataset import download
+from chainer import testing
+from chainercv.datasets.cub.cub_utils import _load_metadata
+from chainercv.datasets import CUBLabelDataset
+from chainercv.utils import as_file_source
+from chainercv.utils import gray2rgb
+from chainercv.utils import read_image_as_array
+
+
+_n_part = 15
+
+
+def _write_file(root, name, lines, newline='\n'):
+    path = os.path.join(root, name)
+    if not os.path.exists(os.path.dirname(path)):
+        os.makedirs(os.path.dirname(path))
+    with open(path, 'w') as f:
+        f.write(''.join(line + newline for line in lines))
+
+
+def _write_metadata(root, n, bboxes=None):
+    fns = ['{0:03d}.Bird_{0}/Bird_{0}_{1:04d}.jpg'.format(i % 3 + 1, i)
+           for i in range(n)]
+    _write_file(root, 'images.txt', [
+        '{} {}'.format(i + 1, fn) for i, fn in enumerate(fns)])
+    _write_file(root, 'classes.txt', [
+        '{0} {0:03d}.Bird_{0}'.format(i + 1) for i in range(3)])
+    if bboxes is None:
+        bboxes = np.random.uniform(0, 100, size=(n, 4))
+    _write_file(root, 'bounding_boxes.txt', [
+        '{} {}'.format(i + 1, ' '.join(str(v) for v in bbox))
+        for i, bbox in enumerate(bboxes)], newline='\r\n')
+    _write_file(root, 'image_class_labels.txt', [
+        '{} {}'.format(i + 1, i % 3 + 1) for i in range(n)])
+    locs = []
+    for i in range(n):
+        for p in range(_n_part):
+            valid = np.random.randint(0, 2)
+            x, y = np.random.uniform(0, 100, size=2) * valid
+            locs.append('{} {} {} {} {}'.format(i + 1, p + 1, x, y, valid))
+    _write_file(root, 'parts/part_locs.txt', locs)
+    return fns
+
+
+def _load_metadata_per_line(root):
+    # The parser used before the metadata were read into arrays at once.
+    fns = [fn.strip().split()[1]
+           for fn in open(os.path.join(root, 'images.txt'))]
+    bboxes = [[int(float(elem)) for elem in bbox.split()[1:]]
+              for bbox in open(os.path.join(root, 'bounding_boxes.txt'))]
+    labels = [int(label.split()[1]) - 1 for label in
+              open(os.path.join(root, 'image_class_labels.txt'))]
+    keypoints_dict = collections.OrderedDict()
+    for loc in open(os.path.join(root, 'parts/part_locs.txt')):
+        values = loc.split()
+        id_ = int(values[0]) - 1
+        keypoints_dict.setdefault(id_, []).append(
+            [float(v) for v in values[2:]])
+    keypoints = [np.array(keypoints_dict[i], dtype=np.float32)
+                 for i in range(len(fns))]
+    return fns, bboxes, labels, keypoints
+
+
+class TestLoadMetadata(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        _write_metadata(self.root, 7)
+
+    def test_load_metadata(self):
+        metadata = _load_metadata(as_file_source(self.root))
+        fns, bboxes, labels, keypoints = _load_metadata_per_line(self.root)
+
+        self.assertEqual(list(metadata['fns']), fns)
+        self.assertEqual(metadata['bboxes'].dtype, np.int32)
+        np.testing.assert_equal(metadata['bboxes'], bboxes)
+        self.assertEqual(metadata['labels'].dtype, np.int32)
+        np.testing.assert_equal(metadata['labels'], labels)
+        self.assertEqual(metadata['keypoints'].shape, (7, _n_part, 3))
+        self.assertEqual(metadata['keypoints'].dtype, np.float32)
+        for i in range(7):
+            np.testing.assert_equal(metadata['keypoints'][i], keypoints[i])
+
+
+class TestReadImage(unittest.TestCase):
+
+    def setUp(self):
+        self.dataset_root = download.get_dataset_root()
+        download.set_dataset_root(tempfile.mkdtemp())
+        self.root = tempfile.mkdtemp()
+        # (x, y, width, height) of the birds in images of shape (32, 40).
+        # The second and the third boxes reach the border of the image.
+        self.bboxes = [(5, 3, 20, 17), (30, 20, 25, 30), (0, 0, 40, 32),
+                       (7.6, 2.2, 10.9, 11.5)]
+        fns = _write_metadata(self.root, 4, self.bboxes)
+        self.paths = [os.path.join(self.root, 'images', fn) for fn in fns]
+        for i, path in enumerate(self.paths):
+            if not os.path.exists(os.path.dirname(path)):
+                os.makedirs(os.path.dirname(path))
+            # The second image is grayscale.
+            shape = (32, 40) if i == 1 else (32, 40, 3)
+            img = np.random.randint(0, 256, size=shape).astype(np.uint8)
+            Image.fromarray(img).save(path)
+
+    def tearDown(self):
+        download.set_dataset_root(self.dataset_root)
+
+    def _read_image_full(self, i, crop_bbox):
+        # The image read by decoding the whole file, cropping the array
+        # and converting a grayscale image to RGB.
+        img = read_image_as_array(self.paths[i])
+        if crop_bbox:
+            x, y, w, h = [int(v) for v in self.bboxes[i]]
+            img = img[y:y + h, x:x + w]
+        if img.ndim == 2:
+            img = gray2rgb(img)
+        return img
+
+    def test_crop_bbox(self):
+        dataset = CUBLabelDataset(self.root)
+        for i in range(4):
+            img, _ = dataset.get_raw_data(i)
+            self.assertEqual(img.dtype, np.uint8)
+            np.testing.assert_equal(img, self._read_image_full(i, True))
+        np.testing.assert_equal(
+            dataset.get_image_shapes(),
+            [self._read_image_full(i, True).shape[:2] for i in range(4)])
+
+    def test_without_crop_bbox(self):
+        dataset = CUBLabelDataset(self.root, crop_bbox=False)
+        for i in range(4):
+            img, _ = dataset.get_raw_data(i)
+            np.testing.assert_equal(img, self._read_image_full(i, False))
+
+    def test_grayscale(self):
+        dataset = CUBLabelDataset(self.root)
+        img, _ = dataset.get_raw_data(1)
+        self.assertEqual(img.shape, (12, 10, 3))
+        np.testing.assert_equal(img[:, :, 0], img[:, :, 1])
+        np.testing.assert_equal(img[:, :, 0], img[:, :, 2])
+
+    def test_border(self):
+        dataset = CUBLabelDataset(self.root)
+        # The box of the second image is clipped to the image.
+        self.assertEqual(dataset.get_raw_data(1)[0].shape, (12, 10, 3))
+        self.assertEqual(dataset.get_raw_data(2)[0].shape, (32, 40, 3))
+
+    def test_resize_shape(self):
+        dataset = CUBLabelDataset(self.root, resize_shape=(16, 8))
+        for i in range(4):
+            img, _ = dataset.get_raw_data(i)
+            self.assertEqual(img.shape, (16, 8, 3))
+
+
+testing.run_module(__name__, __file__)
@@ -0,0 +1,134 @@
+import unittest
+
+import mock
+import numpy as np
+import os
+import tempfile
+
+from chainer import testing
+from chainercv.datasets.pascal_voc import voc_annotation_indexer
+from chainercv.datasets.pascal_voc.voc_annotation_indexer import \
+    index_voc_annotations
+
+
+_object_template = (
+    '<object><name>{}</name><truncated>{:d}</truncated>'
+    '<difficult>{:d}</difficult><bndbox><xmin>{}</xmin><ymin>{}</ymin>'
+    '<xmax>{}</xmax><ymax>{}</ymax></bndbox></object>')
+
+
+def _write_annotation(data_dir, id_, objects):
+    anno_dir = os.path.join(data_dir, 'Annotations')
+    if not os.path.exists(anno_dir):
+        os.makedirs(anno_dir)
+    with open(os.path.join(anno_dir, '{}.xml'.format(id_)), 'w') as f:
+        f.write('<annotation>{}</annotation>'.format(''.join(
+            _object_template.format(*obj) for obj in objects)))
+
+
+class TestIndexVOCAnnotations(unittest.TestCase):
+
+    def setUp(self):
+        self.data_dir = tempfile.mkdtemp()
+        self.manifest_file = os.path.join(tempfile.mkdtemp(), 'manifest.npz')
+        self.objects = {
+            'a': [('dog', False, False, 1, 2, 10, 20),
+                  ('Cat ', True, False, 5, 6, 7, 8)],
+            'b': [],
+            'c': [('person', False, True, 11, 12, 13, 14)],
+        }
+        for id_, objects in self.objects.items():
+            _write_annotation(self.data_dir, id_, objects)
+
+    def _check(self, columns, ids):
+        labels = voc_annotation_indexer.voc_utils.pascal_voc_labels
+        self.assertEqual(len(columns['offsets']), len(ids) + 1)
+        for i, id_ in enumerate(ids):
+            objects = self.objects[id_]
+            start, end = columns['offsets'][i:i + 2]
+            self.assertEqual(end - start, len(objects))
+            np.testing.assert_equal(
+                columns['bboxes'][start:end],
+                np.array([obj[3:] for obj in objects],
+                         dtype=np.float32).reshape(-1, 4) - 1)
+            np.testing.assert_equal(
+                columns['label_ids'][start:end],
+                [labels.index(obj[0].lower().strip()) for obj in objects])
+            np.testing.assert_equal(
+                columns['difficult'][start:end],
+                [obj[2] for obj in objects])
+            np.testing.assert_equal(
+                columns['truncated'][start:end],
+                [obj[1] for obj in objects])
+
+    def _index(self, ids, **kwargs):
+        parse = mock.Mock(wraps=voc_annotation_indexer._parse_annotation)
+        with mock.patch.object(
+                voc_annotation_indexer, '_parse_annotation', parse):
+            columns = index_voc_annotations(
+                self.data_dir, ids, self.manifest_file, **kwargs)
+        return columns, sorted(call[0][1] for call in parse.call_args_list)
+
+    def test_full_parse(self):
+        columns, parsed = self._index(['a', 'b', 'c'])
+        self._check(columns, ['a', 'b', 'c'])
+        self.assertEqual(len(parsed), 3)
+        self.assertTrue(os.path.exists(self.manifest_file))
+
+    def test_without_manifest(self):
+        columns = index_voc_annotations(self.data_dir, ['c', 'a'])
+        self._check(columns, ['c', 'a'])
+
+    def test_reuse_manifest(self):
+        self._index(['a', 'b', 'c'])
+        columns, parsed = self._index(['c', 'b', 'a'])
+        self._check(columns, ['c', 'b', 'a'])
+        self.assertEqual(parsed, [])
+
+    def test_merge_manifest(self):
+        self._index(['a', 'b'])
+        columns, parsed = self._index(['a', 'c'])
+        self._check(columns, ['a', 'c'])
+        self.assertEqual(parsed, ['Annotations/c.xml'])
+        # Both calls are kept in the manifest.
+        columns, parsed = self._index(['b', 'c', 'a'])
+        self._check(columns, ['b', 'c', 'a'])
+        self.assertEqual(parsed, [])
+
+    def test_touched_file(self):
+        self._index(['a', 'b', 'c'])
+        self.objects['b'] = [('bus', True, True, 3, 4, 5, 6)]
+        _write_annotation(self.data_dir, 'b', self.objects['b'])
+        path = os.path.join(self.data_dir, 'Annotations', 'b.xml')
+        os.utime(path, (0, 0))
+        columns, parsed = self._index(['a', 'b', 'c'])
+        self._check(columns, ['a', 'b', 'c'])
+        self.assertEqual(parsed, ['Annotations/b.xml'])
+
+    def test_removed_ids(self):
+        self._index(['a', 'b', 'c'])
+        os.remove(os.path.join(self.data_dir, 'Annotations', 'b.xml'))
+        columns, parsed = self._index(['c', 'a'])
+        self._check(columns, ['c', 'a'])
+        self.assertEqual(parsed, [])
+        with self.assertRaises(OSError):
+            self._index(['a', 'b'])
+
+    def test_parallel(self):
+        with mock.patch.object(
+                voc_annotation_indexer, '_min_parallel_files', 0):
+            columns = index_voc_annotations(
+                self.data_dir, ['a', 'b', 'c'], self.manifest_file,
+                n_processes=2)
+        self._check(columns, ['a', 'b', 'c'])
+        columns, parsed = self._index(['a', 'b', 'c'])
+        self.assertEqual(parsed, [])
+
+    def test_serial_below_threshold(self):
+        with mock.patch('multiprocessing.Pool') as pool:
+            columns, _ = self._index(['a', 'b', 'c'], n_processes=4)
+        self.assertFalse(pool.called)
+        self._check(columns, ['a', 'b', 'c'])
+
+
+testing.run_module(__name__, __file__)
@@ -0,0 +1,137 @@
+import collections
+import mock
+import unittest
+
+import numpy as np
+import os
+from PIL import Image
+import tempfile
+
+from chainer.dataset import download
+from chainer import testing
+from chainercv.datasets import VOCDetectionDataset
+from chainercv.utils import DirectorySource
+
+
+# Objects of each image: (name, difficult, x_min, y_min, x_max, y_max).
+_objects = [
+    [('dog', False, 1, 2, 10, 12), ('cat', True, 3, 3, 8, 9)],
+    [],
+    [('person', True, 2, 1, 5, 6)],
+    [('bus', False, 1, 1, 16, 12), ('car', False, 4, 5, 6, 7),
+     ('car', True, 9, 2, 14, 11)],
+    [],
+]
+
+
+def _write_voc(data_dir, objects):
+    for sub_dir in ('Annotations', 'JPEGImages', 'ImageSets/Main'):
+        os.makedirs(os.path.join(data_dir, sub_dir))
+    ids = ['2008_{:06d}'.format(i) for i in range(len(objects))]
+    for i, id_ in enumerate(ids):
+        img = np.random.randint(
+            0, 256, size=(12 + i, 16, 3)).astype(np.uint8)
+        Image.fromarray(img).save(
+            os.path.join(data_dir, 'JPEGImages', '{}.jpg'.format(id_)))
+        anno = ''.join(
+            '<object><name>{}</name><truncated>0</truncated>'
+            '<difficult>{:d}</difficult><bndbox><xmin>{}</xmin>'
+            '<ymin>{}</ymin><xmax>{}</xmax><ymax>{}</ymax></bndbox>'
+            '</object>'.format(*obj) for obj in objects[i])
+        with open(os.path.join(
+                data_dir, 'Annotations', '{}.xml'.format(id_)), 'w') as f:
+            f.write('<annotation>{}</annotation>'.format(anno))
+    with open(os.path.join(data_dir, 'ImageSets/Main/train.txt'), 'w') as f:
+        f.write(''.join('{}\n'.format(id_) for id_ in ids))
+
+
+def _expected_bboxes(objects, use_difficult):
+    labels = VOCDetectionDataset.labels
+    return np.array(
+        [[x_min - 1, y_min - 1, x_max - 1, y_max - 1, labels.index(name)]
+         for name, difficult, x_min, y_min, x_max, y_max in objects
+         if use_difficult or not difficult],
+        dtype=np.float32).reshape(-1, 5)
+
+
+@testing.parameterize(*testing.product({
+    'use_difficult': [True, False],
+    'use_cache': [True, False],
+}))
+class TestVOCDetectionDataset(unittest.TestCase):
+
+    def setUp(self):
+        self.dataset_root = download.get_dataset_root()
+        download.set_dataset_root(tempfile.mkdtemp())
+        self.data_dir = tempfile.mkdtemp()
+        _write_voc(self.data_dir, _objects)
+        self.dataset = VOCDetectionDataset(
+            self.data_dir, use_difficult=self.use_difficult,
+            use_cache=self.use_cache)
+
+    def tearDown(self):
+        download.set_dataset_root(self.dataset_root)
+
+    def test_bbox_offsets(self):
+        self.assertEqual(len(self.dataset), len(_objects))
+        offsets = self.dataset.bbox_offsets
+        self.assertEqual(len(offsets), len(_objects) + 1)
+        self.assertEqual(offsets[-1], len(self.dataset.bboxes))
+        for i, objects in enumerate(_objects):
+            expected = _expected_bboxes(objects, self.use_difficult)
+            np.testing.assert_equal(
+                self.dataset.bboxes[offsets[i]:offsets[i + 1]], expected)
+            _, bboxes = self.dataset.get_example(i)
+            np.testing.assert_equal(bboxes, expected)
+
+    def test_no_objects(self):
+        for i in (1, 4):
+            img, bboxes = self.dataset.get_example(i)
+            self.assertEqual(img.shape, (3, 12 + i, 16))
+            self.assertEqual(bboxes.shape, (0, 5))
+            self.assertEqual(bboxes.dtype, np.float32)
+
+    def test_difficult(self):
+        difficult = [obj[1] for objects in _objects for obj in objects]
+        if self.use_difficult:
+            np.testing.assert_equal(self.dataset.difficult, difficult)
+        else:
+            self.assertEqual(
+                len(self.dataset.difficult), difficult.count(False))
+            self.assertFalse(np.any(self.dataset.difficult))
+        self.assertEqual(
+            len(self.dataset.truncated), len(self.dataset.difficult))
+
+    def test_bboxes_are_copies(self):
+        self.assertFalse(self.dataset.bboxes.flags.writeable)
+        _, bboxes = self.dataset.get_raw_data(0)
+        self.assertFalse(np.may_share_memory(bboxes, self.dataset.bboxes))
+        expected = bboxes.copy()
+        bboxes[:] = -1
+        np.testing.assert_equal(self.dataset.get_raw_data(0)[1], expected)
+
+
+class TestVOCDetectionDatasetStat(unittest.TestCase):
+
+    def setUp(self):
+        self.dataset_root = download.get_dataset_root()
+        download.set_dataset_root(tempfile.mkdtemp())
+        self.data_dir = tempfile.mkdtemp()
+        _write_voc(self.data_dir, _objects)
+
+    def tearDown(self):
+        download.set_dataset_root(self.dataset_root)
+
+    def test_stat_once(self):
+        with mock.patch.object(
+                DirectorySource, 'stat', autospec=True,
+                side_effect=DirectorySource.stat) as stat:
+            VOCDetectionDataset(self.data_dir, use_cache=True)
+        counts = collections.Counter(
+            call[0][1] for call in stat.call_args_list)
+        for i in range(len(_objects)):
+            self.assertEqual(
+                counts['Annotations/2008_{:06d}.xml'.format(i)], 1)
+
+
+testing.run_module(__name__, __file__)
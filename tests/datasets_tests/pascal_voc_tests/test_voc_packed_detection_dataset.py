@@ -0,0 +1,98 @@
+import unittest
+
+import numpy as np
+import os
+from PIL import Image
+import pickle
+import tempfile
+
+from chainer.dataset import download
+from chainer import testing
+from chainercv.datasets import pack_voc_detection
+from chainercv.datasets import VOCDetectionDataset
+from chainercv.datasets import VOCPackedDetectionDataset
+
+
+# Objects of each image: (name, difficult, x_min, y_min, x_max, y_max).
+_objects = [
+    [('dog', False, 1, 2, 10, 12), ('cat', True, 3, 3, 8, 9)],
+    [],
+    [('person', True, 2, 1, 5, 6)],
+    [('bus', False, 1, 1, 16, 12), ('car', False, 4, 5, 6, 7)],
+]
+
+
+def _write_voc(data_dir, objects):
+    for sub_dir in ('Annotations', 'JPEGImages', 'ImageSets/Main'):
+        os.makedirs(os.path.join(data_dir, sub_dir))
+    ids = ['2008_{:06d}'.format(i) for i in range(len(objects))]
+    for i, id_ in enumerate(ids):
+        img = np.random.randint(
+            0, 256, size=(12 + i, 16 - i, 3)).astype(np.uint8)
+        Image.fromarray(img).save(
+            os.path.join(data_dir, 'JPEGImages', '{}.jpg'.format(id_)))
+        anno = ''.join(
+            '<object><name>{}</name><truncated>0</truncated>'
+            '<difficult>{:d}</difficult><bndbox><xmin>{}</xmin>'
+            '<ymin>{}</ymin><xmax>{}</xmax><ymax>{}</ymax></bndbox>'
+            '</object>'.format(*obj) for obj in objects[i])
+        with open(os.path.join(
+                data_dir, 'Annotations', '{}.xml'.format(id_)), 'w') as f:
+            f.write('<annotation>{}</annotation>'.format(anno))
+    with open(os.path.join(data_dir, 'ImageSets/Main/train.txt'), 'w') as f:
+        f.write(''.join('{}\n'.format(id_) for id_ in ids))
+
+
+@testing.parameterize(
+    {'use_difficult': True},
+    {'use_difficult': False},
+)
+class TestVOCPackedDetectionDataset(unittest.TestCase):
+
+    def setUp(self):
+        self.dataset_root = download.get_dataset_root()
+        download.set_dataset_root(tempfile.mkdtemp())
+        data_dir = tempfile.mkdtemp()
+        _write_voc(data_dir, _objects)
+        self.dataset = VOCDetectionDataset(
+            data_dir, use_difficult=self.use_difficult)
+        self.packed_dir = os.path.join(tempfile.mkdtemp(), 'packed')
+        pack_voc_detection(self.dataset, self.packed_dir)
+
+    def tearDown(self):
+        download.set_dataset_root(self.dataset_root)
+
+    def _check(self, packed):
+        self.assertEqual(len(packed), len(self.dataset))
+        for i in range(len(self.dataset)):
+            img, bboxes = packed.get_example(i)
+            expected_img, expected_bboxes = self.dataset.get_example(i)
+            np.testing.assert_equal(img, expected_img)
+            np.testing.assert_equal(bboxes, expected_bboxes)
+            self.assertEqual(bboxes.shape, expected_bboxes.shape)
+            self.assertEqual(bboxes.dtype, np.float32)
+
+            img, bboxes = packed.get_raw_data(i, rgb=False)
+            np.testing.assert_equal(
+                img, self.dataset.get_raw_data(i, rgb=False)[0])
+            self.assertFalse(img.flags.writeable)
+            self.assertFalse(bboxes.flags.writeable)
+
+    def test_round_trip(self):
+        self._check(VOCPackedDetectionDataset(self.packed_dir))
+
+    def test_no_objects(self):
+        packed = VOCPackedDetectionDataset(self.packed_dir)
+        self.assertEqual(packed.get_example(1)[1].shape, (0, 5))
+
+    def test_pickle(self):
+        packed = VOCPackedDetectionDataset(self.packed_dir)
+        packed.get_example(0)
+        self._check(pickle.loads(pickle.dumps(packed)))
+
+    def test_no_temporary_files(self):
+        self.assertEqual(
+            sorted(os.listdir(self.packed_dir)), ['images.dat', 'index.npz'])
+
+
+testing.run_module(__name__, __file__)
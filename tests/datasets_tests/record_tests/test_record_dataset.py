@@ -0,0 +1,135 @@
+import unittest
+
+import numpy as np
+import tempfile
+
+import chainer
+from chainer import testing
+
+from chainercv.datasets import export_records
+from chainercv.datasets import RecordDataset
+
+
+class RawDataset(chainer.dataset.DatasetMixin):
+
+    def __init__(self, imgs, labels):
+        self.imgs = imgs
+        self.labels = labels
+
+    def __len__(self):
+        return len(self.imgs)
+
+    def get_raw_data(self, i):
+        return self.imgs[i], self.labels[i], {'id': i}
+
+
+@testing.parameterize(*testing.product({
+    'img_format': ['raw', 'png', 'jpeg'],
+    'examples_per_shard': [1, 3, 10],
+}))
+class TestRecordDataset(unittest.TestCase):
+
+    def setUp(self):
+        self.imgs = [
+            np.random.randint(0, 256, size=(8, 10, 3)).astype(np.uint8),
+            np.random.randint(0, 256, size=(6, 4, 3)).astype(np.uint8),
+            np.random.randint(0, 256, size=(5, 7)).astype(np.uint8),
+            np.random.randint(0, 256, size=(8, 10, 3)).astype(np.uint8),
+        ]
+        self.labels = [np.random.uniform(size=(i, 5)).astype(np.float32)
+                       for i in range(4)]
+        self.record_dir = tempfile.mkdtemp()
+        export_records(
+            RawDataset(self.imgs, self.labels), self.record_dir,
+            examples_per_shard=self.examples_per_shard,
+            img_format=self.img_format)
+
+    def _check(self, i, in_data):
+        img, label, meta = in_data
+        self.assertEqual(img.shape, self.imgs[i].shape)
+        if self.img_format != 'jpeg':
+            np.testing.assert_equal(img, self.imgs[i])
+        np.testing.assert_equal(label, self.labels[i])
+        self.assertEqual(meta, {'id': i})
+
+    def test_get_raw_data(self):
+        dataset = RecordDataset(self.record_dir)
+        self.assertEqual(len(dataset), 4)
+        for i in range(4):
+            self._check(i, dataset.get_raw_data(i))
+
+    def test_get_example(self):
+        dataset = RecordDataset(self.record_dir)
+        img, label, _ = dataset.get_example(0)
+        self.assertEqual(img.shape, (3, 8, 10))
+        self.assertEqual(img.dtype, np.float32)
+        if self.img_format != 'jpeg':
+            np.testing.assert_equal(img, self.imgs[0].transpose(2, 0, 1)[::-1])
+
+    def test_stream(self):
+        dataset = RecordDataset(self.record_dir)
+        indices = []
+        for in_data in dataset.stream(shuffle=True):
+            indices.append(in_data[0])
+            self._check(in_data[0], in_data[1:])
+        self.assertEqual(sorted(indices), list(range(4)))
+
+
+class AnnotationDataset(chainer.dataset.DatasetMixin):
+
+    def __init__(self, annos):
+        self.annos = annos
+
+    def __len__(self):
+        return len(self.annos)
+
+    def get_raw_data(self, i):
+        return (np.zeros((2, 3, 3), dtype=np.uint8),) + self.annos[i]
+
+
+class TestRecordDatasetAnnotations(unittest.TestCase):
+
+    def setUp(self):
+        self.annos = [
+            (np.arange(6, dtype=np.int32).reshape(2, 3), u'dog', b'\x00\xff'),
+            ({'difficult': np.array([True, False]), 'ids': [1, 2]}, None,
+             (1.5, -2)),
+            ((), [], 'x' * 1000),
+        ]
+        self.record_dir = tempfile.mkdtemp()
+        export_records(
+            AnnotationDataset(self.annos), self.record_dir,
+            examples_per_shard=2)
+
+    def _check(self, i, anno):
+        self.assertEqual(len(anno), len(self.annos[i]))
+        for value, expected in zip(anno, self.annos[i]):
+            if isinstance(expected, np.ndarray):
+                np.testing.assert_equal(value, expected)
+            elif isinstance(expected, dict):
+                np.testing.assert_equal(value['difficult'],
+                                        expected['difficult'])
+                self.assertEqual(value['ids'], expected['ids'])
+            else:
+                self.assertEqual(value, expected)
+
+    def test_get_raw_data(self):
+        dataset = RecordDataset(self.record_dir)
+        for i in range(len(self.annos)):
+            self._check(i, dataset.get_raw_data(i)[1:])
+
+    def test_stream(self):
+        dataset = RecordDataset(self.record_dir)
+        for in_data in dataset.stream():
+            self._check(in_data[0], in_data[2:])
+
+
+class TestExportRecordsInvalidFormat(unittest.TestCase):
+
+    def test_invalid_format(self):
+        with self.assertRaises(ValueError):
+            export_records(
+                RawDataset([], []), tempfile.mkdtemp(), img_format='bmp')
+
+
+testing.run_module(__name__, __file__)
@@ -0,0 +1,123 @@
+import unittest
+
+import numpy as np
+
+from chainer import serializers
+from chainer import testing
+
+from chainercv.iterators import BucketIterator
+
+
+class ShapeDataset(object):
+
+    def __init__(self, shapes):
+        self.shapes = np.array(shapes)
+
+    def __len__(self):
+        return len(self.shapes)
+
+    def __getitem__(self, i):
+        return i
+
+    def get_image_shapes(self):
+        return self.shapes
+
+
+@testing.parameterize(*testing.product({
+    'batch_size': [3, 4],
+    'shuffle': [True, False],
+}))
+class TestBucketIterator(unittest.TestCase):
+
+    def setUp(self):
+        # Four sizes with eight examples each, in a mixed order.
+        sizes = [(375, 500), (500, 375), (333, 500), (500, 333)]
+        self.shapes = np.array([sizes[i % 4] for i in range(32)])
+        self.dataset = ShapeDataset(self.shapes)
+
+    def _is_bucket(self, batch):
+        return len(set(tuple(self.shapes[i]) for i in batch)) == 1
+
+    def test_one_epoch(self):
+        it = BucketIterator(
+            self.dataset, self.batch_size, repeat=False,
+            shuffle=self.shuffle, n_threads=2)
+        batches = list(it)
+        it.finalize()
+
+        self.assertEqual(
+            sorted(i for batch in batches for i in batch), list(range(32)))
+        # With pools larger than the dataset, at most one batch per size
+        # mixes sizes.
+        n_mixed = sum(not self._is_bucket(batch) for batch in batches)
+        self.assertLessEqual(n_mixed, 3)
+        if not self.shuffle:
+            indices = [i for batch in batches for i in batch]
+            np.testing.assert_equal(
+                indices, np.lexsort((self.shapes[:, 1], self.shapes[:, 0])))
+
+    def test_repeat(self):
+        it = BucketIterator(
+            self.dataset, self.batch_size, shuffle=self.shuffle,
+            n_threads=2)
+        epochs = {}
+        for _ in range(40):
+            epoch = it.epoch
+            batch = it.next()
+            if not it.is_new_epoch:
+                epochs.setdefault(epoch, []).append(batch)
+        it.finalize()
+
+        for batches in epochs.values():
+            # The batches within an epoch are as homogeneous as in the
+            # first epoch.
+            n_mixed = sum(not self._is_bucket(batch) for batch in batches)
+            self.assertLessEqual(n_mixed, 3)
+
+    def test_repeat_order(self):
+        if self.shuffle:
+            self.skipTest('the order is shuffled in every epoch')
+        it = BucketIterator(
+            self.dataset, self.batch_size, shuffle=False, n_threads=2)
+        indices = [i for _ in range(40) for i in it.next()]
+        it.finalize()
+
+        order = np.lexsort((self.shapes[:, 1], self.shapes[:, 0]))
+        np.testing.assert_equal(
+            indices, np.tile(order, len(indices) // 32 + 1)[:len(indices)])
+
+    def test_serialize(self):
+        it = BucketIterator(
+            self.dataset, self.batch_size, shuffle=self.shuffle,
+            n_threads=2)
+        for _ in range(5):
+            it.next()
+        target = {}
+        it.serialize(serializers.DictionarySerializer(target))
+        expected = [it.next() for _ in range(3)]
+        it.finalize()
+
+        it = BucketIterator(
+            self.dataset, self.batch_size, shuffle=self.shuffle,
+            n_threads=2)
+        it.serialize(serializers.NpzDeserializer(target))
+        self.assertEqual([it.next() for _ in range(3)], expected)
+        it.finalize()
+
+
+class TestBucketIteratorShapes(unittest.TestCase):
+
+    def test_shapes(self):
+        dataset = list(range(6))
+        shapes = [(10, 10), (20, 20), (10, 10), (20, 20), (10, 10), (20, 20)]
+        it = BucketIterator(
+            dataset, 3, shapes=shapes, repeat=False, shuffle=False)
+        self.assertEqual(list(it), [[0, 2, 4], [1, 3, 5]])
+        it.finalize()
+
+    def test_invalid_shapes(self):
+        with self.assertRaises(ValueError):
+            BucketIterator(list(range(6)), 3, shapes=[(10, 10)])
+
+
+testing.run_module(__name__, __file__)
@@ -0,0 +1,126 @@
+import unittest
+
+import numpy as np
+
+from chainer import iterators
+from chainer import serializers
+from chainer import testing
+
+from chainercv.iterators import PrefetchIterator
+
+
+@testing.parameterize(*testing.product({
+    'batch_size': [1, 3, 4],
+    'repeat': [True, False],
+    'shuffle': [True, False],
+    'n_prefetch': [1, 3],
+}))
+class TestPrefetchIterator(unittest.TestCase):
+
+    def setUp(self):
+        self.dataset = list(range(10))
+
+    def _iterate(self, it, n_iteration):
+        outs = []
+        for _ in range(n_iteration):
+            try:
+                batch = it.next()
+            except StopIteration:
+                break
+            outs.append((batch, it.epoch, it.current_position,
+                         it.is_new_epoch, it.epoch_detail,
+                         it.previous_epoch_detail))
+        return outs
+
+    def test_same_as_serial_iterator(self):
+        np.random.seed(0)
+        it = iterators.SerialIterator(
+            self.dataset, self.batch_size, self.repeat, self.shuffle)
+        expected = self._iterate(it, 20)
+
+        np.random.seed(0)
+        it = PrefetchIterator(
+            self.dataset, self.batch_size, self.repeat, self.shuffle,
+            n_threads=2, n_prefetch=self.n_prefetch)
+        outs = self._iterate(it, 20)
+        it.finalize()
+
+        self.assertEqual(len(outs), len(expected))
+        for out, expected_out in zip(outs, expected):
+            self.assertEqual(out, expected_out)
+
+    def test_deterministic(self):
+        outs = []
+        for _ in range(2):
+            np.random.seed(0)
+            it = PrefetchIterator(
+                self.dataset, self.batch_size, self.repeat, self.shuffle,
+                n_threads=2, n_prefetch=self.n_prefetch)
+            out = []
+            for _ in range(20):
+                try:
+                    out.append(it.next())
+                except StopIteration:
+                    break
+                # Other users of numpy.random, such as random transforms.
+                np.random.uniform()
+            it.finalize()
+            outs.append(out)
+        self.assertEqual(outs[0], outs[1])
+
+    def test_serialize(self):
+        it = PrefetchIterator(
+            self.dataset, self.batch_size, self.repeat, self.shuffle,
+            n_threads=2, n_prefetch=self.n_prefetch)
+        self._iterate(it, 2)
+
+        target = {}
+        it.serialize(serializers.DictionarySerializer(target))
+        expected = self._iterate(it, 8)
+        it.finalize()
+
+        it = PrefetchIterator(
+            self.dataset, self.batch_size, self.repeat, self.shuffle,
+            n_threads=2, n_prefetch=self.n_prefetch)
+        it.serialize(serializers.NpzDeserializer(target))
+        outs = self._iterate(it, 8)
+        it.finalize()
+
+        self.assertEqual(len(outs), len(expected))
+        in_first_epoch = True
+        for out, expected_out in zip(outs, expected):
+            if out[3]:
+                in_first_epoch = False
+            # The examples of the later epochs are shuffled again.
+            if in_first_epoch or not self.shuffle:
+                self.assertEqual(out[0], expected_out[0])
+            self.assertEqual(out[1:], expected_out[1:])
+
+
+class TestPrefetchIteratorFetch(unittest.TestCase):
+
+    def test_fetch(self):
+        it = PrefetchIterator(
+            list(range(5)), 5, shuffle=False, fetch=lambda i: i * 2)
+        self.assertEqual(it.next(), [0, 2, 4, 6, 8])
+        it.finalize()
+
+    def test_error(self):
+        def fetch(i):
+            raise ValueError
+
+        it = PrefetchIterator(list(range(5)), 2, fetch=fetch)
+        with self.assertRaises(ValueError):
+            it.next()
+        it.finalize()
+
+    def test_finalize_and_resume(self):
+        it = PrefetchIterator(list(range(5)), 2, shuffle=False)
+        self.assertEqual(it.next(), [0, 1])
+        it.finalize()
+        self.assertEqual(it.next(), [2, 3])
+        self.assertEqual(it.next(), [4, 0])
+        it.finalize()
+
+
+testing.run_module(__name__, __file__)
@@ -0,0 +1,35 @@
+import unittest
+
+import numpy as np
+
+from chainer import testing
+from chainercv.transforms import affine_bbox
+from chainercv.transforms import affine_matrix
+from chainercv.transforms import flip_bbox
+from chainercv.transforms import resize_bbox
+
+
+class TestAffineBboxTransform(unittest.TestCase):
+
+    def setUp(self):
+        self.bboxes = np.random.uniform(
+            low=0., high=32., size=(10, 5))
+        self.bboxes[:, 2:4] += self.bboxes[:, :2]
+
+    def test_affine_bbox_resize_flip(self):
+        matrix = affine_matrix((64, 128), (2., 4.), 0, 0, True, True)
+        out = affine_bbox(self.bboxes, matrix)
+        expected = flip_bbox(
+            resize_bbox(self.bboxes, (32, 32), (64, 128)), (64, 128),
+            h_flip=True, v_flip=True)
+        np.testing.assert_allclose(out, expected)
+
+    def test_affine_bbox_clip(self):
+        matrix = affine_matrix((16, 16), 1., 8, 8)
+        out = affine_bbox(self.bboxes, matrix, (16, 16))
+        expected = self.bboxes.copy()
+        expected[:, :4] = np.clip(expected[:, :4] - 8, 0, 15)
+        np.testing.assert_allclose(out, expected)
+
+
+testing.run_module(__name__, __file__)
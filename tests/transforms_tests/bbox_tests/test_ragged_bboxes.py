@@ -0,0 +1,129 @@
+import unittest
+
+import numpy as np
+
+from chainer import testing
+from chainercv.transforms import affine_bbox
+from chainercv.transforms import affine_matrix
+from chainercv.transforms import flip_bbox
+from chainercv.transforms import RaggedBboxes
+from chainercv.transforms import resize_bbox
+
+
+def _random_bboxes(n, H, W):
+    y = np.sort(np.random.uniform(0, H - 1, size=(n, 2)), axis=1)
+    x = np.sort(np.random.uniform(0, W - 1, size=(n, 2)), axis=1)
+    label = np.random.randint(0, 20, size=n)
+    return np.stack(
+        (x[:, 0], y[:, 0], x[:, 1], y[:, 1], label), axis=1).astype(
+            np.float32)
+
+
+class TestRaggedBboxes(unittest.TestCase):
+
+    def setUp(self):
+        self.shapes = np.array([(32, 48), (20, 16), (40, 40), (24, 30)])
+        self.lengths = [3, 0, 5, 1]
+        self.bbox_list = [
+            _random_bboxes(n, H, W)
+            for n, (H, W) in zip(self.lengths, self.shapes)]
+        self.bboxes = RaggedBboxes.from_list(self.bbox_list)
+
+    def _check(self, bboxes, expected):
+        self.assertIsInstance(bboxes, RaggedBboxes)
+        self.assertEqual(len(bboxes), len(expected))
+        for bbox, bbox_expected in zip(bboxes.to_list(), expected):
+            np.testing.assert_allclose(bbox, bbox_expected, rtol=1e-6)
+
+    def test_from_list(self):
+        self.assertEqual(len(self.bboxes), 4)
+        self.assertEqual(self.bboxes.data.shape, (9, 5))
+        np.testing.assert_equal(self.bboxes.offsets, [0, 3, 3, 8, 9])
+        np.testing.assert_equal(
+            self.bboxes.image_indices, [0, 0, 0, 2, 2, 2, 2, 2, 3])
+        for i in range(4):
+            np.testing.assert_equal(self.bboxes[i], self.bbox_list[i])
+
+    def test_invalid_offsets(self):
+        with self.assertRaises(ValueError):
+            RaggedBboxes(np.zeros((3, 5)), [0, 2])
+
+    def test_take(self):
+        indices = [3, 0, 0, 1]
+        self._check(self.bboxes.take(indices),
+                    [self.bbox_list[i] for i in indices])
+
+    def test_flip(self):
+        h_flip = np.array([True, False, True, False])
+        v_flip = np.array([True, True, False, False])
+        out = self.bboxes.flip(self.shapes, h_flip, v_flip)
+        expected = [
+            flip_bbox(bbox, shape, h, v) for bbox, shape, h, v
+            in zip(self.bbox_list, self.shapes, h_flip, v_flip)]
+        self._check(out, expected)
+        # The bounding boxes are not modified.
+        self._check(self.bboxes, self.bbox_list)
+
+    def test_resize(self):
+        output_shapes = np.array([(64, 64), (10, 10), (40, 20), (48, 15)])
+        out = self.bboxes.resize(self.shapes, output_shapes)
+        expected = [
+            resize_bbox(bbox, in_shape, out_shape)
+            for bbox, in_shape, out_shape
+            in zip(self.bbox_list, self.shapes, output_shapes)]
+        self._check(out, expected)
+
+        out = self.bboxes.resize((32, 32), (64, 16))
+        expected = [resize_bbox(bbox, (32, 32), (64, 16))
+                    for bbox in self.bbox_list]
+        self._check(out, expected)
+
+    def test_translate(self):
+        y_offset = np.array([1, 2, 3, 4])
+        out = self.bboxes.translate(y_offset, 5)
+        expected = []
+        for bbox, y in zip(self.bbox_list, y_offset):
+            bbox = bbox.copy()
+            bbox[:, [1, 3]] += y
+            bbox[:, [0, 2]] += 5
+            expected.append(bbox)
+        self._check(out, expected)
+
+    def test_crop(self):
+        y_offset = np.array([4, 0, 10, 2])
+        x_offset = np.array([8, 2, 0, 6])
+        out = self.bboxes.crop(y_offset, x_offset, (16, 16))
+        expected = []
+        for bbox, y, x in zip(self.bbox_list, y_offset, x_offset):
+            bbox = bbox.copy()
+            bbox[:, [1, 3]] = np.clip(bbox[:, [1, 3]] - y, 0, 15)
+            bbox[:, [0, 2]] = np.clip(bbox[:, [0, 2]] - x, 0, 15)
+            expected.append(bbox)
+        self._check(out, expected)
+
+    def test_affine(self):
+        matrices = np.stack([
+            affine_matrix((16, 16), scale, 2, 4, h_flip)
+            for scale, h_flip in [(1., True), (2., False), (0.5, False),
+                                  (1.5, True)]])
+        out = self.bboxes.affine(matrices, (16, 16))
+        expected = [
+            affine_bbox(bbox, matrix, (16, 16))
+            for bbox, matrix in zip(self.bbox_list, matrices)]
+        self._check(out, expected)
+
+    def test_filter_area(self):
+        bboxes = RaggedBboxes.from_list([
+            np.array([[0, 0, 4, 4, 1], [3, 3, 3, 8, 2]], dtype=np.float32),
+            np.zeros((0, 5), dtype=np.float32),
+            np.array([[0, 0, 2, 2, 3], [1, 1, 5, 5, 4]], dtype=np.float32)])
+        out = bboxes.filter_area()
+        np.testing.assert_equal(out.offsets, [0, 1, 1, 3])
+        np.testing.assert_equal(out.data[:, 4], [1, 3, 4])
+
+        out = bboxes.filter_area(np.array([10, 0, 4]))
+        np.testing.assert_equal(out.offsets, [0, 1, 1, 2])
+        np.testing.assert_equal(out.data[:, 4], [1, 4])
+
+
+testing.run_module(__name__, __file__)
@@ -0,0 +1,101 @@
+import unittest
+
+import mock
+import numpy as np
+
+from chainer import testing
+from chainercv.transforms import affine
+from chainercv.transforms import affine_matrix
+from chainercv.transforms.image import affine_transform
+
+
+@testing.parameterize(*testing.product({
+    'available': [True, False],
+    'interpolation': ['nearest', 'linear', 'cubic'],
+    'h_flip': [True, False],
+    'v_flip': [True, False],
+}))
+class TestAffineTransform(unittest.TestCase):
+
+    def setUp(self):
+        self.x = np.random.uniform(
+            0, 255, size=(3, 24, 32)).astype(np.float32)
+
+    def _affine(self, *args, **kwargs):
+        with mock.patch.object(
+                affine_transform, '_available', self.available):
+            return affine(*args, **kwargs)
+
+    def test_crop_flip(self):
+        # Integer offsets without scaling copy the pixels.
+        matrix = affine_matrix(
+            (16, 20), 1., 3, 5, self.h_flip, self.v_flip)
+        out = self._affine(self.x, matrix, (16, 20), self.interpolation)
+        expected = self.x[:, 3:19, 5:25]
+        if self.h_flip:
+            expected = expected[:, :, ::-1]
+        if self.v_flip:
+            expected = expected[:, ::-1]
+        np.testing.assert_allclose(out, expected, atol=1e-3)
+
+    def test_translate(self):
+        matrix = affine_matrix((30, 40), 1., -2, -4)
+        out = self._affine(
+            self.x, matrix, (30, 40), self.interpolation, fill_value=-1)
+        self.assertEqual(out.shape, (3, 30, 40))
+        np.testing.assert_allclose(
+            out[:, 2:26, 4:36], self.x, atol=1e-3)
+        self.assertTrue(np.all(out[:, :2] == -1))
+        self.assertTrue(np.all(out[:, 26:] == -1))
+
+    def test_out(self):
+        matrix = affine_matrix((48, 64), 2.)
+        out = np.empty((3, 48, 64), dtype=np.float32)
+        ret = self._affine(
+            self.x, matrix, (48, 64), self.interpolation, out=out)
+        self.assertIs(ret, out)
+        np.testing.assert_equal(
+            out, self._affine(self.x, matrix, (48, 64), self.interpolation))
+
+    def test_label(self):
+        label = np.random.randint(-1, 21, size=(1, 24, 32)).astype(np.int32)
+        matrix = affine_matrix((36, 48), 1.5, 0, 0, self.h_flip)
+        out = self._affine(label, matrix, (36, 48), 'nearest', -1)
+        self.assertEqual(out.dtype, np.int32)
+        self.assertTrue(set(np.unique(out)) <= set(np.unique(label)))
+
+
+class TestAffineMatrix(unittest.TestCase):
+
+    def test_affine_matrix(self):
+        matrix = affine_matrix((10, 20), (2., 3.), 4, 5, True, False)
+        np.testing.assert_equal(matrix, [[-3, 0, 24], [0, 2, -4]])
+
+    def test_numpy_fallback(self):
+        # OpenCV quantizes the coordinates to 1/32 pixel, so a smooth
+        # image is compared.
+        x = np.add.outer(np.arange(24), np.arange(32)).astype(np.float32)
+        x = np.stack((x, 2 * x, 60 - x))
+        matrix = affine_matrix((40, 50), 1.7, 3, 2, True)
+        expected = affine(x, matrix, (40, 50))
+        with mock.patch.object(affine_transform, '_available', False):
+            out = affine(x, matrix, (40, 50))
+        np.testing.assert_allclose(out, expected, atol=0.5)
+
+    def test_numpy_fallback_border(self):
+        # The pixels near the border are interpolated with the fill value.
+        x = np.add.outer(np.arange(24), np.arange(32)).astype(np.float32)
+        x = x[None] + 10
+        matrix = affine_matrix((28, 36), 1., -2.5, -1.5)
+        expected = affine(x, matrix, (28, 36), fill_value=0)
+        with mock.patch.object(affine_transform, '_available', False):
+            out = affine(x, matrix, (28, 36), fill_value=0)
+        np.testing.assert_allclose(out, expected, atol=0.5)
+
+    def test_invalid_interpolation(self):
+        x = np.zeros((3, 24, 32), dtype=np.float32)
+        with self.assertRaises(ValueError):
+            affine(x, affine_matrix((24, 32)), (24, 32), 'area')
+
+
+testing.run_module(__name__, __file__)
@@ -0,0 +1,43 @@
+import unittest
+
+import numpy as np
+
+from chainer import testing
+from chainercv.transforms import random_crop_batch
+
+
+class TestRandomCropBatchTransform(unittest.TestCase):
+
+    def test_random_crop_batch(self):
+        x = np.random.uniform(size=(16, 3, 32, 40))
+        label = np.random.randint(0, 10, size=(16, 1, 32, 40))
+
+        (out, out_label), offsets = random_crop_batch(
+            (x, label), (24, 20), return_offsets=True)
+
+        self.assertEqual(out.shape, (16, 3, 24, 20))
+        self.assertEqual(out_label.shape, (16, 1, 24, 20))
+        for i in range(16):
+            y_offset = offsets['y_offset'][i]
+            x_offset = offsets['x_offset'][i]
+            self.assertTrue(0 <= y_offset <= 8)
+            self.assertTrue(0 <= x_offset <= 20)
+            np.testing.assert_equal(
+                out[i], x[i, :, y_offset:y_offset + 24,
+                          x_offset:x_offset + 20])
+            np.testing.assert_equal(
+                out_label[i], label[i, :, y_offset:y_offset + 24,
+                                    x_offset:x_offset + 20])
+
+    def test_same_shape(self):
+        x = np.random.uniform(size=(4, 3, 32, 32))
+        out = random_crop_batch(x, (32, 32))
+        np.testing.assert_equal(out, x)
+
+    def test_too_large(self):
+        x = np.random.uniform(size=(4, 3, 32, 32))
+        with self.assertRaises(ValueError):
+            random_crop_batch(x, (33, 32))
+
+
+testing.run_module(__name__, __file__)
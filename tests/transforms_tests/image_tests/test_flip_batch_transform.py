@@ -0,0 +1,41 @@
+import unittest
+
+import numpy as np
+
+from chainer import testing
+from chainercv.transforms import random_flip_batch
+
+
+class TestRandomFlipBatchTransform(unittest.TestCase):
+
+    def test_random_flip_batch(self):
+        x = np.random.uniform(size=(16, 3, 24, 20))
+        label = np.random.randint(0, 10, size=(16, 1, 24, 20))
+
+        (out, out_label), flips = random_flip_batch(
+            (x, label), horizontal_flip=True, vertical_flip=True,
+            return_flip=True)
+
+        self.assertEqual(flips['h'].shape, (16,))
+        self.assertEqual(flips['v'].shape, (16,))
+        for i in range(16):
+            expected = x[i]
+            expected_label = label[i]
+            if flips['h'][i]:
+                expected = expected[:, :, ::-1]
+                expected_label = expected_label[:, :, ::-1]
+            if flips['v'][i]:
+                expected = expected[:, ::-1, :]
+                expected_label = expected_label[:, ::-1, :]
+            np.testing.assert_equal(out[i], expected)
+            np.testing.assert_equal(out_label[i], expected_label)
+
+    def test_no_flip(self):
+        x = np.random.uniform(size=(4, 3, 24, 20))
+        out, flips = random_flip_batch(x, return_flip=True)
+        np.testing.assert_equal(out, x)
+        self.assertFalse(flips['h'].any())
+        self.assertFalse(flips['v'].any())
+
+
+testing.run_module(__name__, __file__)
@@ -17,5 +17,14 @@ class TestPadTransform(unittest.TestCase):
         np.testing.assert_array_equal(x, out[:, 1:33, 1:33])
         np.testing.assert_array_equal(bg_value, out[:, 0, 0])
 
+    def test_pad_transform_dtype(self):
+        x = np.random.randint(0, 21, size=(1, 30, 31)).astype(np.int32)
+
+        out = pad(x, (32, 32), bg_value=-1)
+
+        self.assertEqual(out.dtype, np.int32)
+        np.testing.assert_array_equal(x, out[:, 1:31, 0:31])
+        self.assertEqual((out == -1).sum(), 32 * 32 - 30 * 31)
+
 
 testing.run_module(__name__, __file__)
@@ -0,0 +1,44 @@
+import unittest
+
+import numpy as np
+
+from chainer import testing
+from chainercv.transforms import affine
+from chainercv.transforms import random_affine
+
+
+@testing.parameterize(*testing.product({
+    'scale_range': [(1., 1.), (0.5, 2.)],
+    'output_shape': [(16, 20), (40, 48)],
+}))
+class TestRandomAffineTransform(unittest.TestCase):
+
+    def setUp(self):
+        self.x = np.random.uniform(
+            0, 255, size=(3, 24, 32)).astype(np.float32)
+        self.label = np.random.randint(
+            -1, 21, size=(1, 24, 32)).astype(np.int32)
+
+    def test_random_affine(self):
+        out, param = random_affine(
+            self.x, self.output_shape, self.scale_range,
+            horizontal_flip=True, vertical_flip=True, return_param=True)
+        self.assertEqual(out.shape, (3,) + self.output_shape)
+        self.assertGreaterEqual(param['scale'], self.scale_range[0])
+        self.assertLessEqual(param['scale'], self.scale_range[1])
+        np.testing.assert_equal(
+            out, affine(self.x, param['matrix'], self.output_shape))
+
+    def test_random_affine_tuple(self):
+        (img, label), param = random_affine(
+            (self.x, self.label), self.output_shape, self.scale_range,
+            horizontal_flip=True, interpolation=('linear', 'nearest'),
+            fill_value=(0, -1), return_param=True)
+        self.assertEqual(img.shape, (3,) + self.output_shape)
+        self.assertEqual(label.shape, (1,) + self.output_shape)
+        np.testing.assert_equal(
+            label, affine(self.label, param['matrix'], self.output_shape,
+                          'nearest', -1))
+
+
+testing.run_module(__name__, __file__)
@@ -1,8 +1,10 @@
 import unittest
 
+import mock
 import numpy as np
 
 from chainer import testing
+from chainercv.transforms.image import resize_transform
 from chainercv.transforms import resize
 
 
@@ -16,4 +18,99 @@ class TestResizeTransform(unittest.TestCase):
         self.assertEqual(out.shape, (3, 32, 64))
 
 
+@testing.parameterize(*testing.product({
+    'interpolation': ['nearest', 'linear', 'area', 'cubic'],
+    'output_shape': [(16, 20), (48, 40), (24, 32)],
+    'n_channel': [1, 3, 6],
+}))
+class TestResizeInterpolation(unittest.TestCase):
+
+    def setUp(self):
+        self.x = np.random.uniform(
+            0, 255, size=(self.n_channel, 24, 32)).astype(np.float32)
+
+    def test_shape(self):
+        out = resize(self.x, self.output_shape, self.interpolation)
+        self.assertEqual(out.shape, (self.n_channel,) + self.output_shape)
+        self.assertEqual(out.dtype, np.float32)
+
+    def test_out(self):
+        out = np.empty(
+            (self.n_channel,) + self.output_shape, dtype=np.float32)
+        ret = resize(self.x, self.output_shape, self.interpolation, out=out)
+        self.assertIs(ret, out)
+        np.testing.assert_equal(
+            out, resize(self.x, self.output_shape, self.interpolation))
+
+    def test_channels(self):
+        out = resize(self.x, self.output_shape, self.interpolation)
+        for c in range(self.n_channel):
+            np.testing.assert_allclose(
+                out[c:c + 1],
+                resize(self.x[c:c + 1], self.output_shape,
+                       self.interpolation), atol=1e-3)
+
+    def test_cv2_calls(self):
+        cv2_resize = mock.Mock(wraps=resize_transform.cv2.resize)
+        with mock.patch.object(resize_transform.cv2, 'resize', cv2_resize):
+            resize(self.x, self.output_shape, self.interpolation)
+        # All channels are resized at once up to four channels.
+        self.assertEqual(cv2_resize.call_count, -(-self.n_channel // 4))
+
+    def test_numpy_fallback(self):
+        expected = resize(self.x, self.output_shape, self.interpolation)
+        with mock.patch.object(resize_transform, '_available', False):
+            out = resize(self.x, self.output_shape, self.interpolation)
+        np.testing.assert_allclose(out, expected, atol=1e-3)
+
+
+@testing.parameterize(*testing.product({
+    'dtype': [np.int32, np.int64, np.uint8],
+    'available': [True, False],
+}))
+class TestResizeLabel(unittest.TestCase):
+
+    def test_nearest(self):
+        label = np.random.randint(0, 21, size=(1, 24, 32)).astype(self.dtype)
+        with mock.patch.object(
+                resize_transform, '_available', self.available):
+            out = resize(label, (48, 40), interpolation='nearest')
+        self.assertEqual(out.dtype, self.dtype)
+        self.assertEqual(out.shape, (1, 48, 40))
+        # Only the values in the input appear in the output.
+        self.assertTrue(np.all(np.in1d(out, label)))
+        np.testing.assert_equal(out[:, ::2, ::5], label[:, :, ::4])
+
+    def test_linear(self):
+        label = np.full((1, 24, 32), 7, dtype=self.dtype)
+        with mock.patch.object(
+                resize_transform, '_available', self.available):
+            out = resize(label, (48, 40))
+        self.assertEqual(out.dtype, self.dtype)
+        np.testing.assert_equal(out, 7)
+
+
+class TestResizeInvalidInterpolation(unittest.TestCase):
+
+    def test_invalid_interpolation(self):
+        with self.assertRaises(ValueError):
+            resize(np.zeros((3, 24, 32)), (16, 16), interpolation='box')
+
+
+class TestResizeInvalidOut(unittest.TestCase):
+
+    def setUp(self):
+        self.label = np.zeros((1, 24, 32), dtype=np.int32)
+
+    def test_invalid_shape(self):
+        out = np.empty((1, 16, 20), dtype=np.int32)
+        with self.assertRaises(ValueError):
+            resize(self.label, (16, 16), interpolation='nearest', out=out)
+
+    def test_invalid_dtype(self):
+        out = np.empty((1, 16, 16), dtype=np.uint8)
+        with self.assertRaises(ValueError):
+            resize(self.label, (16, 16), interpolation='nearest', out=out)
+
+
 testing.run_module(__name__, __file__)
@@ -0,0 +1,32 @@
+import unittest
+
+import numpy as np
+
+from chainer import testing
+from chainercv.transforms import affine_keypoint
+from chainercv.transforms import affine_matrix
+from chainercv.transforms import resize_keypoint
+
+
+class TestAffineKeypointTransform(unittest.TestCase):
+
+    def test_affine_keypoint_resize(self):
+        keypoints = np.random.uniform(
+            low=0., high=32., size=(12, 3))
+        matrix = affine_matrix((64, 96), (2., 3.))
+        out = affine_keypoint(keypoints, matrix)
+        np.testing.assert_allclose(
+            out, resize_keypoint(keypoints, (32, 32), (64, 96)))
+
+    def test_affine_keypoint_valid(self):
+        keypoints = np.array(
+            [[4, 4, 1], [30, 20, 1], [2, 20, 1], [12, 12, 0]],
+            dtype=np.float32)
+        matrix = affine_matrix((16, 16), 1., 0, 0, h_flip=True)
+        out = affine_keypoint(keypoints, matrix, (16, 16))
+        np.testing.assert_equal(out[:, 0], 15 - keypoints[:, 0])
+        np.testing.assert_equal(out[:, 1], keypoints[:, 1])
+        np.testing.assert_equal(out[:, 2], [1, 0, 0, 0])
+
+
+testing.run_module(__name__, __file__)
@@ -0,0 +1,48 @@
+import unittest
+
+import numpy as np
+
+from chainer import testing
+from chainercv.transforms import crop_keypoint
+
+
+class TestCropKeypointTransform(unittest.TestCase):
+
+    def test_crop_keypoint(self):
+        keypoints = np.array(
+            [[10, 10, 1], [3, 10, 1], [20, 30, 1], [12, 14, 0]],
+            dtype=np.float32)
+        out = crop_keypoint(keypoints, 4, 5, (16, 16))
+        np.testing.assert_equal(out[:, 0], keypoints[:, 0] - 5)
+        np.testing.assert_equal(out[:, 1], keypoints[:, 1] - 4)
+        np.testing.assert_equal(out[:, 2], [1, 0, 0, 0])
+        np.testing.assert_equal(keypoints[:, 2], [1, 1, 1, 0])
+
+    def test_crop_keypoint_integer(self):
+        keypoints = np.array(
+            [[10, 10, 1], [3, 10, 1], [20, 30, 1], [12, 14, 0]],
+            dtype=np.int32)
+        out = crop_keypoint(keypoints, 4., 5.5, (16, 16))
+        self.assertEqual(out.dtype, np.int32)
+        np.testing.assert_equal(out[:, 0], [4, -2, 14, 6])
+        np.testing.assert_equal(out[:, 1], keypoints[:, 1] - 4)
+        np.testing.assert_equal(out[:, 2], [1, 0, 0, 0])
+
+    def test_crop_keypoint_batch(self):
+        keypoints = np.random.uniform(
+            low=0., high=64., size=(6, 15, 3)).astype(np.float32)
+        keypoints[:, :, 2] = np.random.randint(0, 2, size=(6, 15))
+        y_offset = np.random.randint(0, 32, size=6)
+        x_offset = np.random.randint(0, 32, size=6)
+        output_shapes = np.random.randint(16, 32, size=(6, 2))
+
+        expected = [
+            crop_keypoint(keypoints[i], y_offset[i], x_offset[i],
+                          output_shapes[i]) for i in range(6)]
+        out = crop_keypoint(
+            keypoints, y_offset, x_offset, output_shapes, copy=False)
+        self.assertIs(out, keypoints)
+        np.testing.assert_equal(out, expected)
+
+
+testing.run_module(__name__, __file__)
@@ -0,0 +1,57 @@
+import unittest
+
+import numpy as np
+
+from chainer import testing
+from chainercv.transforms import flip_keypoint
+
+
+class TestFlipKeypointTransform(unittest.TestCase):
+
+    def test_flip_keypoint(self):
+        keypoints = np.random.uniform(
+            low=0., high=32., size=(12, 3)).astype(np.float32)
+
+        out = flip_keypoint(keypoints, (24, 32), h_flip=True)
+        expected = keypoints.copy()
+        expected[:, 0] = 31 - keypoints[:, 0]
+        np.testing.assert_equal(out, expected)
+
+        out = flip_keypoint(keypoints, (24, 32), v_flip=True)
+        expected = keypoints.copy()
+        expected[:, 1] = 23 - keypoints[:, 1]
+        np.testing.assert_equal(out, expected)
+
+    def test_flip_keypoint_pairs(self):
+        keypoints = np.random.uniform(
+            low=0., high=32., size=(4, 3)).astype(np.float32)
+        out = flip_keypoint(
+            keypoints, (32, 32), h_flip=True, flip_pairs=((0, 2),))
+        np.testing.assert_equal(out[:, 0], 31 - keypoints[[2, 1, 0, 3], 0])
+        np.testing.assert_equal(out[:, 1:], keypoints[[2, 1, 0, 3], 1:])
+
+    def test_flip_keypoint_batch(self):
+        keypoints = np.random.uniform(
+            low=0., high=32., size=(5, 15, 3)).astype(np.float32)
+        img_shapes = np.random.randint(32, 64, size=(5, 2))
+        h_flip = np.array([True, False, True, False, False])
+        v_flip = np.array([True, True, False, False, True])
+        flip_pairs = ((6, 10), (7, 11), (8, 12))
+
+        out = flip_keypoint(
+            keypoints, img_shapes, h_flip, v_flip, flip_pairs)
+        for i in range(5):
+            np.testing.assert_equal(out[i], flip_keypoint(
+                keypoints[i], img_shapes[i], h_flip[i], v_flip[i],
+                flip_pairs))
+
+    def test_flip_keypoint_in_place(self):
+        keypoints = np.random.uniform(
+            low=0., high=32., size=(5, 15, 3)).astype(np.float32)
+        expected = flip_keypoint(keypoints, (32, 32), h_flip=True)
+        out = flip_keypoint(keypoints, (32, 32), h_flip=True, copy=False)
+        self.assertIs(out, keypoints)
+        np.testing.assert_equal(out, expected)
+
+
+testing.run_module(__name__, __file__)
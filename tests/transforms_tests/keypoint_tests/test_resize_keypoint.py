@@ -18,5 +18,15 @@ class TestRandomCropTransform(unittest.TestCase):
         keypoint[:, :2] *= 2
         np.testing.assert_equal(out, keypoint)
 
+    def test_resize_keypoint_batch(self):
+        keypoints = np.random.uniform(
+            low=0., high=32., size=(3, 12, 3))
+        input_shapes = np.array([(32, 32), (16, 32), (32, 8)])
+
+        out = resize_keypoint(keypoints, input_shapes, (64, 64))
+        for i in range(3):
+            np.testing.assert_equal(out[i], resize_keypoint(
+                keypoints[i], input_shapes[i], (64, 64)))
+
 
 testing.run_module(__name__, __file__)
@@ -0,0 +1,40 @@
+import unittest
+
+import numpy as np
+
+from chainer import testing
+from chainercv.transforms import translate_keypoint
+
+
+class TestTranslateKeypointTransform(unittest.TestCase):
+
+    def test_translate_keypoint(self):
+        keypoints = np.random.uniform(
+            low=0., high=32., size=(12, 3))
+        out = translate_keypoint(keypoints, y_offset=3, x_offset=-2)
+        expected = keypoints.copy()
+        expected[:, 0] -= 2
+        expected[:, 1] += 3
+        np.testing.assert_equal(out, expected)
+
+    def test_translate_keypoint_integer(self):
+        keypoints = np.random.randint(0, 32, size=(12, 3)).astype(np.int32)
+        out = translate_keypoint(keypoints, y_offset=3.5, x_offset=-2.5)
+        self.assertEqual(out.dtype, np.int32)
+        np.testing.assert_equal(out[:, 0], (keypoints[:, 0] - 2.5).astype(
+            np.int32))
+        np.testing.assert_equal(out[:, 1], (keypoints[:, 1] + 3.5).astype(
+            np.int32))
+
+    def test_translate_keypoint_batch(self):
+        keypoints = np.random.uniform(
+            low=0., high=32., size=(4, 12, 3))
+        y_offset = np.array([1, 2, 3, 4])
+        x_offset = np.array([-1, 0, 1, 2])
+        out = translate_keypoint(keypoints, y_offset, x_offset)
+        for i in range(4):
+            np.testing.assert_equal(out[i], translate_keypoint(
+                keypoints[i], y_offset[i], x_offset[i]))
+
+
+testing.run_module(__name__, __file__)
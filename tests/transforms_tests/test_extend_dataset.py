@@ -1,9 +1,15 @@
 import unittest
 
 import numpy as np
+import os
+import tempfile
+import warnings
 
+from chainer.dataset import download
 from chainer import testing
+from chainercv.transforms import extend_dataset
 from chainercv.transforms import extend
+from chainercv.transforms import extend_cache
 from chainercv.utils import SimpleDataset
 
 
@@ -21,4 +27,70 @@ class TestExtend(unittest.TestCase):
         np.testing.assert_equal(out, first_img * 3)
 
 
+class TestExtendCache(unittest.TestCase):
+
+    def setUp(self):
+        self.dataset_root = download.get_dataset_root()
+        download.set_dataset_root(tempfile.mkdtemp())
+
+    def tearDown(self):
+        download.set_dataset_root(self.dataset_root)
+
+    def test_extend_cache(self):
+        dataset = SimpleDataset(np.random.uniform(size=(10, 3, 32, 32)))
+        first_img = dataset.get_example(0)
+        n_call = [0]
+
+        def transform(in_data):
+            n_call[0] += 1
+            return in_data * 3, n_call[0]
+
+        extend_cache(dataset, transform)
+        for _ in range(2):
+            out, n = dataset.get_example(0)
+            np.testing.assert_equal(out, first_img * 3)
+            self.assertEqual(n, 1)
+        self.assertEqual(n_call[0], 1)
+
+    def test_persistent(self):
+        imgs = np.random.uniform(size=(10, 3, 32, 32))
+
+        def transform(in_data):
+            return in_data * 3
+
+        cache_root = download.get_dataset_directory(extend_dataset.root)
+        for _ in range(2):
+            dataset = SimpleDataset(imgs)
+            extend_cache(dataset, transform)
+            np.testing.assert_equal(dataset.get_example(1), imgs[1] * 3)
+            # The same cache is used again.
+            self.assertEqual(len(self._caches(cache_root)), 1)
+
+        dataset = SimpleDataset(imgs)
+        extend_cache(dataset, lambda in_data: in_data * 4)
+        np.testing.assert_equal(dataset.get_example(1), imgs[1] * 4)
+        self.assertEqual(len(self._caches(cache_root)), 2)
+
+    def test_unknown_state(self):
+        imgs = np.random.uniform(size=(10, 3, 32, 32))
+        dataset = SimpleDataset(imgs)
+        # An object implemented in C cannot be fingerprinted.
+        offset = iter([1])
+
+        def transform(in_data):
+            return in_data * 3, offset
+
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter('always')
+            extend_cache(dataset, transform)
+        self.assertEqual(len(w), 1)
+        np.testing.assert_equal(dataset.get_example(1)[0], imgs[1] * 3)
+        cache_root = download.get_dataset_directory(extend_dataset.root)
+        self.assertEqual(self._caches(cache_root), [])
+
+    def _caches(self, cache_root):
+        return [fn for fn in os.listdir(cache_root)
+                if os.path.isdir(os.path.join(cache_root, fn))]
+
+
 testing.run_module(__name__, __file__)
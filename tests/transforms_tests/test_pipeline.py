@@ -0,0 +1,124 @@
+import unittest
+
+import numpy as np
+import random
+
+from chainer import testing
+from chainercv.transforms import Pipeline
+from chainercv.transforms import random_crop
+from chainercv.transforms import random_flip
+from chainercv.transforms import RandomCrop
+from chainercv.transforms import RandomFlip
+from chainercv.transforms import SubtractMean
+from chainercv.utils import SimpleDataset
+
+
+class TestPipeline(unittest.TestCase):
+
+    def setUp(self):
+        self.img = np.random.uniform(size=(3, 32, 48)).astype(np.float32)
+        self.label = np.random.randint(
+            0, 20, size=(1, 32, 48)).astype(np.int32)
+        self.mean = np.random.uniform(size=(3, 1, 1)).astype(np.float32)
+
+    def _expected(self, img, label):
+        img, label = random_flip(
+            (img, label), horizontal_flip=True, vertical_flip=True)
+        img, label = random_crop((img, label), (None, 16, 24))
+        img, label = random_flip((img, label), horizontal_flip=True)
+        return img - self.mean, label
+
+    def _pipeline(self, owns_input=False):
+        return Pipeline([
+            RandomFlip(horizontal_flip=True, vertical_flip=True),
+            RandomCrop((None, 16, 24)),
+            RandomFlip(horizontal_flip=True),
+            SubtractMean(self.mean)], owns_input=owns_input)
+
+    def test_same_as_transforms(self):
+        pipeline = self._pipeline()
+        for seed in range(10):
+            random.seed(seed)
+            expected_img, expected_label = self._expected(
+                self.img, self.label)
+            random.seed(seed)
+            img, label = pipeline((self.img, self.label))
+            np.testing.assert_equal(img, expected_img)
+            np.testing.assert_equal(label, expected_label)
+
+    def test_fusion(self):
+        pipeline = self._pipeline()
+        _, label = pipeline((self.img, self.label))
+        # The label is one view of the input.
+        self.assertIs(label.base, self.label)
+        self.assertEqual(
+            list(pipeline.stats().keys()),
+            ['RandomFlip+RandomCrop+RandomFlip', 'SubtractMean'])
+
+    def test_input_is_not_modified(self):
+        img = self.img.copy()
+        self._pipeline()((img, self.label))
+        np.testing.assert_equal(img, self.img)
+
+    def test_owns_input(self):
+        img = self.img.copy()
+        out_img, _ = Pipeline(
+            [SubtractMean(self.mean)], owns_input=True)((img, self.label))
+        self.assertIs(out_img, img)
+        np.testing.assert_equal(out_img, self.img - self.mean)
+
+    def test_owns_read_only_input(self):
+        img = self.img.copy()
+        img.flags.writeable = False
+        out_img, _ = Pipeline(
+            [SubtractMean(self.mean)], owns_input=True)((img, self.label))
+        self.assertIsNot(out_img, img)
+        np.testing.assert_equal(out_img, self.img - self.mean)
+        np.testing.assert_equal(img, self.img)
+
+    def test_in_place_after_allocation(self):
+        img = self.img.astype(np.uint8)
+        pipeline = Pipeline([SubtractMean(self.mean), SubtractMean(1)])
+        out_img = pipeline(img)
+        np.testing.assert_almost_equal(out_img, img - self.mean - 1)
+        self.assertEqual(
+            list(pipeline.stats().keys()),
+            ['SubtractMean_0', 'SubtractMean_1'])
+
+    def test_transform(self):
+        def double(in_data):
+            img, label = in_data
+            return img * 2, label
+
+        pipeline = Pipeline([double, SubtractMean(self.mean)])
+        img, label = pipeline((self.img, self.label))
+        np.testing.assert_almost_equal(img, self.img * 2 - self.mean)
+        self.assertIs(label, self.label)
+
+    def test_stats(self):
+        pipeline = self._pipeline()
+        for _ in range(3):
+            pipeline((self.img, self.label))
+        stats = pipeline.stats()
+        for stat in stats.values():
+            self.assertEqual(stat['count'], 3)
+            self.assertGreaterEqual(stat['total'], 0)
+        pipeline.reset_stats()
+        for stat in pipeline.stats().values():
+            self.assertEqual(stat['count'], 0)
+
+    def test_attach(self):
+        imgs = np.random.uniform(size=(10, 3, 32, 32))
+        dataset = SimpleDataset(imgs)
+        Pipeline([lambda img: img * 2, SubtractMean(1)]).attach(dataset)
+        np.testing.assert_almost_equal(dataset.get_example(3), imgs[3] * 2 - 1)
+
+    def test_stage(self):
+        random.seed(0)
+        expected = random_crop(self.img, (None, 16, 24))
+        random.seed(0)
+        np.testing.assert_equal(
+            RandomCrop((None, 16, 24))(self.img), expected)
+
+
+testing.run_module(__name__, __file__)
@@ -0,0 +1,251 @@
+import unittest
+
+import filelock
+import functools
+import multiprocessing
+import numpy as np
+import os
+import tempfile
+
+from chainer import testing
+from chainercv.transforms import ArraySlotCache
+from chainercv.transforms import evict_caches
+from chainercv.transforms import transform_fingerprint
+from chainercv.utils import SimpleDataset
+
+
+_mean = np.zeros(3)
+
+
+def _fill(cache, indices):
+    for i in indices:
+        cache.put(i, (np.full((3, 4), i, dtype=np.float32), i))
+
+
+class TestArraySlotCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+
+    def test_fixed_shape(self):
+        cache = ArraySlotCache(self.cache_dir, 5)
+        self.assertIsNone(cache.get(0))
+        img = np.random.uniform(size=(3, 4)).astype(np.float32)
+        label = np.array([1, 2], dtype=np.int32)
+        cache.put(0, (img, label))
+        self.assertIn(0, cache)
+        self.assertNotIn(1, cache)
+
+        out_img, out_label = cache.get(0)
+        np.testing.assert_equal(out_img, img)
+        np.testing.assert_equal(out_label, label)
+        self.assertEqual(out_img.dtype, np.float32)
+        self.assertEqual(out_label.dtype, np.int32)
+        # The returned arrays are copies.
+        out_img[:] = 0
+        np.testing.assert_equal(cache.get(0)[0], img)
+
+    def test_single_value(self):
+        cache = ArraySlotCache(self.cache_dir, 5)
+        img = np.random.uniform(size=(3, 4))
+        cache.put(2, img)
+        out = cache.get(2)
+        self.assertIsInstance(out, np.ndarray)
+        np.testing.assert_equal(out, img)
+
+    def test_ragged(self):
+        cache = ArraySlotCache(self.cache_dir, 5)
+        bboxes = [np.random.uniform(size=(n, 4)) for n in (2, 3, 0)]
+        for i, bbox in enumerate(bboxes):
+            cache.put(i, (np.zeros((3, 4)), bbox, 'label{}'.format(i)))
+        for i, bbox in enumerate(bboxes):
+            _, out_bbox, out_label = cache.get(i)
+            np.testing.assert_equal(out_bbox, bbox)
+            self.assertEqual(out_label, 'label{}'.format(i))
+
+    def test_reopen(self):
+        cache = ArraySlotCache(self.cache_dir, 5)
+        _fill(cache, range(3))
+        cache = ArraySlotCache(self.cache_dir, 5)
+        for i in range(3):
+            img, label = cache.get(i)
+            np.testing.assert_equal(img, np.full((3, 4), i))
+            self.assertEqual(label, i)
+        self.assertIsNone(cache.get(3))
+
+    def test_length_mismatch(self):
+        ArraySlotCache(self.cache_dir, 5)
+        with self.assertRaises(ValueError):
+            ArraySlotCache(self.cache_dir, 6)
+
+    def test_field_mismatch(self):
+        cache = ArraySlotCache(self.cache_dir, 5)
+        cache.put(0, (np.zeros(3), np.zeros(3)))
+        with self.assertRaises(ValueError):
+            cache.put(1, np.zeros(3))
+
+    def test_shared_by_processes(self):
+        cache = ArraySlotCache(self.cache_dir, 10)
+        ps = [multiprocessing.Process(target=_fill, args=(cache, indices))
+              for indices in (range(0, 10, 2), range(1, 10, 2))]
+        for p in ps:
+            p.start()
+        for p in ps:
+            p.join()
+        for i in range(10):
+            img, label = cache.get(i)
+            np.testing.assert_equal(img, np.full((3, 4), i))
+            self.assertEqual(label, i)
+
+
+def _make_transform(scale):
+    def transform(in_data):
+        return in_data * scale
+    return transform
+
+
+def _subtract_mean(in_data):
+    return in_data - _mean
+
+
+class TestTransformFingerprint(unittest.TestCase):
+
+    def setUp(self):
+        self.dataset = SimpleDataset(np.zeros((5, 3)))
+
+    def test_deterministic(self):
+        self.assertEqual(
+            transform_fingerprint(self.dataset, _make_transform(2)),
+            transform_fingerprint(self.dataset, _make_transform(2)))
+
+    def test_closure(self):
+        self.assertNotEqual(
+            transform_fingerprint(self.dataset, _make_transform(2)),
+            transform_fingerprint(self.dataset, _make_transform(3)))
+
+    def test_code(self):
+        self.assertNotEqual(
+            transform_fingerprint(self.dataset, lambda x: x * 2),
+            transform_fingerprint(self.dataset, lambda x: x * 3))
+
+    def test_global(self):
+        global _mean
+        fingerprint = transform_fingerprint(self.dataset, _subtract_mean)
+        _mean = np.ones(3)
+        try:
+            self.assertNotEqual(
+                transform_fingerprint(self.dataset, _subtract_mean),
+                fingerprint)
+        finally:
+            _mean = np.zeros(3)
+
+    def test_dataset(self):
+        transform = _make_transform(2)
+        self.assertNotEqual(
+            transform_fingerprint(self.dataset, transform),
+            transform_fingerprint(SimpleDataset(np.zeros((6, 3))), transform))
+
+
+def _subtract(in_data, mean=0):
+    return in_data - mean
+
+
+class _Scale(object):
+
+    def __init__(self, scale):
+        self._scale = scale
+
+    def __call__(self, in_data):
+        return in_data * self._scale
+
+
+class _Unknown(object):
+
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+
+class TestTransformFingerprintObjects(unittest.TestCase):
+
+    def setUp(self):
+        self.dataset = SimpleDataset(np.zeros((5, 3)))
+
+    def test_partial(self):
+        self.assertNotEqual(
+            transform_fingerprint(
+                self.dataset, functools.partial(_subtract, mean=1)),
+            transform_fingerprint(
+                self.dataset, functools.partial(_subtract, mean=100)))
+
+    def test_callable_private_attribute(self):
+        self.assertEqual(
+            transform_fingerprint(self.dataset, _Scale(2)),
+            transform_fingerprint(self.dataset, _Scale(2)))
+        self.assertNotEqual(
+            transform_fingerprint(self.dataset, _Scale(2)),
+            transform_fingerprint(self.dataset, _Scale(3)))
+
+    def test_callable_code(self):
+        class Scale(_Scale):
+
+            def __call__(self, in_data):
+                return in_data / self._scale
+
+        self.assertNotEqual(
+            transform_fingerprint(self.dataset, _Scale(2)),
+            transform_fingerprint(self.dataset, Scale(2)))
+
+    def test_unknown_state(self):
+        transform = functools.partial(_subtract, mean=_Unknown(1))
+        with self.assertRaises(ValueError):
+            transform_fingerprint(self.dataset, transform)
+
+
+def _hold_lock(lock_path, locked, release):
+    with filelock.FileLock(lock_path):
+        locked.set()
+        release.wait(10)
+
+
+class TestEvictCaches(unittest.TestCase):
+
+    def test_evict_caches(self):
+        cache_root = tempfile.mkdtemp()
+        for t, name in enumerate(('a', 'b', 'c')):
+            os.makedirs(os.path.join(cache_root, name))
+            with open(os.path.join(cache_root, name, 'data'), 'wb') as f:
+                f.write(b'\0' * 8192)
+            os.utime(os.path.join(cache_root, name), (t, t))
+        evict_caches(cache_root, 2 * 8192, keep=('a',))
+        self.assertTrue(os.path.exists(os.path.join(cache_root, 'a')))
+        self.assertFalse(os.path.exists(os.path.join(cache_root, 'b')))
+        self.assertTrue(os.path.exists(os.path.join(cache_root, 'c')))
+
+    def test_locked_cache(self):
+        cache_root = tempfile.mkdtemp()
+        for t, name in enumerate(('a', 'b', 'c')):
+            ArraySlotCache(os.path.join(cache_root, name), 1024).put(
+                0, np.zeros(1024))
+            os.utime(os.path.join(cache_root, name), (t, t))
+
+        # Another process holds the lock of the least recently used cache.
+        locked = multiprocessing.Event()
+        release = multiprocessing.Event()
+        p = multiprocessing.Process(
+            target=_hold_lock,
+            args=(os.path.join(cache_root, 'a', 'lock'), locked, release))
+        p.start()
+        try:
+            self.assertTrue(locked.wait(10))
+            evict_caches(cache_root, 0)
+        finally:
+            release.set()
+            p.join()
+        self.assertTrue(os.path.exists(os.path.join(cache_root, 'a')))
+        self.assertFalse(os.path.exists(os.path.join(cache_root, 'b')))
+        self.assertFalse(os.path.exists(os.path.join(cache_root, 'c')))
+
+
+testing.run_module(__name__, __file__)
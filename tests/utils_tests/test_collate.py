@@ -0,0 +1,99 @@
+import unittest
+
+import numpy as np
+
+from chainer import testing
+from chainercv.transforms import RaggedBboxes
+from chainercv.utils import concat_bbox_examples
+from chainercv.utils import pad_concat_examples
+
+
+class TestPadConcatExamples(unittest.TestCase):
+
+    def setUp(self):
+        self.shapes = [(20, 30), (25, 18), (10, 10)]
+        self.batch = [
+            (np.random.uniform(size=(3,) + shape).astype(np.float32),
+             np.random.randint(0, 21, size=(1,) + shape).astype(np.int32))
+            for shape in self.shapes]
+
+    def test_pad_concat_examples(self):
+        imgs, labels = pad_concat_examples(self.batch, fill_value=(0, -1))
+        self.assertEqual(imgs.shape, (3, 3, 25, 30))
+        self.assertEqual(labels.shape, (3, 1, 25, 30))
+        self.assertEqual(imgs.dtype, np.float32)
+        self.assertEqual(labels.dtype, np.int32)
+        for i, (img, label) in enumerate(self.batch):
+            H, W = self.shapes[i]
+            np.testing.assert_equal(imgs[i, :, :H, :W], img)
+            np.testing.assert_equal(labels[i, :, :H, :W], label)
+            self.assertTrue(np.all(imgs[i, :, H:] == 0))
+            self.assertTrue(np.all(imgs[i, :, :, W:] == 0))
+            self.assertTrue(np.all(labels[i, :, H:] == -1))
+            self.assertTrue(np.all(labels[i, :, :, W:] == -1))
+
+    def test_align(self):
+        imgs, labels = pad_concat_examples(self.batch, align=8)
+        self.assertEqual(imgs.shape, (3, 3, 32, 32))
+        self.assertEqual(labels.shape, (3, 1, 32, 32))
+
+    def test_mask(self):
+        imgs, labels, mask = pad_concat_examples(
+            self.batch, return_mask=True)
+        self.assertEqual(mask.shape, (3, 25, 30))
+        self.assertEqual(mask.dtype, bool)
+        for i, (H, W) in enumerate(self.shapes):
+            self.assertEqual(mask[i].sum(), H * W)
+            self.assertTrue(mask[i, :H, :W].all())
+
+    def test_array_examples(self):
+        batch = [img for img, _ in self.batch]
+        imgs, mask = pad_concat_examples(batch, return_mask=True)
+        self.assertEqual(imgs.shape, (3, 3, 25, 30))
+        imgs = pad_concat_examples(batch)
+        self.assertIsInstance(imgs, np.ndarray)
+
+    def test_other_fields(self):
+        batch = [(img, np.zeros((i + 1, 5)), i)
+                 for i, (img, _) in enumerate(self.batch)]
+        _, bboxes, ids = pad_concat_examples(batch, fill_value=(0, -1, 0))
+        self.assertEqual(bboxes.shape, (3, 3, 5))
+        self.assertEqual(bboxes[0, 1:].tolist(), [[-1] * 5] * 2)
+        np.testing.assert_equal(ids, [0, 1, 2])
+
+    def test_empty(self):
+        with self.assertRaises(ValueError):
+            pad_concat_examples([])
+
+    def test_invalid_fill_value(self):
+        with self.assertRaises(ValueError):
+            pad_concat_examples(self.batch, fill_value=(0,))
+        with self.assertRaises(ValueError):
+            pad_concat_examples(self.batch, fill_value=(0, -1, 0))
+
+
+class TestConcatBboxExamples(unittest.TestCase):
+
+    def setUp(self):
+        self.shapes = [(20, 30), (25, 18), (10, 10)]
+        self.batch = [
+            (np.random.uniform(size=(3,) + shape).astype(np.float32),
+             np.random.uniform(0, 10, size=(n, 5)).astype(np.float32))
+            for n, shape in zip([2, 0, 3], self.shapes)]
+
+    def test_concat_bbox_examples(self):
+        imgs, bboxes, shapes = concat_bbox_examples(
+            self.batch, return_shapes=True)
+        self.assertEqual(imgs.shape, (3, 3, 25, 30))
+        self.assertIsInstance(bboxes, RaggedBboxes)
+        np.testing.assert_equal(bboxes.offsets, [0, 2, 2, 5])
+        for i, (_, bbox) in enumerate(self.batch):
+            np.testing.assert_equal(bboxes[i], bbox)
+        np.testing.assert_equal(shapes, self.shapes)
+
+    def test_empty(self):
+        with self.assertRaises(ValueError):
+            concat_bbox_examples([])
+
+
+testing.run_module(__name__, __file__)
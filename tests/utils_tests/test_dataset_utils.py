@@ -0,0 +1,163 @@
+import unittest
+
+import numpy as np
+import os
+import tempfile
+
+from chainer import testing
+from PIL import Image
+from chainercv.utils.dataset_utils import batch_raw_data
+from chainercv.utils.dataset_utils import cache_load_arrays
+from chainercv.utils.dataset_utils import file_manifest_digest
+from chainercv.utils.dataset_utils import read_image_shapes
+
+
+class TestCacheLoadArrays(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.n_calls = 0
+
+    def _creator(self, value):
+        self.n_calls += 1
+        return {'a': np.full((3, 4), value, dtype=np.float32),
+                'b': np.arange(value, dtype=np.int32)}
+
+    def test_cache_load_arrays(self):
+        out = cache_load_arrays(
+            self.cache_dir, {'value': 2}, self._creator, args=(2,))
+        np.testing.assert_equal(out['a'], np.full((3, 4), 2))
+        np.testing.assert_equal(out['b'], np.arange(2))
+        self.assertEqual(self.n_calls, 1)
+
+        out = cache_load_arrays(
+            self.cache_dir, {'value': 2}, self._creator, args=(2,))
+        self.assertIsInstance(out['a'], np.memmap)
+        np.testing.assert_equal(out['b'], np.arange(2))
+        self.assertEqual(self.n_calls, 1)
+
+    def test_different_key(self):
+        cache_load_arrays(
+            self.cache_dir, {'value': 2}, self._creator, args=(2,))
+        out = cache_load_arrays(
+            self.cache_dir, {'value': 3}, self._creator, args=(3,))
+        np.testing.assert_equal(out['b'], np.arange(3))
+        self.assertEqual(self.n_calls, 2)
+
+    def test_delete_cache(self):
+        cache_load_arrays(
+            self.cache_dir, {'value': 2}, self._creator, args=(2,))
+        cache_load_arrays(
+            self.cache_dir, {'value': 2}, self._creator, args=(2,),
+            delete_cache=True)
+        self.assertEqual(self.n_calls, 2)
+
+    def test_delete_cache_other_keys(self):
+        cache_load_arrays(
+            self.cache_dir, {'value': 2}, self._creator, args=(2,))
+        temp_path = tempfile.mkdtemp(dir=self.cache_dir)
+        cache_load_arrays(
+            self.cache_dir, {'value': 3}, self._creator, args=(3,),
+            delete_cache=True)
+        dirs = [name for name in os.listdir(self.cache_dir)
+                if os.path.isdir(os.path.join(self.cache_dir, name))]
+        self.assertEqual(len(dirs), 2)
+        self.assertIn(os.path.basename(temp_path), dirs)
+
+        cache_load_arrays(
+            self.cache_dir, {'value': 2}, self._creator, args=(2,))
+        self.assertEqual(self.n_calls, 3)
+
+    def test_no_cache(self):
+        cache_load_arrays(
+            self.cache_dir, {'value': 2}, self._creator, args=(2,),
+            use_cache=False)
+        self.assertEqual(os.listdir(self.cache_dir), [])
+
+
+class TestFileManifestDigest(unittest.TestCase):
+
+    def test_file_manifest_digest(self):
+        path = os.path.join(tempfile.mkdtemp(), 'file')
+        with open(path, 'w') as f:
+            f.write('a')
+        digest = file_manifest_digest([path])
+        self.assertEqual(digest, file_manifest_digest([path]))
+
+        with open(path, 'w') as f:
+            f.write('ab')
+        self.assertNotEqual(digest, file_manifest_digest([path]))
+
+    def test_stats(self):
+        path = os.path.join(tempfile.mkdtemp(), 'file')
+        with open(path, 'w') as f:
+            f.write('a')
+        st = os.stat(path)
+        self.assertEqual(
+            file_manifest_digest([path], stats=[(st.st_mtime, st.st_size)]),
+            file_manifest_digest([path]))
+        self.assertEqual(
+            file_manifest_digest([path], stats=[None]),
+            file_manifest_digest([path]))
+        self.assertNotEqual(
+            file_manifest_digest([path], stats=[(st.st_mtime, 2)]),
+            file_manifest_digest([path]))
+
+
+class TestReadImageShapes(unittest.TestCase):
+
+    def setUp(self):
+        self.root = tempfile.mkdtemp()
+        self.paths = []
+        for i, (W, H) in enumerate([(10, 8), (6, 12)]):
+            path = os.path.join(self.root, '{}.png'.format(i))
+            Image.new('RGB', (W, H)).save(path)
+            self.paths.append(path)
+
+    def test_read_image_shapes(self):
+        shapes = read_image_shapes(self.paths)
+        np.testing.assert_equal(shapes, [[8, 10], [12, 6]])
+
+    def test_read_image_shapes_cache(self):
+        cache_dir = os.path.join(self.root, 'cache')
+        shapes = read_image_shapes(self.paths, cache_dir=cache_dir)
+        np.testing.assert_equal(shapes, [[8, 10], [12, 6]])
+        self.assertTrue(len(os.listdir(cache_dir)) > 0)
+
+        # A modified image invalidates the cache.
+        Image.new('RGB', (4, 5)).save(self.paths[0])
+        shapes = read_image_shapes(self.paths, cache_dir=cache_dir)
+        np.testing.assert_equal(shapes, [[5, 4], [12, 6]])
+
+
+class TestBatchRawData(unittest.TestCase):
+
+    def setUp(self):
+        self.imgs = np.random.randint(
+            0, 256, size=(4, 8, 10, 3)).astype(np.uint8)
+        self.labels = np.arange(4)
+
+    def _get_raw_data(self, i):
+        return self.imgs[i], self.labels[i]
+
+    def test_batch_raw_data(self):
+        imgs, labels = batch_raw_data(self._get_raw_data, [2, 0])
+        self.assertEqual(imgs.dtype, np.float32)
+        np.testing.assert_equal(
+            imgs, self.imgs[[2, 0]].transpose(0, 3, 1, 2)[:, ::-1])
+        self.assertEqual(labels, [2, 0])
+
+    def test_batch_raw_data_out(self):
+        out = np.zeros((2, 3, 8, 10), dtype=np.float32)
+        imgs, _ = batch_raw_data(self._get_raw_data, [1, 3], out=out)
+        self.assertIs(imgs, out)
+        np.testing.assert_equal(
+            out, self.imgs[[1, 3]].transpose(0, 3, 1, 2)[:, ::-1])
+
+    def test_batch_raw_data_shape_mismatch(self):
+        out = np.zeros((2, 3, 10, 8), dtype=np.float32)
+        with self.assertRaises(ValueError):
+            batch_raw_data(self._get_raw_data, [1, 3], out=out)
+
+
+testing.run_module(__name__, __file__)
@@ -0,0 +1,362 @@
+import unittest
+
+import hashlib
+import io
+import mock
+import numpy as np
+import os
+import re
+import tarfile
+import tempfile
+import threading
+import warnings
+import zipfile
+
+from six.moves import BaseHTTPServer
+from six.moves import socketserver
+
+from chainer import testing
+from chainercv.utils import download
+
+
+class _Handler(BaseHTTPServer.BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        server = self.server
+        data = server.data
+        match = re.match(r'bytes=(\d+)-(\d+)', self.headers.get('Range', ''))
+        if match is None or not server.support_range:
+            start, end = 0, len(data)
+            self.send_response(200)
+        else:
+            start = int(match.group(1))
+            end = min(int(match.group(2)) + 1, len(data))
+            self.send_response(206)
+            self.send_header(
+                'Content-Range',
+                'bytes {}-{}/{}'.format(start, end - 1, len(data)))
+            if server.etag is not None:
+                self.send_header('ETag', server.etag)
+        with server.lock:
+            server.requests.append((start, end))
+            fail = (start, end) in server.fail
+            server.fail.discard((start, end))
+        self.send_header('Content-Length', str(end - start))
+        self.end_headers()
+        if fail:
+            # Close the connection in the middle of the range.
+            self.wfile.write(data[start:start + (end - start) // 2])
+            return
+        self.wfile.write(data[start:end])
+
+    def log_message(self, *args):
+        pass
+
+
+class _Server(socketserver.ThreadingMixIn, BaseHTTPServer.HTTPServer):
+
+    daemon_threads = True
+
+
+@testing.parameterize(
+    {'support_range': True},
+    {'support_range': False},
+)
+class TestCachedDownload(unittest.TestCase):
+
+    def setUp(self):
+        self.server = _Server(('127.0.0.1', 0), _Handler)
+        self.server.data = np.random.randint(
+            0, 256, size=10000).astype(np.uint8).tobytes()
+        self.server.support_range = self.support_range
+        self.server.etag = '"etag"'
+        self.server.requests = []
+        self.server.fail = set()
+        self.server.lock = threading.Lock()
+        self.thread = threading.Thread(target=self.server.serve_forever)
+        self.thread.daemon = True
+        self.thread.start()
+        self.url = 'http://127.0.0.1:{}/data'.format(
+            self.server.server_address[1])
+
+        self.patcher = mock.patch.object(
+            download, '_dataset_root', tempfile.mkdtemp())
+        self.patcher.start()
+
+    def tearDown(self):
+        self.patcher.stop()
+        self.server.shutdown()
+        self.server.server_close()
+
+    def _read(self, path):
+        with open(path, 'rb') as f:
+            return f.read()
+
+    def test_cached_download(self):
+        checksum = hashlib.sha256(self.server.data).hexdigest()
+        path = download.cached_download(
+            self.url, n_connections=3, chunk_size=1024,
+            checksum=checksum, hash_algorithm='sha256')
+        self.assertEqual(self._read(path), self.server.data)
+
+        n_requests = len(self.server.requests)
+        self.assertEqual(download.cached_download(self.url), path)
+        self.assertEqual(len(self.server.requests), n_requests)
+
+    def test_checksum_mismatch(self):
+        with self.assertRaises(RuntimeError):
+            download.cached_download(
+                self.url, chunk_size=1024, checksum='0' * 32)
+
+    def test_resume(self):
+        if not self.support_range:
+            self.skipTest('the server does not support ranges')
+        self.server.fail.add((3072, 4096))
+        with self.assertRaises(IOError):
+            download.cached_download(
+                self.url, n_connections=1, chunk_size=1024)
+
+        self.server.requests = []
+        checksum = hashlib.md5(self.server.data).hexdigest()
+        path = download.cached_download(
+            self.url, n_connections=2, chunk_size=1024, checksum=checksum)
+        self.assertEqual(self._read(path), self.server.data)
+        # Only the chunks that were not completed are requested again.
+        self.assertNotIn((0, 1024), self.server.requests)
+        self.assertIn((3072, 4096), self.server.requests)
+
+    def test_resume_changed_file(self):
+        if not self.support_range:
+            self.skipTest('the server does not support ranges')
+        self.server.etag = '"etag1"'
+        self.server.fail.add((3072, 4096))
+        with self.assertRaises(IOError):
+            download.cached_download(
+                self.url, n_connections=1, chunk_size=1024)
+        self.server.etag = '"etag2"'
+        self.server.data = np.random.randint(
+            0, 256, size=10000).astype(np.uint8).tobytes()
+        self.server.requests = []
+        path = download.cached_download(
+            self.url, n_connections=2, chunk_size=1024)
+        self.assertEqual(self._read(path), self.server.data)
+        self.assertIn((0, 1024), self.server.requests)
+
+    def test_resume_without_validator(self):
+        if not self.support_range:
+            self.skipTest('the server does not support ranges')
+        # The server identifies no version of the file, so the partial
+        # file is discarded even if the file has not changed.
+        self.server.etag = None
+        self.server.fail.add((3072, 4096))
+        with self.assertRaises(IOError):
+            download.cached_download(
+                self.url, n_connections=1, chunk_size=1024)
+        self.server.data = np.random.randint(
+            0, 256, size=10000).astype(np.uint8).tobytes()
+        self.server.requests = []
+        path = download.cached_download(
+            self.url, n_connections=2, chunk_size=1024)
+        self.assertEqual(self._read(path), self.server.data)
+        self.assertIn((0, 1024), self.server.requests)
+
+
+@testing.parameterize(
+    {'ext': '.tar', 'mode': 'w'},
+    {'ext': '.tgz', 'mode': 'w:gz'},
+    {'ext': '.zip', 'n_processes': 1},
+    {'ext': '.zip', 'n_processes': 2},
+)
+class TestExtractall(unittest.TestCase):
+
+    def setUp(self):
+        src_dir = tempfile.mkdtemp()
+        self.files = {}
+        for i in range(10):
+            name = 'data/{}/{}.txt'.format('ab'[i % 2], i)
+            self.files[name] = 'file {}'.format(i).encode()
+            path = os.path.join(src_dir, name)
+            if not os.path.exists(os.path.dirname(path)):
+                os.makedirs(os.path.dirname(path))
+            with open(path, 'wb') as f:
+                f.write(self.files[name])
+
+        self.file_path = os.path.join(tempfile.mkdtemp(), 'archive')
+        if self.ext == '.zip':
+            with zipfile.ZipFile(
+                    self.file_path, 'w', zipfile.ZIP_DEFLATED) as z:
+                for name in sorted(self.files):
+                    z.write(os.path.join(src_dir, name), name)
+        else:
+            with tarfile.open(self.file_path, self.mode) as t:
+                t.add(os.path.join(src_dir, 'data'), 'data')
+        self.destination = tempfile.mkdtemp()
+
+    def _extractall(self, member_filter=None):
+        download.extractall(
+            self.file_path, self.destination, self.ext,
+            member_filter=member_filter,
+            n_processes=getattr(self, 'n_processes', None))
+
+    def _check(self, names):
+        for name in self.files:
+            path = os.path.join(self.destination, name)
+            if name in names:
+                with open(path, 'rb') as f:
+                    self.assertEqual(f.read(), self.files[name])
+            else:
+                self.assertFalse(os.path.exists(path))
+
+    def test_extractall(self):
+        self._extractall()
+        self._check(self.files)
+        self.assertFalse(download.extraction_in_progress(self.destination))
+
+    def test_member_filter(self):
+        self._extractall(lambda name: '/a/' in name)
+        self._check([name for name in self.files if '/a/' in name])
+
+    def test_member_filter_then_all(self):
+        self._extractall(lambda name: '/a/' in name)
+        self._extractall(lambda name: name.endswith('1.txt'))
+        self._check([name for name in self.files
+                     if '/a/' in name or name.endswith('1.txt')])
+        self._extractall()
+        self._check(self.files)
+        self.assertFalse(download.extraction_in_progress(self.destination))
+
+    def test_resume(self):
+        # Simulate an extraction interrupted after two members.
+        done = sorted(self.files)[:2]
+        log_path = os.path.join(
+            self.destination,
+            '.{}.extracting'.format(os.path.basename(self.file_path)))
+        with open(log_path, 'w') as f:
+            f.write(download._log_header(self.file_path))
+            f.write(''.join(name + '\n' for name in done))
+        self.assertTrue(download.extraction_in_progress(self.destination))
+
+        self._extractall()
+        self._check([name for name in self.files if name not in done])
+        self.assertFalse(download.extraction_in_progress(self.destination))
+
+        # A completed extraction is not repeated.
+        os.remove(os.path.join(self.destination, sorted(self.files)[-1]))
+        self._extractall()
+        self._check([name for name in self.files if name not in done][:-1])
+
+
+class TestExtractallZipDirectories(unittest.TestCase):
+
+    def test_shared_directories(self):
+        # Many members in nested directories that are shared by the
+        # members extracted by different processes.
+        files = {}
+        for i in range(200):
+            name = 'data/{}/{}/{}.txt'.format(i % 3, i % 5, i)
+            files[name] = 'file {}'.format(i).encode()
+        file_path = os.path.join(tempfile.mkdtemp(), 'archive.zip')
+        with zipfile.ZipFile(file_path, 'w', zipfile.ZIP_DEFLATED) as z:
+            for name in sorted(files):
+                z.writestr(name, files[name])
+        destination = tempfile.mkdtemp()
+
+        # Only the parent process may create directories. The forked
+        # processes inherit this patch and fail if they create any.
+        pid = os.getpid()
+        makedirs = os.makedirs
+
+        def _makedirs(*args, **kwargs):
+            if os.getpid() != pid:
+                raise OSError('a directory is created by a worker')
+            return makedirs(*args, **kwargs)
+
+        with mock.patch('os.makedirs', _makedirs):
+            download.extractall(
+                file_path, destination, '.zip', n_processes=4)
+        for name, data in files.items():
+            with open(os.path.join(destination, name), 'rb') as f:
+                self.assertEqual(f.read(), data)
+
+
+@testing.parameterize(
+    {'ext': '.tar', 'mode': 'w'},
+    {'ext': '.tgz', 'mode': 'w:gz'},
+)
+class TestExtractallTarMembers(unittest.TestCase):
+
+    def setUp(self):
+        self.file_path = os.path.join(tempfile.mkdtemp(), 'archive')
+        self.destination = tempfile.mkdtemp()
+
+    def _add(self, t, name, data=b'', **kwargs):
+        info = tarfile.TarInfo(name)
+        info.size = len(data)
+        info.mtime = 1000000000
+        for key, value in kwargs.items():
+            setattr(info, key, value)
+        t.addfile(info, io.BytesIO(data))
+
+    def _path(self, name):
+        return os.path.join(self.destination, name)
+
+    def test_links_and_modes(self):
+        with tarfile.open(self.file_path, self.mode) as t:
+            self._add(t, 'data', type=tarfile.DIRTYPE, mode=0o755)
+            self._add(t, 'data/run.sh', b'#!/bin/sh\n', mode=0o755)
+            self._add(t, 'data/a.txt', b'a', mode=0o644)
+            self._add(t, 'data/link.txt', type=tarfile.SYMTYPE,
+                      linkname='a.txt')
+            self._add(t, 'data/hard.txt', type=tarfile.LNKTYPE,
+                      linkname='data/a.txt')
+            self._add(t, 'data/fifo', type=tarfile.FIFOTYPE)
+        with warnings.catch_warnings(record=True) as w:
+            warnings.simplefilter('always')
+            download.extractall(self.file_path, self.destination, self.ext)
+        self.assertEqual(len(w), 1)
+
+        self.assertEqual(
+            os.stat(self._path('data/run.sh')).st_mode & 0o777, 0o755)
+        self.assertEqual(
+            os.stat(self._path('data/a.txt')).st_mode & 0o777, 0o644)
+        self.assertEqual(
+            os.stat(self._path('data/a.txt')).st_mtime, 1000000000)
+        self.assertTrue(os.path.islink(self._path('data/link.txt')))
+        self.assertEqual(os.readlink(self._path('data/link.txt')), 'a.txt')
+        for name in ('data/link.txt', 'data/hard.txt'):
+            with open(self._path(name), 'rb') as f:
+                self.assertEqual(f.read(), b'a')
+        self.assertFalse(os.path.lexists(self._path('data/fifo')))
+
+    def test_resume_link(self):
+        with tarfile.open(self.file_path, self.mode) as t:
+            self._add(t, 'a.txt', b'a')
+            self._add(t, 'link.txt', type=tarfile.SYMTYPE,
+                      linkname='a.txt')
+        # A link left by an interrupted extraction is replaced.
+        os.symlink('b.txt', self._path('link.txt'))
+        download.extractall(self.file_path, self.destination, self.ext)
+        self.assertEqual(os.readlink(self._path('link.txt')), 'a.txt')
+
+    def test_link_outside(self):
+        with tarfile.open(self.file_path, self.mode) as t:
+            self._add(t, 'data/link.txt', type=tarfile.SYMTYPE,
+                      linkname='../../a.txt')
+        with self.assertRaises(ValueError):
+            download.extractall(self.file_path, self.destination, self.ext)
+
+
+class TestExtractallPathTraversal(unittest.TestCase):
+
+    def test_path_traversal(self):
+        src = os.path.join(tempfile.mkdtemp(), 'a.txt')
+        with open(src, 'w') as f:
+            f.write('a')
+        file_path = os.path.join(tempfile.mkdtemp(), 'archive.tar')
+        with tarfile.open(file_path, 'w') as t:
+            t.add(src, '../a.txt')
+        with self.assertRaises(ValueError):
+            download.extractall(file_path, tempfile.mkdtemp(), '.tar')
+
+
+testing.run_module(__name__, __file__)
@@ -0,0 +1,109 @@
+import unittest
+
+import io
+import numpy as np
+import os
+import pickle
+from PIL import Image
+import tarfile
+import tempfile
+import zipfile
+
+from chainer import testing
+from chainercv.utils import ArchiveFileSource
+from chainercv.utils import as_file_source
+from chainercv.utils import DirectorySource
+from chainercv.utils import read_image_as_array
+
+
+def _write_files(root, files):
+    for name, data in files.items():
+        path = os.path.join(root, name)
+        if not os.path.exists(os.path.dirname(path)):
+            os.makedirs(os.path.dirname(path))
+        with open(path, 'wb') as f:
+            f.write(data)
+
+
+@testing.parameterize(
+    {'format': 'tar'},
+    {'format': 'zip', 'compression': zipfile.ZIP_STORED},
+    {'format': 'zip', 'compression': zipfile.ZIP_DEFLATED},
+)
+class TestArchiveFileSource(unittest.TestCase):
+
+    def setUp(self):
+        img = np.random.randint(0, 256, size=(6, 8, 3)).astype(np.uint8)
+        buf = io.BytesIO()
+        Image.fromarray(img).save(buf, format='PNG')
+        self.img = img
+        self.files = {
+            'data/a.txt': b'hello\nworld\n',
+            'data/sub/b.png': buf.getvalue(),
+            'data/empty.txt': b'',
+        }
+        src_dir = tempfile.mkdtemp()
+        _write_files(src_dir, self.files)
+
+        self.archive_path = os.path.join(
+            tempfile.mkdtemp(), 'archive.' + self.format)
+        if self.format == 'tar':
+            with tarfile.open(self.archive_path, 'w') as t:
+                t.add(os.path.join(src_dir, 'data'), 'data')
+        else:
+            with zipfile.ZipFile(
+                    self.archive_path, 'w', self.compression) as z:
+                for name in self.files:
+                    z.write(os.path.join(src_dir, name), name)
+
+    def test_read(self):
+        source = ArchiveFileSource(self.archive_path, 'data')
+        self.assertEqual(source.read('a.txt'), self.files['data/a.txt'])
+        self.assertEqual(source.read('empty.txt'), b'')
+        self.assertEqual(source.stat('a.txt')[1], 12)
+        with source.open('sub/b.png') as f:
+            np.testing.assert_equal(read_image_as_array(f), self.img)
+
+    def test_missing_member(self):
+        source = ArchiveFileSource(self.archive_path, 'data')
+        with self.assertRaises(IOError):
+            source.read('c.txt')
+
+    def test_index_file(self):
+        ArchiveFileSource(self.archive_path)
+        self.assertTrue(os.path.exists(self.archive_path + '.index.npz'))
+        source = ArchiveFileSource(self.archive_path)
+        self.assertEqual(source.read('data/a.txt'), self.files['data/a.txt'])
+
+    def test_pickle(self):
+        source = ArchiveFileSource(self.archive_path, 'data')
+        source.read('a.txt')
+        source = pickle.loads(pickle.dumps(source))
+        self.assertEqual(source.read('a.txt'), self.files['data/a.txt'])
+
+
+class TestArchiveFileSourceCompressedTar(unittest.TestCase):
+
+    def test_compressed_tar(self):
+        src_dir = tempfile.mkdtemp()
+        _write_files(src_dir, {'a.txt': b'hello'})
+        archive_path = os.path.join(tempfile.mkdtemp(), 'archive.tar.gz')
+        with tarfile.open(archive_path, 'w:gz') as t:
+            t.add(os.path.join(src_dir, 'a.txt'), 'a.txt')
+        with self.assertRaises(ValueError):
+            ArchiveFileSource(archive_path)
+
+
+class TestDirectorySource(unittest.TestCase):
+
+    def test_directory_source(self):
+        root = tempfile.mkdtemp()
+        _write_files(root, {'sub/a.txt': b'hello'})
+        source = as_file_source(root)
+        self.assertIsInstance(source, DirectorySource)
+        self.assertEqual(source.read('sub/a.txt'), b'hello')
+        self.assertEqual(source.stat('sub/a.txt')[1], 5)
+        self.assertIs(as_file_source(source), source)
+
+
+testing.run_module(__name__, __file__)
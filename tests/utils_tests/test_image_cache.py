@@ -0,0 +1,110 @@
+import unittest
+
+import multiprocessing
+import numpy as np
+import os
+import tempfile
+
+from PIL import Image
+
+from chainer import testing
+from chainercv.utils import DecodedImageCache
+from chainercv.utils import read_image_as_array
+
+
+def _read(cache, path):
+    read_image_as_array(path, cache=cache)
+
+
+class TestDecodedImageCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.img = np.random.randint(
+            0, 256, size=(10, 12, 3)).astype(np.uint8)
+        self.nbytes = self.img.nbytes + 128  # header of .npy
+
+    def test_get_put(self):
+        cache = DecodedImageCache(self.cache_dir, max_bytes=10 * self.nbytes)
+        self.assertIsNone(cache.get('a'))
+        cache.put('a', self.img)
+        out = cache.get('a')
+        np.testing.assert_equal(out, self.img)
+        self.assertFalse(out.flags.writeable)
+        self.assertEqual(
+            cache.stats(),
+            {'hits': 1, 'misses': 1, 'evictions': 0, 'bytes': self.nbytes})
+
+    def test_eviction(self):
+        cache = DecodedImageCache(self.cache_dir, max_bytes=3 * self.nbytes)
+        for key in ('a', 'b', 'c'):
+            cache.put(key, self.img)
+        # mark 'a' as recently used
+        os.utime(cache._entry_path('a'), (0, 1))
+        os.utime(cache._entry_path('b'), (0, 0))
+        os.utime(cache._entry_path('c'), (0, 2))
+        cache.get('a')
+        cache.put('d', self.img)
+
+        self.assertIsNone(cache.get('b'))
+        self.assertIsNone(cache.get('c'))
+        self.assertIsNotNone(cache.get('a'))
+        self.assertIsNotNone(cache.get('d'))
+        stats = cache.stats()
+        self.assertEqual(stats['evictions'], 2)
+        self.assertEqual(stats['bytes'], 2 * self.nbytes)
+
+    def test_too_large(self):
+        cache = DecodedImageCache(self.cache_dir, max_bytes=self.nbytes - 1)
+        cache.put('a', self.img)
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.stats()['bytes'], 0)
+
+    def test_clear(self):
+        cache = DecodedImageCache(self.cache_dir, max_bytes=10 * self.nbytes)
+        cache.put('a', self.img)
+        cache.clear()
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.stats()['misses'], 1)
+
+
+class TestReadImageAsArrayCache(unittest.TestCase):
+
+    def setUp(self):
+        self.cache_dir = tempfile.mkdtemp()
+        self.img = np.random.randint(
+            0, 256, size=(10, 12, 3)).astype(np.uint8)
+        self.path = os.path.join(tempfile.mkdtemp(), 'img.png')
+        Image.fromarray(self.img).save(self.path)
+
+    def test_read_image_as_array(self):
+        cache = DecodedImageCache(self.cache_dir)
+        out = read_image_as_array(self.path, cache=cache)
+        np.testing.assert_equal(out, self.img)
+        out = read_image_as_array(self.path, cache=cache)
+        np.testing.assert_equal(out, self.img)
+        self.assertTrue(out.flags.writeable)
+        out = read_image_as_array(self.path, cache=cache, copy=False)
+        self.assertFalse(out.flags.writeable)
+        self.assertEqual(cache.stats()['hits'], 2)
+        self.assertEqual(cache.stats()['misses'], 1)
+
+    def test_output_shape(self):
+        cache = DecodedImageCache(self.cache_dir)
+        read_image_as_array(self.path, cache=cache)
+        out = read_image_as_array(
+            self.path, cache=cache, output_shape=(5, 6))
+        self.assertEqual(out.shape, (5, 6, 3))
+        self.assertEqual(cache.stats()['misses'], 2)
+
+    def test_shared_by_processes(self):
+        cache = DecodedImageCache(self.cache_dir)
+        p = multiprocessing.Process(target=_read, args=(cache, self.path))
+        p.start()
+        p.join()
+        read_image_as_array(self.path, cache=cache)
+        self.assertEqual(cache.stats()['misses'], 1)
+        self.assertEqual(cache.stats()['hits'], 1)
+
+
+testing.run_module(__name__, __file__)
@@ -0,0 +1,90 @@
+import unittest
+
+import numpy as np
+import os
+from PIL import Image
+import tempfile
+
+from chainer import testing
+from chainercv.utils import hwc_to_chw
+from chainercv.utils import read_image_as_array
+from chainercv.utils import read_image_shape
+
+
+@testing.parameterize(
+    {'format': 'jpg', 'shape': (48, 64, 3)},
+    {'format': 'jpg', 'shape': (48, 64)},
+    {'format': 'png', 'shape': (48, 64, 3)},
+)
+class TestReadImageAsArray(unittest.TestCase):
+
+    def setUp(self):
+        self.path = os.path.join(
+            tempfile.mkdtemp(), 'img.{}'.format(self.format))
+        self.img = np.random.randint(
+            0, 256, size=self.shape).astype(np.uint8)
+        Image.fromarray(self.img).save(self.path)
+
+    def test_read_image_as_array(self):
+        img = read_image_as_array(self.path)
+        self.assertEqual(img.shape, self.shape)
+        self.assertEqual(img.dtype, np.uint8)
+        if self.format == 'png':
+            np.testing.assert_equal(img, self.img)
+
+    def test_read_image_as_array_output_shape(self):
+        img = read_image_as_array(self.path, output_shape=(12, 20))
+        self.assertEqual(img.shape, (12, 20) + self.shape[2:])
+
+    def test_read_image_as_array_crop(self):
+        img = read_image_as_array(self.path, crop=(10, 5, 30, 60))
+        expected = read_image_as_array(self.path)[5:60, 10:30]
+        np.testing.assert_equal(img, expected)
+
+    def test_read_image_as_array_crop_output_shape(self):
+        img = read_image_as_array(
+            self.path, crop=(10, 5, 30, 60), output_shape=(12, 20))
+        self.assertEqual(img.shape, (12, 20) + self.shape[2:])
+
+    def test_read_image_as_array_color(self):
+        img = read_image_as_array(self.path, color=True)
+        self.assertEqual(img.shape, self.shape[:2] + (3,))
+        if len(self.shape) == 2:
+            for c in range(3):
+                np.testing.assert_equal(
+                    img[:, :, c], read_image_as_array(self.path))
+
+    def test_read_image_shape(self):
+        self.assertEqual(read_image_shape(self.path), self.shape[:2])
+
+
+class TestHWCToCHW(unittest.TestCase):
+
+    def setUp(self):
+        self.img = np.random.randint(
+            0, 256, size=(6, 8, 3)).astype(np.uint8)
+
+    def test_hwc_to_chw(self):
+        out = hwc_to_chw(self.img)
+        self.assertEqual(out.dtype, np.float32)
+        np.testing.assert_equal(out, self.img.transpose(2, 0, 1)[::-1])
+
+        out = hwc_to_chw(self.img, reverse_color_channel=False)
+        np.testing.assert_equal(out, self.img.transpose(2, 0, 1))
+
+    def test_hwc_to_chw_out_mean(self):
+        mean = np.array([1, 2, 3], dtype=np.float32)[:, None, None]
+        out = np.empty((3, 6, 8), dtype=np.float32)
+        ret = hwc_to_chw(self.img, out=out, mean=mean)
+        self.assertIs(ret, out)
+        np.testing.assert_almost_equal(
+            out, self.img.transpose(2, 0, 1)[::-1] - mean)
+
+    def test_hwc_to_chw_grayscale(self):
+        out = hwc_to_chw(self.img[:, :, 0])
+        self.assertEqual(out.shape, (3, 6, 8))
+        for c in range(3):
+            np.testing.assert_equal(out[c], self.img[:, :, 0])
+
+
+testing.run_module(__name__, __file__)